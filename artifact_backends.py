@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+아티팩트 저장소 백엔드
+
+Google Drive 폴더와 동일한 구조(predictors/, models/, txt/, preprocessing.py, ...)를
+로컬 디렉터리 또는 tar 번들에서 제공한다. 네트워크 없이 이미지에 포함된 번들로 부팅할 수 있다.
+
+    SSNHL_ARTIFACT_DIR=/opt/ssnhl/artifacts        → LocalDirectoryBackend
+    SSNHL_ARTIFACT_DIR=/opt/ssnhl/artifacts.tar.gz → TarballBackend (최초 1회 압축 해제)
+    (미설정)                                        → Google Drive (artifacts.DriveBackend)
+"""
+import io
+import os
+import mmap
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import threading
+
+ARTIFACT_DIR_ENV = "SSNHL_ARTIFACT_DIR"
+ARTIFACT_CACHE_ENV = "SSNHL_ARTIFACT_CACHE"
+
+# 이 크기 이상 파일은 mmap으로 읽는다 (모델 파일)
+MMAP_THRESHOLD = 1024 * 1024
+
+
+class ArtifactBackend:
+    """아티팩트 백엔드 인터페이스 (경로는 Drive 폴더 기준 상대 경로)"""
+    name = "base"
+
+    def open(self, path):
+        """읽기용 파일 객체 반환 (없으면 None)"""
+        raise NotImplementedError
+
+    def read_bytes(self, path):
+        """파일 전체 내용 (없으면 None)"""
+        content = self.open(path)
+        return content.read() if content is not None else None
+
+    def local_path(self, path):
+        """로컬 파일 경로 (로컬 파일이 없는 백엔드는 None)"""
+        return None
+
+    def exists(self, path):
+        return self.local_path(path) is not None
+
+    def describe(self):
+        return self.name
+
+
+class LocalDirectoryBackend(ArtifactBackend):
+    """로컬 디렉터리 백엔드 (큰 파일은 mmap으로 제공)"""
+    name = "local"
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._basename_index = None
+        self._index_lock = threading.Lock()
+
+    def _index(self):
+        """Drive와 동일하게 파일명만으로도 찾을 수 있도록 basename 색인"""
+        with self._index_lock:
+            if self._basename_index is None:
+                index = {}
+                for dirpath, _, filenames in os.walk(self.root):
+                    for filename in filenames:
+                        index.setdefault(filename, os.path.join(dirpath, filename))
+                self._basename_index = index
+        return self._basename_index
+
+    def local_path(self, path):
+        full_path = os.path.join(self.root, path)
+        if os.path.isfile(full_path):
+            return full_path
+        return self._index().get(os.path.basename(path))
+
+    def open(self, path):
+        full_path = self.local_path(path)
+        if full_path is None:
+            return None
+        return open_mapped(full_path)
+
+    def describe(self):
+        return f"{self.name}:{self.root}"
+
+
+class TarballBackend(LocalDirectoryBackend):
+    """tar / tar.gz 번들 백엔드 (캐시 디렉터리에 1회 압축 해제 후 로컬 디렉터리로 사용)"""
+    name = "tarball"
+
+    def __init__(self, tar_path, cache_dir=None):
+        self.tar_path = os.path.abspath(tar_path)
+        super().__init__(extract_bundle(self.tar_path, cache_dir))
+
+    def describe(self):
+        return f"{self.name}:{self.tar_path}"
+
+
+def open_mapped(path, threshold=MMAP_THRESHOLD):
+    """작은 파일은 BytesIO, 큰 파일은 읽기 전용 mmap (둘 다 read/seek 지원)"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if size >= threshold:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return io.BytesIO(f.read())
+
+
+def safe_members(tar, dest):
+    """일반 파일 / 디렉터리만, dest 밖으로 나가는 경로(절대 경로, ..)는 거부"""
+    root = os.path.realpath(dest)
+    members = []
+    for member in tar.getmembers():
+        target = os.path.realpath(os.path.join(root, member.name))
+        if os.path.isabs(member.name) or os.path.commonpath([root, target]) != root:
+            raise ValueError(f"번들 밖을 가리키는 경로: {member.name}")
+        if not (member.isfile() or member.isdir()):
+            raise ValueError(f"번들에 허용되지 않는 항목(링크 / 장치 파일): {member.name}")
+        members.append(member)
+    return members
+
+
+def extract_bundle(tar_path, cache_dir=None):
+    """번들 내용(크기/수정시각) 기준 캐시 디렉터리에 압축 해제 (이미 있으면 재사용)
+
+    임시 디렉터리에 푼 뒤 rename 하므로 여러 프로세스가 동시에 풀어도 반쯤 풀린 디렉터리를 보지 않는다.
+    """
+    stat = os.stat(tar_path)
+    digest = hashlib.sha1(f"{tar_path}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+    cache_root = cache_dir or os.environ.get(ARTIFACT_CACHE_ENV) or os.path.join(
+        os.path.dirname(tar_path), ".ssnhl_artifacts"
+    )
+    dest = os.path.join(cache_root, digest)
+    marker = os.path.join(dest, ".complete")
+    if os.path.exists(marker):
+        return dest
+
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{digest}.", dir=cache_root)
+    try:
+        with tarfile.open(tar_path, 'r:*') as tar:
+            members = safe_members(tar, tmp_dir)
+            try:
+                tar.extractall(tmp_dir, members=members, filter='data')
+            except TypeError:  # filter 인자가 없는 Python: safe_members 검증만 사용
+                tar.extractall(tmp_dir, members=members)
+        with open(os.path.join(tmp_dir, ".complete"), 'w') as f:
+            f.write(tar_path)
+
+        if os.path.isdir(dest) and not os.path.exists(marker):
+            shutil.rmtree(dest, ignore_errors=True)  # 이전에 중단된 압축 해제
+        try:
+            os.rename(tmp_dir, dest)
+        except OSError:
+            if not os.path.exists(marker):  # 다른 프로세스가 먼저 완료한 경우만 정상
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return dest
+
+
+def local_backend_from_env():
+    """SSNHL_ARTIFACT_DIR 설정 시 로컬 백엔드 생성 (미설정이면 None)"""
+    location = os.environ.get(ARTIFACT_DIR_ENV)
+    if not location:
+        return None
+    if os.path.isdir(location):
+        return LocalDirectoryBackend(location)
+    if tarfile.is_tarfile(location):
+        return TarballBackend(location)
+    raise FileNotFoundError(f"{ARTIFACT_DIR_ENV}={location} 은(는) 디렉터리나 tar 번들이 아닙니다.")
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+아티팩트 로드 (predictor 코드, 전처리/번역 모듈, 모델, 정확도 txt)
+
+기본은 Google Drive이며, SSNHL_ARTIFACT_DIR 이 설정되면 로컬 디렉터리 / tar 번들에서
+네트워크 없이 로드한다 (artifact_backends.py 참고).
+
+st.cache_resource / st.cache_data 캐시는 프로세스 단위로 공유되므로
+main.py와 배포 warm-up(serve.py)이 같은 캐시를 사용한다.
+"""
+import os, io, importlib
+import streamlit as st
+
+from lazy_imports import lazy_module
+from artifact_backends import ArtifactBackend, local_backend_from_env
+from predictor_loader import ArtifactModuleRegistry
+from model_bundles import InferenceContext, build_model_bundle
+from model_store import (
+    PREDICTOR_FILES, MODEL_FILES, load_model_artifact, global_importance_path, accuracy_path, parse_accuracy,
+    partial_dependence_path, input_reference_path
+)
+from google_clients import get_google_transport, download_chunk_size
+from global_importance import read_global_importance
+from partial_dependence import read_partial_dependence
+from translations import load_catalog
+from drift import read_reference
+from static_assets import build_image_asset, stylesheet_html
+
+# ======================
+# 🔹 Google Drive 설정
+# ======================
+FOLDER_ID = '1rTMoyzj1qxc8ET5648XvF0E-3oN46lel'
+
+# Google 클라이언트 라이브러리는 Drive에 실제 접근할 때 로드
+googleapiclient_http = lazy_module("googleapiclient.http")
+
+@st.cache_resource
+def get_drive_service():
+    """Google Drive 서비스 객체 (Sheets와 자격 증명 / 연결 풀 공유)"""
+    transport = get_google_transport()
+    if not transport:
+        return None
+    try:
+        return transport.drive_service()
+    except Exception as e:
+        st.error(f"Google Drive 서비스 초기화 실패: {str(e)}")
+        return None
+
+@st.cache_data
+def download_file_from_drive(file_name):
+    """Google Drive에서 지정된 파일을 다운로드 (predictors, models 폴더 포함)"""
+    service = get_drive_service()
+    if not service:
+        return None
+
+    def find_file_recursive(folder_id, target_name):
+        """폴더 전체를 재귀 탐색 (predictors/, models/ 모두 지원)"""
+        try:
+            # 현재 폴더에서 파일 검색
+            query = f"'{folder_id}' in parents and name='{target_name}' and trashed=false"
+            results = service.files().list(q=query, fields="files(id, name, mimeType)").execute()
+            files = results.get("files", [])
+            if files:
+                return files[0]["id"]
+
+            # 하위 폴더 검색
+            subfolders_query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            subfolders = service.files().list(q=subfolders_query, fields="files(id, name)").execute().get("files", [])
+
+            for sub in subfolders:
+                found = find_file_recursive(sub["id"], target_name)
+                if found:
+                    return found
+
+            return None
+        except Exception as e:
+            st.warning(f"폴더 탐색 중 오류 발생 ({target_name}): {e}")
+            return None
+
+    # 🔍 실제 탐색 시작
+    file_id = find_file_recursive(FOLDER_ID, os.path.basename(file_name))
+
+    if not file_id:
+        st.warning(f"❌ Google Drive에서 {file_name}을(를) 찾을 수 없습니다.")
+        return None
+
+    # ✅ 파일 다운로드
+    try:
+        request = service.files().get_media(fileId=file_id)
+        file_data = io.BytesIO()
+        downloader = googleapiclient_http.MediaIoBaseDownload(file_data, request, chunksize=download_chunk_size())
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+        file_data.seek(0)
+        return file_data
+    except Exception as e:
+        st.error(f"📁 {file_name} 다운로드 실패: {str(e)}")
+        return None
+
+
+# ======================
+# 🔹 아티팩트 백엔드 선택
+# ======================
+class DriveBackend(ArtifactBackend):
+    """Google Drive 백엔드 (download_file_from_drive 캐시 사용)"""
+    name = "drive"
+
+    def open(self, path):
+        return download_file_from_drive(path)
+
+    def exists(self, path):
+        return self.open(path) is not None
+
+    def describe(self):
+        return f"{self.name}:{FOLDER_ID}"
+
+@st.cache_resource
+def get_artifact_backend():
+    """SSNHL_ARTIFACT_DIR 이 있으면 로컬 번들, 없으면 Google Drive"""
+    try:
+        backend = local_backend_from_env()
+    except Exception as e:
+        st.error(f"로컬 아티팩트 번들 로드 실패: {str(e)}")
+        backend = None
+    return backend or DriveBackend()
+
+def fetch_artifact(file_name):
+    """현재 백엔드에서 아티팩트 읽기 (파일 객체 또는 None)"""
+    return get_artifact_backend().open(file_name)
+
+# ======================
+# 🔹 정적 자산 (로고 / CSS)
+# ======================
+def static_serving_enabled():
+    return bool(st.get_option("server.enableStaticServing"))
+
+@st.cache_resource
+def get_stylesheet_html():
+    """static/app.css 인라인 <style> 블록 (프로세스당 1회 읽기)"""
+    return stylesheet_html()
+
+@st.cache_resource
+def get_image_asset(name):
+    """표시 크기로 최적화된 이미지 → (정적 URL, bytes), 실패 시 (None, None)"""
+    try:
+        return build_image_asset(name, get_artifact_backend().read_bytes)
+    except Exception as e:
+        st.warning(f"⚠️ 이미지 자산 생성 실패 ({name}): {e}")
+        return None, None
+
+# ======================
+# 🔹 코드 모듈 (predictors / preprocessing / translation)
+# ======================
+def _fetch_source(path):
+    return get_artifact_backend().read_bytes(path)
+
+@st.cache_resource
+def get_code_registry():
+    """아티팩트 코드 모듈을 메모리에서 import 하는 finder (프로세스당 1회 등록)"""
+    return ArtifactModuleRegistry(_fetch_source).install()
+
+@st.cache_resource
+def load_predictor_modules():
+    """predictor 코드를 1회 받아 두고 registry 반환 (sys.path 변경 없음)"""
+    registry = get_code_registry()
+    for file_path in registry.prefetch(PREDICTOR_FILES):
+        st.warning(f"⚠️ {file_path} 다운로드 실패")
+    return registry
+
+@st.cache_resource
+def load_preprocessing_and_translation():
+    """preprocessing 모듈 로드 (번역은 선택된 언어만 get_translation_catalog에서 로드)"""
+    get_code_registry()
+    try:
+        from preprocessing import load_and_process_data, impute_data, finalize_data
+        return True
+    except Exception as e:
+        st.error(f"모듈 로드 실패: {str(e)}")
+        return False
+
+@st.cache_resource
+def get_translation_catalog(lang_code):
+    """언어 1개의 번역 카탈로그 (읽기 전용, 프로세스 공용 캐시)"""
+    get_code_registry()
+    return load_catalog(
+        get_artifact_backend().read_bytes, lang_code,
+        lambda: importlib.import_module("translate_texts"),
+    )
+
+def reload_artifacts(models=False):
+    """아티팩트 변경 시 명시적 hot-reload (바뀐 코드 경로 목록 반환)"""
+    download_file_from_drive.clear()
+    changed = get_code_registry().reload()
+    if changed:
+        load_preprocessing_and_translation.clear()
+    get_translation_catalog.clear()
+    if models:
+        load_models_from_drive.clear()
+        get_model_bundle.clear()
+        get_tree_explainer.clear()
+        load_global_importance_from_drive.clear()
+        load_partial_dependence_from_drive.clear()
+        load_input_reference_from_drive.clear()
+        get_accuracy_from_drive.clear()
+    return changed
+
+# ======================
+# 🔹 모델 파일 로드 함수
+# ======================
+@st.cache_resource
+def load_models_from_drive():
+    """아티팩트 저장소(Google Drive 또는 로컬 번들)에서 모델 파일 로드"""
+    backend = get_artifact_backend()
+    loaded_models = {}
+
+    for hospital, paths in MODEL_FILES.items():
+            loaded_models[hospital] = {}
+            for model_type, path in paths.items():
+                try:
+                    # 로컬 번들은 mmap으로 직접, Drive는 임시 파일 경유
+                    # scaler는 joblib, 모델은 cloudpickle → pickle → joblib
+                    model = load_model_artifact(backend, path, model_type)
+                    if model is not None:
+                        loaded_models[hospital][model_type] = model
+                    else:
+                        pass  # 경고 메시지 제거
+                except Exception as e:
+                    pass  # 에러 메시지 제거
+
+    return loaded_models
+
+@st.cache_data
+def load_global_importance_from_drive(hospital_key):
+    """오프라인 계산된 전역 변수 중요도(mean |SHAP|) 로드"""
+    try:
+        content = fetch_artifact(global_importance_path(hospital_key))
+        if content:
+            return read_global_importance(content)
+    except Exception as e:
+        pass
+    return None
+
+
+@st.cache_data
+def load_partial_dependence_from_drive(hospital_key):
+    """오프라인 계산된 partial dependence / ICE 곡선 로드"""
+    try:
+        content = fetch_artifact(partial_dependence_path(hospital_key))
+        if content:
+            return read_partial_dependence(content)
+    except Exception as e:
+        pass
+    return None
+
+
+@st.cache_data
+def load_input_reference_from_drive(hospital_key):
+    """학습 코호트 입력 분포(드리프트 감지 기준) 로드"""
+    try:
+        content = fetch_artifact(input_reference_path(hospital_key))
+        if content:
+            return read_reference(content)
+    except Exception as e:
+        pass
+    return None
+
+
+@st.cache_data
+def get_accuracy_from_drive(hospital_key, model_type):
+    """정확도 txt 파일 로드"""
+    try:
+        content = get_artifact_backend().read_bytes(accuracy_path(hospital_key, model_type))
+        return parse_accuracy(content) if content else 0.75  # 기본값
+    except Exception as e:
+        return 0.75  # 기본값
+
+# ======================
+# 🔹 predictor / explainer 구성
+# ======================
+@st.cache_resource
+def get_model_bundle(hospital_key):
+    """병원별 불변 모델 번들 (모델, scaler, 정확도) - 모든 세션이 읽기 전용으로 공유"""
+    from compiled_models import with_compiled_models
+
+    # SSNHL_COMPILED_MODELS 대상 병원은 검증된 ONNX 모델로 예측 (SHAP은 원본 모델 사용)
+    models = with_compiled_models(
+        get_artifact_backend(), hospital_key, load_models_from_drive().get(hospital_key, {})
+    )
+    return build_model_bundle(hospital_key, models, get_accuracy_from_drive)
+
+def remote_inference_address():
+    """SSNHL_INFERENCE_SERVER 설정 시 멀티 프로세스 추론 서버 주소 (inference_server.py)"""
+    return os.environ.get("SSNHL_INFERENCE_SERVER")
+
+def create_inference_context(module_name):
+    """요청 단위 추론 컨텍스트 (predictor는 매번 새로 만들고 공유 번들은 수정하지 않음)"""
+    address = remote_inference_address()
+    if address:
+        from inference_server import RemoteInferenceContext
+        return RemoteInferenceContext.create(address, module_name)
+
+    hospital_key = module_name.split('.')[-1]
+    return InferenceContext.create(
+        module_name, get_model_bundle(hospital_key),
+        explainer_fn=lambda model_type: get_tree_explainer(hospital_key, model_type)
+    )
+
+def predict_horizons(df_input, horizons, explain_days=None):
+    """여러 예측 기간(하겐병원 30/60/180일)을 한 번에 예측 ({일수: HorizonPrediction})
+
+    explain_days는 추론 서버에서만 사용한다 (워커가 해당 기간 SHAP을 예측과 함께 계산해 보냄).
+    로컬 경로는 SHAP을 미리 계산하지 않고, 호출 측이 필요한 기간의 inference.shap_values를 부른다.
+    """
+    from hagen_horizons import score_horizons
+
+    address = remote_inference_address()
+    if address:
+        from inference_server import request_horizons
+        return request_horizons(address, df_input, horizons, explain_days)
+    return score_horizons(df_input, create_inference_context, horizons)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def simulate_whatif(module_name, df_input, features):
+    """혈액검사 what-if 시뮬레이션 (같은 병원 / 같은 입력은 다시 예측하지 않음)"""
+    from whatif import run_whatif
+
+    inference = create_inference_context(module_name)
+    return run_whatif(inference.predict_batch, df_input, list(features))
+
+@st.cache_resource
+def get_tree_explainer(hospital_key, model_type):
+    """병원별 트리 모델의 SHAP TreeExplainer (프로세스 단위로 1회 생성)"""
+    import shap
+
+    model = load_models_from_drive().get(hospital_key, {}).get(model_type)
+    if model is None:
+        return None
+    return shap.TreeExplainer(model)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+청력도(PTA 기도역치) 파생 지표
+
+환자 n명 × 양쪽 귀(RT, LT) × 7개 주파수 배열을 NumPy로 한 번에 계산한다.
+앱의 단일 환자 입력(pta_values dict)과 코호트 CSV(PTA_*_AC_* 컬럼)가 같은 함수를 사용한다.
+
+    - pta4            : 500 / 1000 / 2000 / 4000 Hz 평균 (귀별)
+    - asymmetry       : 환측(Side) PTA4 − 반대측 PTA4
+    - hf_slope        : 환측 1000–8000 Hz 최소제곱 기울기 (dB/octave)
+    - siegel_*        : Siegel 기준 회복 판정의 기저값 (완전 회복 25 dB, 유의 회복 15 dB 개선)
+
+    python audiogram.py --cohort cohort.csv --out audiogram_features.csv
+"""
+import sys
+import argparse
+import numpy as np
+
+PTA_FREQUENCIES = ["250", "500", "1000", "2000", "3000", "4000", "8000"]
+EARS = ["RT", "LT"]
+FREQUENCIES_HZ = np.array([int(f) for f in PTA_FREQUENCIES], dtype=float)
+
+# 청력계 측정 범위 (dB HL)
+DB_MIN, DB_MAX = -10.0, 120.0
+
+PTA4_FREQUENCIES = ["500", "1000", "2000", "4000"]
+HF_SLOPE_FREQUENCIES = ["1000", "2000", "3000", "4000", "8000"]
+
+# Siegel 기준: 최종 청력 25 dB 이내면 완전 회복, 15 dB 이상 개선이면 유의 회복
+SIEGEL_COMPLETE_DB = 25.0
+SIEGEL_GAIN_DB = 15.0
+
+# Side 코드 (main.py side_mapping) → 환측 귀 인덱스
+SIDE_TO_EAR = {1: 0, 2: 1}
+
+
+def pta_column(ear, freq):
+    return f"PTA_{ear}_AC_{freq}"
+
+
+def pta_columns():
+    """(귀, 주파수) 순서의 입력 컬럼명"""
+    return [pta_column(ear, freq) for ear in EARS for freq in PTA_FREQUENCIES]
+
+
+def _freq_index(freqs):
+    return [PTA_FREQUENCIES.index(f) for f in freqs]
+
+
+# ======================
+# 🔹 입력 → 배열
+# ======================
+def audiogram_from_frame(df):
+    """DataFrame(PTA_*_AC_* 컬럼) → (n, 2, 7) float 배열 (빈 값 / 없는 컬럼은 NaN)"""
+    import pandas as pd
+
+    columns = pta_columns()
+    values = df.reindex(columns=columns).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    return values.reshape(len(df), len(EARS), len(PTA_FREQUENCIES))
+
+
+def audiogram_from_values(pta_values):
+    """단일 환자 dict({PTA_RT_AC_250: 값, ...}) → (1, 2, 7) 배열"""
+    values = [pta_values.get(column) for column in pta_columns()]
+    array = np.array([np.nan if v is None or v == "" else float(v) for v in values], dtype=float)
+    return array.reshape(1, len(EARS), len(PTA_FREQUENCIES))
+
+
+def out_of_range(audiograms):
+    """측정 범위(DB_MIN–DB_MAX)를 벗어난 값 마스크 (NaN은 제외)"""
+    with np.errstate(invalid="ignore"):
+        return (audiograms < DB_MIN) | (audiograms > DB_MAX)
+
+
+def mask_out_of_range(audiograms):
+    """측정 범위를 벗어난 값을 NaN으로 바꾼 복사본 (지표 계산에서 결측처럼 제외)"""
+    audiograms = np.array(audiograms, dtype=float)
+    audiograms[out_of_range(audiograms)] = np.nan
+    return audiograms
+
+
+def range_errors(audiograms):
+    """환자별 범위를 벗어난 입력 컬럼명 목록"""
+    columns = np.array(pta_columns())
+    mask = out_of_range(audiograms).reshape(len(audiograms), -1)
+    return [columns[row].tolist() for row in mask]
+
+
+# ======================
+# 🔹 파생 지표
+# ======================
+def _nanmean(values, axis=-1):
+    """빈 구간 경고 없이 NaN 무시 평균 (전부 NaN이면 NaN)"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=axis)
+    total = np.where(valid, values, 0.0).sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def hf_slope(thresholds, freqs=HF_SLOPE_FREQUENCIES):
+    """(n, 7) 한쪽 귀 역치 → 고주파 최소제곱 기울기 (dB/octave, 유효 점 2개 미만이면 NaN)"""
+    y = thresholds[:, _freq_index(freqs)]
+    x = np.broadcast_to(np.log2(FREQUENCIES_HZ[_freq_index(freqs)]), y.shape)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1)
+    x_mean = _nanmean(np.where(valid, x, np.nan))
+    y_mean = _nanmean(y)
+    dx = np.where(valid, x - x_mean[:, None], 0.0)
+    dy = np.where(valid, y - y_mean[:, None], 0.0)
+    denom = (dx * dx).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((n >= 2) & (denom > 0), (dx * dy).sum(axis=1) / denom, np.nan)
+
+
+def audiogram_features(audiograms, sides):
+    """(n, 2, 7) 청력도 + Side 코드(1=Right, 2=Left) → 파생 지표 dict (값은 길이 n 배열)
+
+    측정 범위를 벗어난 값은 NaN으로 바꿔 PTA4 / 비대칭 / 기울기 / Siegel 기저값 계산에서 제외한다
+    (어떤 값이 제외됐는지는 range_errors로 확인).
+    """
+    audiograms = mask_out_of_range(audiograms)
+    n = len(audiograms)
+    sides = np.broadcast_to(np.asarray(sides, dtype=float), (n,))
+    affected = np.where(sides == 2, SIDE_TO_EAR[2], SIDE_TO_EAR[1])  # 알 수 없는 값은 Right
+    rows = np.arange(n)
+
+    pta4 = _nanmean(audiograms[:, :, _freq_index(PTA4_FREQUENCIES)])  # (n, 2)
+    affected_pta4 = pta4[rows, affected]
+    contralateral_pta4 = pta4[rows, 1 - affected]
+    affected_thresholds = audiograms[rows, affected]
+
+    return {
+        "pta4_rt": pta4[:, 0],
+        "pta4_lt": pta4[:, 1],
+        "pta4_affected": affected_pta4,
+        "pta4_contralateral": contralateral_pta4,
+        "asymmetry": affected_pta4 - contralateral_pta4,
+        "hf_slope": hf_slope(affected_thresholds),
+        # 완전 회복(25 dB)까지 필요한 개선량, 반대측 수준까지의 최대 개선 가능량
+        "siegel_gain_to_complete": np.clip(affected_pta4 - SIEGEL_COMPLETE_DB, 0, None),
+        "siegel_max_gain": np.clip(affected_pta4 - np.maximum(contralateral_pta4, SIEGEL_COMPLETE_DB), 0, None),
+        # 유의 회복(15 dB 개선)이 판정 가능한 초기 청력인지
+        "siegel_gain_measurable": affected_pta4 - SIEGEL_COMPLETE_DB >= SIEGEL_GAIN_DB,
+    }
+
+
+def features_frame(df, side_column="Side"):
+    """코호트 DataFrame → 파생 지표 DataFrame (같은 index, 범위 오류 컬럼 포함)"""
+    import pandas as pd
+
+    audiograms = audiogram_from_frame(df)
+    sides = pd.to_numeric(df[side_column], errors='coerce').fillna(1).to_numpy() if side_column in df else 1
+    features = pd.DataFrame(audiogram_features(audiograms, sides), index=df.index)
+    features["range_errors"] = [", ".join(cols) for cols in range_errors(audiograms)]
+    return features
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="코호트 청력도 파생 지표 계산")
+    parser.add_argument("--cohort", required=True, help="코호트 CSV (PTA_*_AC_*, Side 컬럼)")
+    parser.add_argument("--out", help="결과 CSV 경로 (없으면 요약만 출력)")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.cohort)
+    features = features_frame(df)
+    invalid = (features["range_errors"] != "").sum()
+    if invalid:
+        print(f"⚠️ 측정 범위({DB_MIN:.0f}–{DB_MAX:.0f} dB)를 벗어난 값이 있는 환자 {invalid}명")
+    if args.out:
+        id_columns = [c for c in ("ID",) if c in df.columns]
+        pd.concat([df[id_columns], features], axis=1).to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"✅ {len(features)}명 → {args.out}")
+    else:
+        print(features.describe().T.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end 벤치마크 / 부하 테스트 (Google Drive / Sheets 로컬 대역 사용)
+
+로컬 아티팩트 디렉터리(bundle_artifacts.py로 만든 Drive 미러)를 Drive API처럼 제공하는
+FakeDriveService와 메모리에 행을 쌓는 가짜 Sheets 클라이언트를 끼운 뒤 main.py를
+streamlit.testing(AppTest)으로 headless 실행한다. 가상 SSNHL 환자(PTA / 혈액 / Dx / Hx)를
+폼에 입력해 예측 → SHAP → 그래프 → PNG/PDF 리포트까지 전체 스크립트를 통과시키고,
+커밋 간 비교용 JSON 리포트를 출력한다.
+
+    app      : 시작 시간, 첫 예측까지 시간, 예측(제출 1회) p50 / p95, 동시 세션 처리량
+    pipeline : 단계별(predict / shap / plot / report) 지연시간 (Streamlit 스크립트 없이)
+
+    python bench_e2e.py --artifact-dir ./drive_mirror --patients 20 --sessions 4 --out bench.json
+    python bench_e2e.py --artifact-dir ./drive_mirror --baseline bench_prev.json
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import types
+import argparse
+import platform
+import datetime
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from audiogram import PTA_FREQUENCIES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(BASE_DIR, "main.py")
+
+BLOOD_TESTS = ["WBC", "RBC", "Hb", "PLT", "Neutrophil", "Lymphocyte",
+               "AST", "ALT", "BUN", "Cr", "Glucose", "Total_Protein", "Na", "K", "Cl"]
+DIAGNOSIS = ["Dx_COM", "Dx_SSNHL", "Dx_Dizziness", "Dx_Tinnitus"]
+HISTORY = ["Hx_HTN", "Hx_DM", "Hx_CRF", "Hx_MI", "Hx_stroke", "Hx_cancer"]
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+# ======================
+# 🔹 Google Drive 대역
+# ======================
+class _Request:
+    def __init__(self, result):
+        self._result = result
+
+    def execute(self):
+        return self._result
+
+
+class FakeDriveService:
+    """로컬 디렉터리를 Drive v3 files().list / get_media 처럼 제공 (파일 ID = 상대 경로)"""
+
+    _QUERY_RE = re.compile(r"'(?P<parent>[^']+)' in parents(?: and name='(?P<name>[^']+)')?(?P<folders>.*mimeType)?")
+
+    def __init__(self, root, root_id):
+        self.root = os.path.abspath(root)
+        self.root_id = root_id
+        self.list_calls = 0
+        self.downloads = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+
+    def _dir(self, folder_id):
+        return self.root if folder_id == self.root_id else os.path.join(self.root, folder_id)
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def files(self):
+        return self
+
+    def list(self, q, fields=None):
+        with self._lock:
+            self.list_calls += 1
+        match = self._QUERY_RE.search(q)
+        folder = self._dir(match.group("parent"))
+        files = []
+        if os.path.isdir(folder):
+            for entry in sorted(os.listdir(folder)):
+                full = os.path.join(folder, entry)
+                if match.group("name") and entry != match.group("name"):
+                    continue
+                if match.group("folders") and not os.path.isdir(full):
+                    continue
+                files.append({
+                    "id": self._rel(full), "name": entry,
+                    "mimeType": FOLDER_MIME if os.path.isdir(full) else "application/octet-stream",
+                })
+        return _Request({"files": files})
+
+    def get_media(self, fileId):
+        with open(os.path.join(self.root, fileId), "rb") as f:
+            content = f.read()
+        with self._lock:
+            self.downloads += 1
+            self.bytes_served += len(content)
+        return content
+
+
+class FakeMediaIoBaseDownload:
+    """googleapiclient.http.MediaIoBaseDownload 대역 (한 번에 전체 기록)"""
+
+    def __init__(self, fd, request, chunksize=None):
+        self.fd = fd
+        self.content = request
+
+    def next_chunk(self):
+        self.fd.write(self.content)
+        return None, True
+
+
+# ======================
+# 🔹 Google Sheets 대역
+# ======================
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def append_row(self, row, *args, **kwargs):
+        with self._lock:
+            self.rows.append(list(row))
+
+
+class FakeSheetsClient:
+    def __init__(self):
+        self.worksheet = FakeWorksheet()
+
+    def open_by_key(self, key):
+        return types.SimpleNamespace(sheet1=self.worksheet)
+
+
+def install_fakes(artifact_dir):
+    """artifacts 모듈의 Drive 접근과 Google 인증 / Sheets 클라이언트를 로컬 대역으로 교체"""
+    import artifacts
+    import google_clients
+
+    drive = FakeDriveService(artifact_dir, artifacts.FOLDER_ID)
+    sheets = FakeSheetsClient()
+
+    # Drive 경로를 측정하도록 로컬 번들 설정은 해제
+    os.environ.pop("SSNHL_ARTIFACT_DIR", None)
+    artifacts.get_drive_service = lambda: drive
+    artifacts.googleapiclient_http = types.SimpleNamespace(MediaIoBaseDownload=FakeMediaIoBaseDownload)
+
+    google_clients.get_google_transport = lambda: types.SimpleNamespace(
+        drive_service=lambda: drive, sheets_client=lambda: sheets
+    )
+    return drive, sheets
+
+
+# ======================
+# 🔹 가상 환자
+# ======================
+def synthetic_patient(rng, index):
+    """폼 입력과 같은 형태의 가상 환자 (숫자 입력은 문자열)"""
+    right_loss = rng.uniform(20, 90)
+    return {
+        "id": f"BENCH{index:04d}",
+        "pta": {
+            f"{ear}_{freq}": f"{max(0.0, (right_loss if ear == 'rt' else 15) + rng.normal(0, 8)):.0f}"
+            for freq in PTA_FREQUENCIES for ear in ("rt", "lt")
+        },
+        "blood": {
+            "WBC": rng.normal(7, 2), "RBC": rng.normal(4.5, 0.5), "Hb": rng.normal(14, 1.5),
+            "PLT": rng.normal(250, 60), "Neutrophil": rng.normal(60, 10), "Lymphocyte": rng.normal(30, 8),
+            "AST": rng.normal(25, 10), "ALT": rng.normal(25, 12), "BUN": rng.normal(14, 4),
+            "Cr": rng.normal(0.9, 0.2), "Glucose": rng.normal(105, 25), "Total_Protein": rng.normal(7, 0.5),
+            "Na": rng.normal(140, 3), "K": rng.normal(4.2, 0.4), "Cl": rng.normal(102, 3),
+        },
+        "hl_duration": f"{rng.integers(1, 30)}",
+        "flags": {name: bool(rng.random() < 0.2) for name in DIAGNOSIS + HISTORY},
+        "steroid": bool(rng.random() < 0.8),
+    }
+
+
+def patient_frame(patient, test_date=None):
+    """가상 환자 → main.py df_input과 같은 1행 DataFrame (test_date 기본값: 오늘)"""
+    import pandas as pd
+
+    test_date = test_date or datetime.date.today().strftime("%Y-%m-%d")
+    return pd.DataFrame([{
+        "ID": patient["id"], "Birth": "1970-01-01", "test_date": test_date, "Sex": 1, "Side": 1,
+        "HL_duration": float(patient["hl_duration"]), "Steroid": int(patient["steroid"]), "IT_dexa": 0, "HBOT": 0,
+        **{f"PTA_{k.split('_')[0].upper()}_AC_{k.split('_')[1]}": float(v) for k, v in patient["pta"].items()},
+        **{k: round(float(v), 2) for k, v in patient["blood"].items()},
+        **{k: int(v) for k, v in patient["flags"].items()},
+        "Hx_others": 0,
+    }])
+
+
+# ======================
+# 🔹 app 시나리오 (AppTest)
+# ======================
+def _widget(widgets, predicate):
+    for widget in widgets:
+        if predicate(widget):
+            return widget
+    raise LookupError("입력 위젯을 찾을 수 없습니다.")
+
+
+def new_session(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+    at.secrets["google"] = {"type": "service_account", "client_email": "bench@example.com"}
+    return at
+
+
+def submit_patient(at, patient):
+    """사이드바 폼에 환자를 입력하고 제출 (예측 ~ 리포트까지 스크립트 1회 실행)"""
+    at.text_input(key="patient_id").set_value(patient["id"])
+    for key, value in patient["pta"].items():
+        at.text_input(key=key).set_value(value)
+    for test, value in patient["blood"].items():
+        at.text_input(key=f"blood_{test}").set_value(f"{value:.2f}")
+    at.text_input(key="hl_duration").set_value(patient["hl_duration"])
+
+    for name, checked in patient["flags"].items():
+        at.checkbox(key=f"flag_{name}").set_value(checked)
+    at.checkbox(key="data_consent").check()
+
+    _widget(at.sidebar.button, lambda w: w.key != "prefill_button").click()
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def run_app_scenario(patients, sessions, timeout):
+    """시작 시간 / 첫 예측 / 예측 지연시간 / 동시 세션 처리량"""
+    t0 = time.perf_counter()
+    at = new_session(timeout)
+    at.run()
+    startup = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    latencies = []
+    for i, patient in enumerate(patients):
+        t1 = time.perf_counter()
+        submit_patient(at, patient)
+        latencies.append(time.perf_counter() - t1)
+    first_prediction = startup + latencies[0]
+
+    concurrent = {}
+    if sessions > 1:
+        concurrent_latencies, lock = [], threading.Lock()
+
+        def session_worker(offset):
+            session = new_session(timeout)
+            session.run()
+            for patient in patients[offset::sessions]:
+                t1 = time.perf_counter()
+                submit_patient(session, patient)
+                with lock:
+                    concurrent_latencies.append(time.perf_counter() - t1)
+
+        t1 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            list(pool.map(session_worker, range(sessions)))
+        wall = time.perf_counter() - t1
+        concurrent = {
+            "sessions": sessions,
+            "predictions": len(concurrent_latencies),
+            "throughput_per_sec": round(len(concurrent_latencies) / wall, 3),
+            "latency_ms": summarize(concurrent_latencies),
+        }
+
+    return {
+        "startup_sec": round(startup, 3),
+        "time_to_first_prediction_sec": round(first_prediction, 3),
+        "prediction_ms": summarize(latencies[1:] or latencies),
+        "concurrent": concurrent,
+    }
+
+
+# ======================
+# 🔹 pipeline 시나리오 (단계별)
+# ======================
+def run_pipeline_scenario(patients, module_name):
+    """predict / shap / plot / report 단계별 지연시간 (Streamlit 스크립트 없이 같은 모듈 사용)"""
+    import shap
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from artifacts import load_predictor_modules, load_models_from_drive, create_inference_context
+
+    load_predictor_modules()
+    load_models_from_drive()
+
+    stages = {"predict": [], "shap": [], "plot": [], "report": []}
+    for patient in patients:
+        df_input = patient_frame(patient)
+
+        t0 = time.perf_counter()
+        inference = create_inference_context(module_name)
+        outputs = inference.predict(df_input)
+        t1 = time.perf_counter()
+        shap_lgbm, _ = inference.shap_values(outputs[4], outputs[5])
+        t2 = time.perf_counter()
+        shap_lgbm = shap_lgbm[1] if isinstance(shap_lgbm, list) else shap_lgbm
+        plt.figure()
+        shap.summary_plot(shap_lgbm, outputs[4], plot_type="bar", show=False)
+        png = io.BytesIO()
+        plt.gcf().savefig(png, format="png", bbox_inches="tight")
+        plt.close("all")
+        t3 = time.perf_counter()
+        png.seek(0)
+        pdf = io.BytesIO()
+        c = canvas.Canvas(pdf, pagesize=A4)
+        c.drawImage(ImageReader(png), 0, 0, width=A4[0], height=A4[1])
+        c.showPage()
+        c.save()
+        t4 = time.perf_counter()
+
+        for name, seconds in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            stages[name].append(seconds)
+
+    return {name: summarize(values) for name, values in stages.items()}
+
+
+# ======================
+# 🔹 리포트
+# ======================
+def summarize(seconds):
+    values = np.asarray(seconds, dtype=float) * 1000
+    if not len(values):
+        return {}
+    return {
+        "n": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline, path=""):
+    """숫자 항목별 기준 리포트 대비 변화율 출력"""
+    for key, value in report.items():
+        if key not in baseline:
+            continue
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            compare(value, baseline[key], name)
+        elif isinstance(value, (int, float)) and isinstance(baseline[key], (int, float)) and baseline[key]:
+            change = (value - baseline[key]) / baseline[key] * 100
+            print(f"  {name:<50} {baseline[key]:>10} → {value:>10} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SSNHL 앱 end-to-end 벤치마크 (로컬 Drive / Sheets 대역)")
+    parser.add_argument("--artifact-dir", required=True, help="Drive 폴더와 같은 구조의 로컬 디렉터리")
+    parser.add_argument("--patients", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=4, help="동시 세션 수 (1이면 동시성 측정 생략)")
+    parser.add_argument("--scenario", choices=["app", "pipeline", "all"], default="all")
+    parser.add_argument("--module", default="predictors.all", help="pipeline 시나리오 predictor 모듈")
+    parser.add_argument("--timeout", type=float, default=300, help="스크립트 1회 실행 제한 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSON 리포트 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 JSON 리포트")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BASE_DIR)
+    drive, sheets = install_fakes(args.artifact_dir)
+    rng = np.random.default_rng(args.seed)
+    patients = [synthetic_patient(rng, i) for i in range(args.patients)]
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "patients": args.patients,
+    }
+    if args.scenario in ("app", "all"):
+        report["app"] = run_app_scenario(patients, args.sessions, args.timeout)
+    if args.scenario in ("pipeline", "all"):
+        report["pipeline_ms"] = run_pipeline_scenario(patients, args.module)
+    report["fakes"] = {
+        "drive_list_calls": drive.list_calls,
+        "drive_downloads": drive.downloads,
+        "drive_bytes": drive.bytes_served,
+        "sheets_rows": len(sheets.worksheet.rows),
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print(f"\n기준 리포트 대비 ({args.baseline})")
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
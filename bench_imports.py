@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+main.py 즉시 import 비용 측정 (`python -X importtime`) 및 회귀 방지
+
+main.py 최상위 import 문을 AST로 추출해 새 인터프리터에서 `-X importtime`으로 실행하고
+최상위 패키지별 누적 import 시간을 출력한다. Streamlit 자체가 import 하는 모듈은
+기준선으로 따로 측정해 제외하고, 지연 로드 대상(shap, matplotlib, reportlab, PIL,
+Google 클라이언트 등)이 즉시 import 되거나 전체 시간이 예산을 넘으면 종료 코드 1을 반환한다.
+
+    python bench_imports.py
+    python bench_imports.py --budget-ms 1500 --repeat 5 --json
+"""
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(BASE_DIR, "main.py")
+
+# 첫 사용 시점까지 import 되면 안 되는 패키지
+LAZY_PACKAGES = [
+    "shap", "numba", "scipy", "matplotlib", "reportlab", "PIL",
+    "googleapiclient", "google.oauth2", "gspread", "httplib2",
+    "lightgbm", "xgboost", "sklearn",
+]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def eager_import_code(script_path=MAIN_SCRIPT):
+    """스크립트 최상위 import 문만 추출 (Drive에서 받는 모듈은 실패해도 무시)"""
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    lines = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(f"try:\n    {ast.unparse(node)}\nexcept ImportError:\n    pass")
+    return "\n".join(lines)
+
+
+def run_importtime(code):
+    """-X importtime 실행 결과를 (모듈, self_us, cumulative_us, depth) 목록으로 반환"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    records = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cum_us, indent, module = match.groups()
+            records.append((module, int(self_us), int(cum_us), len(indent) // 2))
+    return records
+
+
+def summarize(records, exclude=()):
+    """최상위 패키지별 누적 시간(ms)과 전체 시간(ms)"""
+    per_package = {}
+    for module, self_us, _, _ in records:
+        if module in exclude:
+            continue
+        root = module.split(".")[0]
+        per_package[root] = per_package.get(root, 0) + self_us
+    total_ms = sum(per_package.values()) / 1000
+    per_package_ms = {k: round(v / 1000, 2) for k, v in per_package.items()}
+    return round(total_ms, 2), per_package_ms
+
+
+def _is_lazy(module):
+    return any(module == pkg or module.startswith(pkg + ".") for pkg in LAZY_PACKAGES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="main.py 즉시 import 시간 측정")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최소 시간 사용)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Streamlit 제외 import 시간 예산")
+    parser.add_argument("--top", type=int, default=15, help="출력할 패키지 수")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    baseline = {m for m, *_ in run_importtime("import streamlit")}
+    code = eager_import_code()
+
+    runs = [run_importtime(code) for _ in range(max(1, args.repeat))]
+    summaries = [summarize(r, exclude=baseline) for r in runs]
+    best = min(range(len(runs)), key=lambda i: summaries[i][0])
+    total_ms, per_package_ms = summaries[best]
+
+    eager_lazy = sorted({m for m, *_ in runs[best] if m not in baseline and _is_lazy(m)})
+    over_budget = args.budget_ms is not None and total_ms > args.budget_ms
+
+    report = {
+        "total_ms": total_ms,
+        "budget_ms": args.budget_ms,
+        "packages_ms": dict(sorted(per_package_ms.items(), key=lambda kv: -kv[1])),
+        "eager_lazy_modules": eager_lazy,
+        "ok": not eager_lazy and not over_budget,
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"main.py 즉시 import 시간 (Streamlit 제외): {total_ms:.1f} ms")
+        for package, ms in list(report["packages_ms"].items())[:args.top]:
+            print(f"  {package:<24} {ms:>9.1f} ms")
+        if eager_lazy:
+            print("❌ 지연 로드 대상이 즉시 import 됨: " + ", ".join(eager_lazy))
+        if over_budget:
+            print(f"❌ 예산 초과: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+추론 서버 워커별 메모리(RSS / PSS / Private) 측정
+
+inference_server.py 를 워커 N개로 띄우고 모든 병원에 가상 환자 예측 요청을 보낸 뒤
+/proc/<pid>/smaps_rollup 으로 부모 / 워커 메모리를 측정한다 (Linux 전용).
+RSS는 공유 페이지를 프로세스마다 중복 집계하므로, copy-on-write 공유 효과는
+PSS 합계와 워커별 Private 메모리로 확인한다.
+
+    SSNHL_ARTIFACT_DIR=./artifacts python bench_worker_memory.py --workers 1 2 4 8 --json
+"""
+import os
+import sys
+import json
+import time
+import secrets
+import argparse
+import subprocess
+
+from model_store import MODEL_FILES
+from inference_server import AUTHKEY_ENV, request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_smaps_rollup(pid):
+    """smaps_rollup 의 주요 항목 (MB)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in SMAPS_FIELDS:
+                values[key] = round(int(rest.split()[0]) / 1024, 1)
+    values["Private"] = round(values.get("Private_Clean", 0) + values.get("Private_Dirty", 0), 1)
+    return values
+
+
+def child_pids(parent_pid):
+    """/proc 에서 부모 pid가 parent_pid 인 프로세스 목록"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm 필드에 공백/괄호가 있을 수 있으므로 마지막 ')' 이후부터 파싱
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == parent_pid:
+                children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(children)
+
+
+def wait_until_ready(address, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request(address, {"op": "ping"})
+            return True
+        except (ConnectionError, OSError):
+            time.sleep(0.5)
+    return False
+
+
+def measure(workers, address, requests_per_hospital, timeout):
+    """워커 N개 서버를 띄워 요청 후 메모리 측정"""
+    from warmup import build_synthetic_patient
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "inference_server.py"),
+         "--address", address, "--workers", str(workers)],
+        cwd=BASE_DIR
+    )
+    try:
+        if not wait_until_ready(address, timeout):
+            raise RuntimeError("추론 서버가 시작되지 않았습니다.")
+
+        df_patient = build_synthetic_patient()
+        t0 = time.perf_counter()
+        n_requests = 0
+        # 요청을 여러 번 보내 모든 워커가 실제로 추론 / SHAP 경로를 실행하게 한다
+        for _ in range(requests_per_hospital * workers):
+            for hospital_key in MODEL_FILES:
+                request(address, {"op": "predict", "module_name": f"predictors.{hospital_key}",
+                                  "df": df_patient, "explain": True})
+                n_requests += 1
+        elapsed = time.perf_counter() - t0
+
+        parent = read_smaps_rollup(server.pid)
+        worker_stats = {pid: read_smaps_rollup(pid) for pid in child_pids(server.pid)}
+        total_pss = parent["Pss"] + sum(w["Pss"] for w in worker_stats.values())
+        return {
+            "workers": workers,
+            "requests": n_requests,
+            "requests_per_sec": round(n_requests / elapsed, 1),
+            "parent": parent,
+            "worker_mb": worker_stats,
+            "total_pss_mb": round(total_pss, 1),
+            "total_rss_mb": round(parent["Rss"] + sum(w["Rss"] for w in worker_stats.values()), 1),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추론 서버 워커별 메모리 측정")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--address", default="127.0.0.1:8699")
+    parser.add_argument("--requests", type=int, default=2, help="워커당 병원별 요청 수")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    # 벤치마크 전용 서버: 설정된 공유 비밀이 없으면 임시 비밀을 만들어 서버 / 클라이언트가 함께 사용
+    os.environ.setdefault(AUTHKEY_ENV, secrets.token_hex(32))
+    results = [measure(n, args.address, args.requests, args.timeout) for n in args.workers]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    for r in results:
+        print(f"[workers={r['workers']}] 총 PSS {r['total_pss_mb']} MB / 총 RSS {r['total_rss_mb']} MB, "
+              f"{r['requests_per_sec']} req/s")
+        print(f"  parent  RSS {r['parent']['Rss']:>8} MB  PSS {r['parent']['Pss']:>8} MB  "
+              f"Private {r['parent']['Private']:>8} MB")
+        for pid, w in r["worker_mb"].items():
+            print(f"  {pid:<7} RSS {w['Rss']:>8} MB  PSS {w['Pss']:>8} MB  Private {w['Private']:>8} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인(air-gapped) 배포용 아티팩트 번들 생성
+
+Google Drive의 코드 / predictor / 모델 / 정확도 txt / 전역 중요도 / 로고를
+Drive와 동일한 구조로 내려받아 디렉터리 또는 tar 번들로 저장한다.
+.streamlit/secrets.toml 의 서비스 계정 정보를 사용한다.
+
+    python bundle_artifacts.py --out ./artifacts
+    python bundle_artifacts.py --out ./artifacts --tar ./artifacts.tar.gz
+
+이미지에 포함한 뒤 SSNHL_ARTIFACT_DIR=<디렉터리 또는 tar 경로> 로 실행하면
+네트워크 없이 부팅된다.
+"""
+import os
+import sys
+import tarfile
+import argparse
+
+from model_store import all_artifact_paths
+
+
+def export_bundle(backend, out_dir, paths=None):
+    """backend의 아티팩트를 out_dir에 동일한 상대 경로로 저장 (누락 파일 목록 반환)"""
+    missing = []
+    for path in paths or all_artifact_paths():
+        content = backend.open(path)
+        if content is None:
+            missing.append(path)
+            continue
+        dest = os.path.join(out_dir, path)
+        os.makedirs(os.path.dirname(dest) or out_dir, exist_ok=True)
+        with open(dest, 'wb') as f:
+            f.write(content.read())
+    return missing
+
+
+def write_tarball(src_dir, tar_path):
+    """디렉터리를 tar(.tar / .tar.gz) 번들로 묶기"""
+    mode = 'w:gz' if tar_path.endswith(('.gz', '.tgz')) else 'w'
+    with tarfile.open(tar_path, mode) as tar:
+        for name in sorted(os.listdir(src_dir)):
+            tar.add(os.path.join(src_dir, name), arcname=name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="아티팩트 번들 생성 (Google Drive → 로컬)")
+    parser.add_argument("--out", required=True, help="저장할 디렉터리")
+    parser.add_argument("--tar", default=None, help="tar 번들 경로 (.tar 또는 .tar.gz)")
+    args = parser.parse_args(argv)
+
+    from artifacts import DriveBackend
+
+    os.makedirs(args.out, exist_ok=True)
+    missing = export_bundle(DriveBackend(), args.out)
+    for path in missing:
+        print(f"⚠️ 누락: {path}")
+
+    if args.tar:
+        write_tarball(args.out, args.tar)
+        print(f"✅ 번들 생성: {args.tar}")
+    else:
+        print(f"✅ 번들 생성: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
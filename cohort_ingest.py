@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+대규모 코호트 청크 단위 예측 (메모리 사용량 고정)
+
+CSV / Parquet 코호트를 고정 크기 청크로 읽으면서 수치 컬럼은 float32, Sex / Side /
+치료 / Dx / Hx 플래그는 int8 코드로 줄이고, 청크마다 predict_outcome
+(load_and_process_data → impute_data → finalize_data → scaler → 모델)을 실행해
+결과를 바로 출력 파일에 덧붙인다. 한 번에 메모리에 있는 것은 청크 1개뿐이므로
+최대 메모리는 코호트 크기와 관계없이 청크 크기로 정해진다.
+
+    python cohort_ingest.py --artifact-dir ./drive_mirror --cohort cohort.parquet --hospital wonju --out scores.csv
+    python cohort_ingest.py ... --chunksize 5000 --audiogram
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from audiogram import pta_columns, features_frame
+from whatif import LAB_XLIMS
+from model_store import MODEL_FILES, second_model_type
+
+DEFAULT_CHUNKSIZE = 2000
+
+ID_COLUMNS = ["ID", "Name", "Birth", "test_date"]
+FLOAT_COLUMNS = pta_columns() + list(LAB_XLIMS) + ["HL_duration"]
+FLAG_COLUMNS = ["Steroid", "IT_dexa", "HBOT",
+                "Dx_COM", "Dx_SSNHL", "Dx_Dizziness", "Dx_Tinnitus",
+                "Hx_HTN", "Hx_DM", "Hx_CRF", "Hx_MI", "Hx_stroke", "Hx_cancer", "Hx_others"]
+
+# main.py side_mapping / sex_mapping 과 같은 코드 (문자열 입력도 허용)
+CATEGORY_CODES = {
+    "Sex": {"Male": 1, "Female": 2, "M": 1, "F": 2},
+    "Side": {"Right": 1, "Left": 2, "R": 1, "L": 2},
+}
+INPUT_COLUMNS = ID_COLUMNS + list(CATEGORY_CODES) + FLOAT_COLUMNS + FLAG_COLUMNS
+
+
+# ======================
+# 🔹 읽기 / 다운캐스팅
+# ======================
+def downcast_chunk(chunk):
+    """청크 1개를 앱 입력 형식 + 작은 dtype으로 변환 (없는 컬럼은 결측 / 0)"""
+    out = pd.DataFrame(index=chunk.index)
+    for column in ID_COLUMNS:
+        if column in chunk:
+            out[column] = chunk[column].astype(str)
+    for column, codes in CATEGORY_CODES.items():
+        values = chunk[column] if column in chunk else pd.Series(1, index=chunk.index)
+        numeric = pd.to_numeric(values.replace(codes), errors='coerce')
+        out[column] = numeric.fillna(1).astype(np.int8)
+    for column in FLOAT_COLUMNS:
+        values = chunk[column] if column in chunk else pd.Series(np.nan, index=chunk.index)
+        out[column] = pd.to_numeric(values, errors='coerce').astype(np.float32)
+    for column in FLAG_COLUMNS:
+        values = chunk[column] if column in chunk else pd.Series(0, index=chunk.index)
+        out[column] = pd.to_numeric(values, errors='coerce').fillna(0).astype(np.int8)
+    return out
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """CSV / Parquet → 다운캐스팅된 청크 generator (필요한 컬럼만 읽음)"""
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        columns = [c for c in INPUT_COLUMNS if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield downcast_chunk(batch.to_pandas())
+        return
+
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in INPUT_COLUMNS if c in header]
+    dtypes = {c: str for c in ID_COLUMNS if c in columns}
+    for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+        yield downcast_chunk(chunk)
+
+
+# ======================
+# 🔹 청크 단위 예측
+# ======================
+def score_chunks(predictor, chunks, with_audiogram=False):
+    """청크마다 predict_outcome 1회 → (ID, 확률) 결과 DataFrame generator"""
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        outputs = predictor.predict_outcome(chunk.copy())
+        df_ids = outputs[6]
+        result = pd.DataFrame({
+            "ID": df_ids["ID"].astype(str).values,
+            "lgbm_prob": np.asarray(outputs[1], dtype=np.float32),
+            "second_prob": np.asarray(outputs[3], dtype=np.float32),
+        })
+        if with_audiogram:
+            features = features_frame(chunk)
+            if len(features) == len(result):
+                result = pd.concat([result, features.reset_index(drop=True)], axis=1)
+            else:  # 전처리에서 제외된 행이 있으면 ID로 맞춤
+                features.index = chunk["ID"].astype(str)
+                result = result.join(features[~features.index.duplicated()], on="ID")
+        yield result
+
+
+def peak_rss_mb():
+    """현재 프로세스 최대 RSS (MB, 지원하지 않는 OS는 None)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def score_cohort_file(artifact_dir, hospital_key, cohort_path, out_path,
+                      chunksize=DEFAULT_CHUNKSIZE, with_audiogram=False, progress=print):
+    """코호트 파일 → 결과 CSV (청크마다 덧붙여 기록), 처리 통계 반환"""
+    from global_importance import load_local_predictor
+
+    predictor = load_local_predictor(artifact_dir, hospital_key)
+    rows, chunks = 0, 0
+    t0 = time.perf_counter()
+    with open(out_path, "w", encoding="utf-8-sig", newline="") as f:
+        for result in score_chunks(predictor, read_chunks(cohort_path, chunksize), with_audiogram):
+            result.to_csv(f, index=False, header=(chunks == 0))
+            rows += len(result)
+            chunks += 1
+            progress(f"[{chunks}] {rows:,}명  {time.perf_counter() - t0:.1f}s  peak RSS {peak_rss_mb() or 0:.0f} MB")
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "hospital": hospital_key,
+        "second_model": second_model_type(hospital_key),
+        "rows": rows,
+        "chunks": chunks,
+        "elapsed_sec": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb() or 0, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대규모 코호트 청크 단위 예측 (CSV / Parquet)")
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", required=True, help="코호트 CSV / Parquet (앱 입력과 동일한 컬럼)")
+    parser.add_argument("--hospital", required=True, choices=list(MODEL_FILES))
+    parser.add_argument("--out", required=True, help="결과 CSV 경로")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--audiogram", action="store_true", help="청력도 파생 지표 컬럼 추가")
+    args = parser.parse_args(argv)
+
+    stats = score_cohort_file(os.path.abspath(args.artifact_dir), args.hospital, args.cohort, args.out,
+                              args.chunksize, args.audiogram)
+    print(f"✅ {args.out}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
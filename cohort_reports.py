@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+코호트 리포트 일괄 생성 (환자별 PDF → ZIP, 또는 다중 페이지 PDF 1개)
+
+코호트 CSV(앱 입력과 동일한 컬럼)를 청크 단위로 읽어 병원 predictor로 예측 / SHAP 계산하고,
+환자별 요약 이미지(reports.create_summary_image)와 PDF는 프로세스 풀에서 만든다.
+리포트 작업은 generator로 필요할 때만 다음 청크를 계산하고, 결과는 순서대로 바로 ZIP / PDF에 기록하며,
+진행 중인 작업 수를 워커 수의 2배로 제한해 코호트 크기와 관계없이 메모리 사용량을 일정하게 유지한다.
+MLP 병원의 KernelExplainer는 첫 청크로 background를 1회 만들고 환자당 평가 횟수를 제한한다.
+
+사용 예 (Google Drive 폴더를 로컬에 내려받은 디렉터리 기준):
+    python cohort_reports.py --artifact-dir ./drive_mirror --cohort cohort.csv --hospital wonju --out reports.zip
+    python cohort_reports.py --artifact-dir ./drive_mirror --cohort cohort.csv --hospital wonju --out reports.pdf
+"""
+import io
+import os
+import re
+import sys
+import time
+import logging
+import zipfile
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_store import MODEL_FILES, accuracy_path, parse_accuracy, second_model_type
+from model_bundles import SECOND_MODEL_NAMES
+from audiogram import features_frame
+
+MAX_DISPLAY = 15
+DEFAULT_CHUNKSIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+# ======================
+# 🔹 코호트 예측 (부모 프로세스)
+# ======================
+def _cohort_chunks(cohort, chunksize):
+    """코호트 CSV 경로 또는 DataFrame → DataFrame 청크"""
+    if isinstance(cohort, pd.DataFrame):
+        for start in range(0, len(cohort), chunksize):
+            yield cohort.iloc[start:start + chunksize]
+        return
+    yield from pd.read_csv(cohort, chunksize=chunksize)
+
+
+def _row_labels(chunk):
+    """경고 / 로그용 환자 표시 (ID 컬럼이 없으면 행 번호)"""
+    return chunk["ID"].astype(str) if "ID" in chunk.columns else chunk.index.to_series().map(lambda i: f"row {i}")
+
+
+def _accuracy(artifact_dir, hospital_key, model_type):
+    path = os.path.join(artifact_dir, accuracy_path(hospital_key, model_type))
+    if not os.path.exists(path):
+        return 0.75
+    with open(path, "rb") as f:
+        return parse_accuracy(f.read())
+
+
+def score_cohort(artifact_dir, hospital_key, cohort, hospital_name=None, chunksize=DEFAULT_CHUNKSIZE):
+    """코호트를 청크마다 예측 + SHAP 계산해 환자별 리포트 작업을 하나씩 내보내는 generator
+
+    cohort는 CSV 경로 또는 DataFrame. 메모리에는 현재 청크의 입력 / SHAP 값만 있다.
+    """
+    from global_importance import load_local_predictor, shap_explainer
+
+    predictor = load_local_predictor(artifact_dir, hospital_key)
+    second_type = second_model_type(hospital_key)
+    second_model = predictor.mlp_model if second_type == "mlp" else predictor.xgb_model
+    lgbm_acc, second_acc = _accuracy(artifact_dir, hospital_key, "lgbm"), _accuracy(artifact_dir, hospital_key, second_type)
+    explain_lgbm = explain_second = None
+
+    index = 0
+    for chunk in _cohort_chunks(cohort, chunksize):
+        invalid = features_frame(chunk)["range_errors"] != ""
+        if invalid.any():
+            logger.warning("PTA 측정 범위를 벗어난 값이 있는 환자 %d명: %s",
+                           int(invalid.sum()), ", ".join(_row_labels(chunk)[invalid].head(10)))
+
+        outputs = predictor.predict_outcome(chunk.copy())
+        lgbm_prob, second_prob, df_lgbm, df_xgb, df_ids = outputs[1], outputs[3], outputs[4], outputs[5], outputs[6]
+        if explain_lgbm is None:  # explainer / KernelExplainer background는 첫 청크로 1회만 생성
+            explain_lgbm = shap_explainer(predictor.lgbm_model, df_lgbm)
+            explain_second = shap_explainer(second_model, df_xgb)
+        shap_lgbm, shap_second = explain_lgbm(df_lgbm), explain_second(df_xgb)
+
+        by_id = chunk.set_index(chunk["ID"].astype(str)) if "ID" in chunk.columns else None
+        for i, patient_id in enumerate(df_ids["ID"].astype(str).values):
+            source = by_id.loc[patient_id] if by_id is not None and patient_id in by_id.index else {}
+            if isinstance(source, pd.DataFrame):
+                source = source.iloc[0]
+            yield {
+                "index": index,
+                "id": patient_id,
+                "name": str(source.get("Name", "") if len(source) else ""),
+                "clinic_date": str(source.get("test_date", "") if len(source) else ""),
+                "hospital": hospital_name or hospital_key,
+                "lgbm_prob": float(lgbm_prob[i]),
+                "second_prob": float(second_prob[i]),
+                "lgbm_acc": lgbm_acc,
+                "second_acc": second_acc,
+                "second_model_name": SECOND_MODEL_NAMES.get(second_type, "XGBoost"),
+                "lgbm": (list(df_lgbm.columns), shap_lgbm[i]),
+                "second": (list(df_xgb.columns), shap_second[i]),
+            }
+            index += 1
+
+
+# ======================
+# 🔹 환자별 리포트 (워커 프로세스)
+# ======================
+def _shap_bar(features, values, title):
+    """환자 1명의 SHAP 값 막대 그래프 (|SHAP| 상위 MAX_DISPLAY개)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    order = np.argsort(np.abs(values))[::-1][:MAX_DISPLAY][::-1]
+    fig, ax = plt.subplots(figsize=(5, 0.35 * len(order) + 1.2))
+    ax.barh(range(len(order)), [values[i] for i in order],
+            color=['#ff0051' if values[i] > 0 else '#008bfb' for i in order])
+    ax.set_yticks(range(len(order)))
+    ax.set_yticklabels([features[i] for i in order], fontsize=8)
+    ax.set_xlabel("SHAP value", fontsize=8)
+    ax.set_title(title, fontsize=9)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.tight_layout()
+    return fig
+
+
+def render_report(job, output="pdf"):
+    """작업 1건 → (index, 파일명, PDF 또는 PNG bytes, 소요 시간)"""
+    import matplotlib.pyplot as plt
+    from reports import create_summary_image, convert_image_to_pdf, summary_text
+
+    t0 = time.perf_counter()
+    fig_lgbm = _shap_bar(*job["lgbm"], "LightGBM")
+    fig_second = _shap_bar(*job["second"], job["second_model_name"])
+    image = create_summary_image(
+        name=job["name"] or job["id"],
+        hospital=job["hospital"],
+        clinic_date=job["clinic_date"],
+        summary_lgbm=summary_text(job["lgbm_prob"], job["lgbm_acc"]),
+        summary_xgb=summary_text(job["second_prob"], job["second_acc"]),
+        fig_lgbm=fig_lgbm,
+        fig_xgb=fig_second,
+    )
+    plt.close("all")
+
+    content = convert_image_to_pdf(image).getvalue() if output == "pdf" else image.getvalue()
+    safe_id = re.sub(r"[^\w.-]+", "_", job["id"]) or f"patient_{job['index']}"
+    return job["index"], f"{job['index']:05d}_{safe_id}.{output}", content, time.perf_counter() - t0
+
+
+# ======================
+# 🔹 스트리밍 기록
+# ======================
+def export_reports(jobs, out_path, workers=None, progress=print, total=None):
+    """리포트를 프로세스 풀에서 만들어 입력 순서대로 ZIP(.zip) 또는 다중 페이지 PDF(.pdf)에 기록
+
+    jobs는 list 또는 generator(score_cohort): 창이 빌 때만 다음 작업을 꺼내므로 전체 목록을 메모리에 두지 않는다.
+    """
+    from reports import MultiPagePdf
+
+    total = total if total is not None else (len(jobs) if hasattr(jobs, "__len__") else None)
+
+    as_pdf = out_path.lower().endswith(".pdf")
+    workers = workers or os.cpu_count() or 2
+    window = workers * 2  # 동시에 메모리에 있는 리포트 수 상한
+    timings = []
+    t0 = time.perf_counter()
+
+    with open(out_path, "wb") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = MultiPagePdf(f) if as_pdf else zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED)
+        pending = deque()
+        remaining = iter(jobs)
+
+        def submit_next():
+            job = next(remaining, None)
+            if job is not None:
+                pending.append(pool.submit(render_report, job, "png" if as_pdf else "pdf"))
+
+        try:
+            for _ in range(window):
+                submit_next()
+            while pending:
+                index, filename, content, seconds = pending.popleft().result()
+                submit_next()
+                if as_pdf:
+                    writer.add_page(io.BytesIO(content))
+                else:
+                    writer.writestr(filename, content)
+                timings.append(seconds)
+                progress(f"[{len(timings)}/{total or '?'}] {filename} {seconds:.2f}s")
+        finally:
+            # 중단(progress에서 예외)되어도 지금까지 기록한 리포트는 읽을 수 있는 파일로 닫는다
+            for future in pending:
+                future.cancel()
+            writer.close()
+
+    elapsed = time.perf_counter() - t0
+    ms = np.asarray(timings) * 1000 if timings else np.zeros(1)
+    return {
+        "reports": len(timings),
+        "workers": workers,
+        "elapsed_sec": round(elapsed, 2),
+        "reports_per_sec": round(len(timings) / elapsed, 2) if elapsed else None,
+        "render_ms_p50": round(float(np.percentile(ms, 50)), 1),
+        "render_ms_p95": round(float(np.percentile(ms, 95)), 1),
+        "bytes": os.path.getsize(out_path),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="코호트 환자별 리포트 일괄 생성 (ZIP / 다중 페이지 PDF)")
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", required=True, help="코호트 CSV (앱 입력과 동일한 컬럼, Name 컬럼 선택)")
+    parser.add_argument("--hospital", required=True, choices=list(MODEL_FILES))
+    parser.add_argument("--hospital-name", help="리포트에 표시할 병원명 (기본: 병원 키)")
+    parser.add_argument("--out", required=True, help="출력 경로 (.zip: 환자별 PDF, .pdf: 다중 페이지 PDF 1개)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="예측 / SHAP 청크 크기")
+    args = parser.parse_args(argv)
+
+    jobs = score_cohort(os.path.abspath(args.artifact_dir), args.hospital, args.cohort, args.hospital_name,
+                        args.chunksize)
+    stats = export_reports(jobs, args.out, args.workers)
+    print(f"✅ {args.out}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime 추론 백엔드 (병원별 선택, 자동 fallback)
+
+아티팩트 빌드 시 병원별 LightGBM / XGBoost / MLP 모델을 ONNX 그래프로 변환해
+joblib 모델 옆에 저장하고, 앱은 onnxruntime(CPU)으로 predict_proba를 실행한다.
+변환 / 런타임 패키지가 없거나, 로드 시 원본 모델과 출력이 다르거나, 호출 중 오류가 나면
+원본 모델을 그대로 사용한다. SHAP(TreeExplainer)은 항상 원본 모델로 계산한다.
+
+    SSNHL_COMPILED_MODELS=all                → 모든 병원
+    SSNHL_COMPILED_MODELS=wonju,hagen_180d   → 지정 병원만
+    (미설정)                                  → 사용 안 함
+
+빌드 (Google Drive 폴더를 로컬에 내려받은 디렉터리 기준, onnxmltools / skl2onnx 필요):
+    python compiled_models.py --artifact-dir ./drive_mirror --cohort background.csv
+"""
+import io
+import os
+import time
+import logging
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+from model_store import MODEL_FILES, compiled_model_path, compiled_reference_path
+
+COMPILED_MODELS_ENV = "SSNHL_COMPILED_MODELS"
+PARITY_TOLERANCE = 1e-4
+REFERENCE_ROWS = 64
+
+logger = logging.getLogger(__name__)
+
+
+def compiled_hospitals():
+    """SSNHL_COMPILED_MODELS 설정에 포함된 병원 목록"""
+    value = os.environ.get(COMPILED_MODELS_ENV, "").strip()
+    if not value:
+        return set()
+    if value.lower() == "all":
+        return set(MODEL_FILES)
+    return {key.strip() for key in value.split(",") if key.strip()}
+
+
+def _as_float32(X):
+    values = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+    return np.ascontiguousarray(values, dtype=np.float32)
+
+
+# ======================
+# 🔹 런타임 어댑터
+# ======================
+class CompiledModel:
+    """원본 모델과 같은 predict_proba / predict 인터페이스로 ONNX 세션 실행
+
+    그 외 속성(classes_, feature_names_in_ 등)은 원본 모델로 위임하고,
+    ONNX 실행이 실패하면 해당 호출부터 원본 모델로 전환한다.
+    """
+
+    def __init__(self, session, original, model_type):
+        self.session = session
+        self.original = original
+        self.model_type = model_type
+        self.failed = False
+        self._input_name = session.get_inputs()[0].name
+        self._prob_output = _probability_output(session)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # __init__ 이전(복사 / 언피클 중)에는 original이 없으므로 재귀 방지
+        if name == "original":
+            raise AttributeError(name)
+        return getattr(self.original, name)
+
+    def _run(self, X):
+        probs = self.session.run([self._prob_output], {self._input_name: _as_float32(X)})[0]
+        probs = np.asarray(probs, dtype=np.float64)
+        if probs.ndim == 1:
+            probs = np.column_stack([1 - probs, probs])
+        return probs
+
+    def predict_proba(self, X):
+        if not self.failed:
+            try:
+                return self._run(X)
+            except Exception as e:
+                with self._lock:
+                    self.failed = True
+                logger.warning("ONNX 실행 실패, 원본 %s 모델 사용: %s", self.model_type, e)
+        return self.original.predict_proba(X)
+
+    def predict(self, X):
+        if self.failed:
+            return self.original.predict(X)
+        classes = getattr(self.original, "classes_", None)
+        index = self.predict_proba(X).argmax(axis=1)
+        return np.asarray(classes)[index] if classes is not None else index
+
+
+def _probability_output(session):
+    """확률 출력 이름 (변환기마다 'probabilities' / 'output_probability' 등)"""
+    outputs = [o.name for o in session.get_outputs()]
+    for name in outputs:
+        if "prob" in name.lower():
+            return name
+    return outputs[-1]
+
+
+def create_session(model_bytes):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = 1  # 요청 / 워커 단위 병렬화와 겹치지 않도록
+    return ort.InferenceSession(model_bytes, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def parity_error(compiled, original, X):
+    """원본 대비 양성 클래스 확률의 최대 절대 오차
+
+    X는 앱과 같은 float64 입력: 원본은 float64 그대로, ONNX는 런타임과 똑같이 float32로 변환해 실행하므로
+    변환 때문에 트리 분기가 바뀌는 행도 오차로 잡힌다.
+    """
+    expected = np.asarray(original.predict_proba(X), dtype=np.float64)
+    actual = compiled._run(X)
+    return float(np.max(np.abs(actual[:, -1] - expected[:, -1])))
+
+
+def load_compiled_model(backend, hospital_key, model_type, original, tolerance=PARITY_TOLERANCE):
+    """ONNX 모델을 로드해 원본과 출력이 같으면 CompiledModel, 아니면 None (사유는 logging 경고)"""
+    model_bytes = backend.read_bytes(compiled_model_path(hospital_key, model_type))
+    reference = backend.read_bytes(compiled_reference_path(hospital_key, model_type))
+    if model_bytes is None or reference is None:
+        return None
+    try:
+        compiled = CompiledModel(create_session(model_bytes), original, model_type)
+        with np.load(io.BytesIO(reference), allow_pickle=False) as data:
+            # 이전 빌드의 float32 기준 행도 float64로 올려 원본 모델에는 런타임과 같은 dtype으로 전달
+            X = pd.DataFrame(data["X"].astype(np.float64), columns=[str(c) for c in data["columns"]])
+        error = parity_error(compiled, original, X)
+    except Exception as e:
+        logger.warning("%s/%s ONNX 로드 실패, 원본 모델 사용: %s", hospital_key, model_type, e)
+        return None
+    if error > tolerance:
+        logger.warning("%s/%s ONNX 출력 불일치 (최대 오차 %.2e), 원본 모델 사용", hospital_key, model_type, error)
+        return None
+    return compiled
+
+
+def with_compiled_models(backend, hospital_key, hospital_models):
+    """설정된 병원이면 모델(scaler 제외)을 검증된 ONNX 어댑터로 교체한 새 dict 반환"""
+    if hospital_key not in compiled_hospitals():
+        return hospital_models
+    models = dict(hospital_models)
+    for model_type, model in hospital_models.items():
+        if model_type == "scaler" or model is None:
+            continue
+        compiled = load_compiled_model(backend, hospital_key, model_type, model)
+        if compiled is not None:
+            models[model_type] = compiled
+    return models
+
+
+# ======================
+# 🔹 빌드 시 변환 (CLI)
+# ======================
+def convert_model(model, model_type, n_features):
+    """LightGBM / XGBoost → onnxmltools, MLP(scikit-learn) → skl2onnx"""
+    if model_type == "lgbm":
+        from onnxmltools import convert_lightgbm
+        from onnxmltools.convert.common.data_types import FloatTensorType
+        return convert_lightgbm(model, initial_types=[("input", FloatTensorType([None, n_features]))],
+                                zipmap=False)
+    if model_type == "xgb":
+        from onnxmltools import convert_xgboost
+        from onnxmltools.convert.common.data_types import FloatTensorType
+        return convert_xgboost(model, initial_types=[("input", FloatTensorType([None, n_features]))])
+
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    return convert_sklearn(model, initial_types=[("input", FloatTensorType([None, n_features]))],
+                           options={id(model): {"zipmap": False}})
+
+
+def benchmark(fn, X, repeat=20):
+    """1행 지연시간(ms)과 배치 처리량(행/초)"""
+    row = X.iloc[:1]
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(row)
+    per_row_ms = (time.perf_counter() - t0) / repeat * 1000
+    t0 = time.perf_counter()
+    fn(X)
+    throughput = len(X) / max(time.perf_counter() - t0, 1e-9)
+    return per_row_ms, throughput
+
+
+def build_hospital(artifact_dir, hospital_key, cohort_df, tolerance=PARITY_TOLERANCE):
+    """병원 1곳의 모델을 ONNX로 변환하고 출력 일치 시에만 저장"""
+    from global_importance import load_local_predictor
+    from model_store import second_model_type
+
+    predictor = load_local_predictor(artifact_dir, hospital_key)
+    outputs = predictor.predict_outcome(cohort_df)
+    second_type = second_model_type(hospital_key)
+    features = {"lgbm": outputs[4], second_type: outputs[5]}
+    models = {"lgbm": predictor.lgbm_model,
+              second_type: predictor.mlp_model if second_type == "mlp" else predictor.xgb_model}
+
+    for model_type, model in models.items():
+        # 앱 런타임과 같은 float64 입력으로 검증 (ONNX 쪽만 float32로 변환됨)
+        X = features[model_type].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+        onnx_model = convert_model(model, model_type, X.shape[1])
+        model_bytes = onnx_model.SerializeToString()
+
+        compiled = CompiledModel(create_session(model_bytes), model, model_type)
+        error = parity_error(compiled, model, X)
+        if error > tolerance:
+            print(f"❌ {hospital_key}/{model_type}: 출력 불일치 (최대 오차 {error:.2e}), 저장하지 않음")
+            continue
+
+        model_path = os.path.join(artifact_dir, compiled_model_path(hospital_key, model_type))
+        with open(model_path, "wb") as f:
+            f.write(model_bytes)
+        reference = X.iloc[:REFERENCE_ROWS]
+        with open(os.path.join(artifact_dir, compiled_reference_path(hospital_key, model_type)), "wb") as f:
+            np.savez_compressed(f, X=reference.to_numpy(dtype=np.float64),
+                                columns=np.array([str(c) for c in reference.columns]))
+
+        orig_ms, orig_tp = benchmark(model.predict_proba, X)
+        onnx_ms, onnx_tp = benchmark(compiled.predict_proba, X)
+        print(f"✅ {hospital_key}/{model_type}: 최대 오차 {error:.2e}, "
+              f"1행 {orig_ms:.2f} → {onnx_ms:.2f} ms, 배치 {orig_tp:,.0f} → {onnx_tp:,.0f} 행/초")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="병원별 모델 ONNX 변환 + 출력 일치 검사")
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", required=True, help="검증용 코호트 CSV (앱 입력과 동일한 컬럼)")
+    parser.add_argument("--hospital", action="append", choices=list(MODEL_FILES), help="대상 병원 (기본: 전체)")
+    parser.add_argument("--tolerance", type=float, default=PARITY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    cohort_df = pd.read_csv(args.cohort)
+    for hospital_key in args.hospital or list(MODEL_FILES):
+        build_hospital(artifact_dir, hospital_key, cohort_df, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+입력 분포 모니터링 (드리프트 감지)
+
+예측 요청마다 원본 입력(PTA / 혈액검사 / HL_duration)을 병원(hospital_key) × 변수별
+고정 구간 히스토그램 + 이동 평균/분산에 누적한다 (변수당 메모리 고정, 요청당 배열 연산 몇 번).
+누적값은 주기적으로 로컬 JSON에 기록해 재시작 후에도 이어지고,
+학습 코호트로 만든 기준 히스토그램(models/<prefix>_input_reference.json)과 같은 구간에서
+PSI(population stability index)를 계산해 관리자 화면에 표시한다.
+
+    SSNHL_DRIFT_STATS=/var/lib/ssnhl/drift_stats.json   (기본: 앱 폴더의 drift_stats.json)
+
+    python drift.py reference --artifact-dir ./drive_mirror --cohort train_wonju.csv --hospital wonju
+    python drift.py report --artifact-dir ./drive_mirror
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import argparse
+import threading
+import numpy as np
+
+from audiogram import pta_columns, DB_MIN, DB_MAX
+from whatif import LAB_XLIMS
+from model_store import MODEL_FILES, input_reference_path
+
+DRIFT_STATS_ENV = "SSNHL_DRIFT_STATS"
+DEFAULT_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "drift_stats.json")
+STATS_VERSION = 1
+FLUSH_INTERVAL = 60  # 초
+
+# PSI 기준 (일반적으로 0.1 미만 안정, 0.25 이상 유의한 변화)
+PSI_WATCH, PSI_DRIFT = 0.1, 0.25
+MIN_SAMPLES = 30
+
+logger = logging.getLogger(__name__)
+
+# 변수별 고정 구간 경계 (범위 밖 값은 양 끝 underflow / overflow 구간)
+FEATURE_BINS = {
+    **{column: np.arange(DB_MIN, DB_MAX + 5, 5.0) for column in pta_columns()},
+    **{test: np.linspace(low, high, 41) for test, (low, high) in LAB_XLIMS.items()},
+    "HL_duration": np.linspace(0, 90, 31),
+}
+MONITORED_FEATURES = list(FEATURE_BINS)
+
+
+def default_stats_path():
+    return os.environ.get(DRIFT_STATS_ENV) or DEFAULT_STATS_PATH
+
+
+# ======================
+# 🔹 변수 1개 요약 (고정 크기)
+# ======================
+class FeatureSketch:
+    """고정 구간 히스토그램 + 개수 / 결측 / 평균 / 분산(Welford) / 최솟값 / 최댓값"""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.n = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        valid = values[~np.isnan(values)]
+        self.missing += len(values) - len(valid)
+        if not len(valid):
+            return
+        np.add.at(self.counts, np.searchsorted(self.edges, valid, side="right"), 1)
+
+        # 배치 평균 / 분산 병합 (Chan et al.)
+        n_b, mean_b = len(valid), float(valid.mean())
+        m2_b = float(((valid - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        self.min = min(self.min, float(valid.min()))
+        self.max = max(self.max, float(valid.max()))
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else 0.0
+
+    def quantile(self, q):
+        """히스토그램 선형 보간 분위수 (양 끝 구간은 관측 최솟값 / 최댓값까지)"""
+        if not self.n:
+            return None
+        bounds = np.concatenate([[min(self.min, self.edges[0])], self.edges, [max(self.max, self.edges[-1])]])
+        cumulative = np.cumsum(self.counts)
+        target = q * self.n
+        index = int(np.searchsorted(cumulative, target, side="left"))
+        index = min(index, len(self.counts) - 1)
+        before = cumulative[index - 1] if index else 0
+        fraction = (target - before) / self.counts[index] if self.counts[index] else 0.0
+        low, high = bounds[index], bounds[index + 1]
+        return float(min(max(low + fraction * (high - low), self.min), self.max))
+
+    def to_dict(self):
+        return {"counts": self.counts.tolist(), "n": self.n, "missing": self.missing, "mean": self.mean,
+                "m2": self.m2, "min": self.min if self.n else None, "max": self.max if self.n else None}
+
+    @classmethod
+    def from_dict(cls, edges, data):
+        sketch = cls(edges)
+        if len(data.get("counts", [])) != len(sketch.counts):
+            return sketch  # 구간 정의가 바뀌면 새로 누적
+        sketch.counts = np.asarray(data["counts"], dtype=np.int64)
+        sketch.n, sketch.missing = int(data["n"]), int(data["missing"])
+        sketch.mean, sketch.m2 = float(data["mean"]), float(data["m2"])
+        if sketch.n:
+            sketch.min, sketch.max = float(data["min"]), float(data["max"])
+        return sketch
+
+
+def _feature_matrix(df):
+    """입력 DataFrame → (행, MONITORED_FEATURES) float 배열 (없는 컬럼 / 빈 값은 NaN)"""
+    import pandas as pd
+
+    return df.reindex(columns=MONITORED_FEATURES).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def build_sketches(df):
+    """DataFrame 전체 → 변수별 FeatureSketch (기준 분포 생성 / 배치 입력)"""
+    matrix = _feature_matrix(df)
+    sketches = {}
+    for j, feature in enumerate(MONITORED_FEATURES):
+        sketches[feature] = FeatureSketch(FEATURE_BINS[feature])
+        sketches[feature].update(matrix[:, j])
+    return sketches
+
+
+def psi(observed_counts, expected_counts, eps=1e-4):
+    """같은 구간의 두 히스토그램 사이 PSI"""
+    observed = np.asarray(observed_counts, dtype=float)
+    expected = np.asarray(expected_counts, dtype=float)
+    if observed.sum() == 0 or expected.sum() == 0:
+        return None
+    p = np.clip(observed / observed.sum(), eps, None)
+    q = np.clip(expected / expected.sum(), eps, None)
+    return float(((p - q) * np.log(p / q)).sum())
+
+
+# ======================
+# 🔹 수집기 (프로세스당 1개)
+# ======================
+class DriftCollector:
+    """병원 × 변수별 FeatureSketch 누적 + 주기적 로컬 기록"""
+
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path or default_stats_path()
+        self.flush_interval = flush_interval
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._sketches = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("드리프트 통계 로드 실패 (%s): %s", self.path, e)
+            return
+        if data.get("version") != STATS_VERSION:
+            return
+        self.started_at = data.get("started_at", self.started_at)
+        for hospital_key, features in data.get("hospitals", {}).items():
+            self._sketches[hospital_key] = {
+                feature: FeatureSketch.from_dict(FEATURE_BINS[feature], features.get(feature, {}))
+                for feature in MONITORED_FEATURES
+            }
+
+    def observe(self, hospital_key, df_input):
+        """예측 입력 행 누적 (예측 경로에서 호출, 실패해도 예측에는 영향 없음)"""
+        try:
+            matrix = _feature_matrix(df_input)
+        except Exception:
+            return
+        with self._lock:
+            sketches = self._sketches.get(hospital_key)
+            if sketches is None:
+                sketches = self._sketches[hospital_key] = {
+                    feature: FeatureSketch(FEATURE_BINS[feature]) for feature in MONITORED_FEATURES
+                }
+            for j, feature in enumerate(MONITORED_FEATURES):
+                sketches[feature].update(matrix[:, j])
+            self._dirty = True
+
+    def snapshot(self):
+        """{hospital_key: {feature: sketch dict}} 복사본"""
+        with self._lock:
+            return {
+                hospital_key: {feature: sketch.to_dict() for feature, sketch in sketches.items()}
+                for hospital_key, sketches in self._sketches.items()
+            }
+
+    def flush(self):
+        """변경분이 있으면 JSON으로 원자적 기록"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            self._dirty = False
+        data = {"version": STATS_VERSION, "started_at": self.started_at,
+                "flushed_at": time.strftime("%Y-%m-%d %H:%M:%S"), "hospitals": self.snapshot()}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._sketches = {}
+            self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._dirty = True
+        self.flush()
+
+    def start(self):
+        """주기적 기록 스레드 시작 (종료 시에도 1회 기록)"""
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning("드리프트 통계 기록 실패: %s", e)
+
+        threading.Thread(target=run, name="ssnhl-drift-flush", daemon=True).start()
+        atexit.register(self.flush)
+        return self
+
+
+# ======================
+# 🔹 기준 분포 / 보고서
+# ======================
+def write_reference(path, hospital_key, sketches):
+    data = {"version": STATS_VERSION, "hospital": hospital_key,
+            "features": {feature: sketch.to_dict() for feature, sketch in sketches.items()}}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def read_reference(file_obj):
+    """기준 분포 아티팩트 → {feature: sketch dict} (버전이 다르면 None)"""
+    data = json.load(file_obj)
+    if data.get("version") != STATS_VERSION:
+        return None
+    return data.get("features", {})
+
+
+def drift_rows(snapshot, references):
+    """병원 × 변수별 현재 분포 요약 + 기준 대비 PSI (references: {hospital_key: {feature: dict} | None})"""
+    rows = []
+    for hospital_key, features in sorted(snapshot.items()):
+        reference = references.get(hospital_key) or {}
+        for feature in MONITORED_FEATURES:
+            live = FeatureSketch.from_dict(FEATURE_BINS[feature], features.get(feature, {}))
+            if not live.n and not live.missing:
+                continue
+            ref = FeatureSketch.from_dict(FEATURE_BINS[feature], reference[feature]) if feature in reference else None
+            value = psi(live.counts, ref.counts) if ref is not None and ref.n else None
+            if value is None or live.n < MIN_SAMPLES:
+                status = "-"
+            else:
+                status = "drift" if value >= PSI_DRIFT else "watch" if value >= PSI_WATCH else "ok"
+            rows.append({
+                "hospital": hospital_key, "feature": feature, "n": live.n,
+                "missing_rate": round(live.missing / (live.n + live.missing), 3),
+                "mean": round(live.mean, 2) if live.n else None,
+                "p50": live.quantile(0.5), "ref_p50": ref.quantile(0.5) if ref is not None else None,
+                "psi": round(value, 4) if value is not None else None, "status": status,
+            })
+    return rows
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="입력 분포 기준 생성 / 드리프트 보고서")
+    parser.add_argument("command", choices=["reference", "report"])
+    parser.add_argument("--artifact-dir", required=True, help="models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", help="학습 코호트 CSV (reference, 앱 입력과 동일한 컬럼)")
+    parser.add_argument("--hospital", action="append", choices=list(MODEL_FILES), help="대상 병원")
+    parser.add_argument("--stats", default=default_stats_path(), help="수집된 통계 JSON (report)")
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    if args.command == "reference":
+        if not args.cohort or not args.hospital:
+            parser.error("reference에는 --cohort와 --hospital이 필요합니다.")
+        sketches = build_sketches(pd.read_csv(args.cohort))
+        for hospital_key in args.hospital:
+            path = os.path.join(artifact_dir, input_reference_path(hospital_key))
+            write_reference(path, hospital_key, sketches)
+            print(f"✅ {hospital_key}: {path}")
+        return 0
+
+    with open(args.stats, encoding="utf-8") as f:
+        snapshot = json.load(f).get("hospitals", {})
+    references = {}
+    for hospital_key in args.hospital or list(snapshot):
+        path = os.path.join(artifact_dir, input_reference_path(hospital_key))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                references[hospital_key] = read_reference(f)
+    snapshot = {k: v for k, v in snapshot.items() if not args.hospital or k in args.hospital}
+    print(pd.DataFrame(drift_rows(snapshot, references)).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
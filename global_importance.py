@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+병원별 전역 변수 중요도(mean |SHAP|) 아티팩트
+
+학습/참조 코호트 전체에 대한 mean |SHAP| 값과 background 분포(분위수)를
+오프라인으로 계산해 models/ 폴더의 joblib 파일 옆에 JSON으로 저장한다.
+앱은 이 파일을 읽어 전체 변수 중요도를 즉시 표시하고,
+요청 시에는 환자 1명에 대한 local SHAP만 계산한다.
+
+사용 예 (Google Drive 폴더를 로컬에 내려받은 디렉터리 기준):
+    python global_importance.py --artifact-dir ./drive_mirror --cohort background.csv
+    python global_importance.py --artifact-dir ./drive_mirror --cohort background.csv --hospital wonju
+"""
+import os
+import json
+import argparse
+import importlib
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_module, configure_matplotlib
+from artifact_backends import LocalDirectoryBackend
+from predictor_loader import shared_registry
+from model_store import MODEL_FILES, global_importance_path, load_model_file, second_model_type
+
+ARTIFACT_VERSION = 1
+QUANTILES = [0.0, 0.05, 0.25, 0.5, 0.75, 0.95, 1.0]
+KERNEL_BACKGROUND_SIZE = 20
+KERNEL_NSAMPLES = 200  # 환자별 KernelExplainer 평가 횟수 상한 (기본값 2M+2048 대비 수십 배 빠름)
+
+plt = lazy_module("matplotlib.pyplot", on_load=configure_matplotlib)
+
+
+# ======================
+# 🔹 SHAP 계산
+# ======================
+def positive_class_shap(values):
+    """binary 분류의 양성 클래스 SHAP 값만 추출 (list / 3차원 배열 대응)"""
+    if isinstance(values, list):
+        return np.asarray(values[1])
+    values = np.asarray(values)
+    if values.ndim == 3:
+        return values[:, :, 1]
+    return values
+
+
+def compute_shap_values(model, X):
+    """트리 모델은 TreeExplainer, 그 외(MLP 등)는 KernelExplainer로 SHAP 계산"""
+    import shap
+
+    try:
+        explainer = shap.TreeExplainer(model)
+        values = explainer.shap_values(X)
+        expected = explainer.expected_value
+    except Exception:
+        background = shap.kmeans(X, min(KERNEL_BACKGROUND_SIZE, len(X)))
+        explainer = shap.KernelExplainer(model.predict_proba, background)
+        values = explainer.shap_values(X, silent=True)
+        expected = explainer.expected_value
+
+    expected = np.atleast_1d(np.asarray(expected, dtype=float))
+    return positive_class_shap(values), float(expected[-1])
+
+
+def shap_explainer(model, background, kernel_nsamples=KERNEL_NSAMPLES):
+    """X → 양성 클래스 SHAP 값 함수 (여러 청크에 재사용)
+
+    트리 모델은 TreeExplainer, 그 외(MLP 등)는 background를 k-means로 요약한 KernelExplainer를
+    1회만 만들고 환자당 평가 횟수를 kernel_nsamples로 제한한다.
+    """
+    import shap
+
+    try:
+        explainer = shap.TreeExplainer(model)
+        return lambda X: positive_class_shap(explainer.shap_values(X))
+    except Exception:
+        summary = shap.kmeans(background, min(KERNEL_BACKGROUND_SIZE, len(background)))
+        explainer = shap.KernelExplainer(model.predict_proba, summary)
+        return lambda X: positive_class_shap(explainer.shap_values(X, nsamples=kernel_nsamples, silent=True))
+
+
+def summarize_model(model, X):
+    """모델 1개에 대한 전역 중요도 + background 분포 요약"""
+    shap_values, expected_value = compute_shap_values(model, X)
+    numeric = X.apply(pd.to_numeric, errors='coerce')
+
+    return {
+        "features": list(X.columns),
+        "mean_abs_shap": np.abs(shap_values).mean(axis=0).round(6).tolist(),
+        "expected_value": round(expected_value, 6),
+        "background": {
+            "n": int(len(X)),
+            "quantiles": QUANTILES,
+            "values": numeric.quantile(QUANTILES).T.round(6).values.tolist(),
+            "mean": numeric.mean().round(6).tolist(),
+        },
+    }
+
+
+def build_hospital_artifact(hospital_key, predictor, cohort_df):
+    """병원 predictor로 코호트를 전처리한 뒤 모델별 전역 중요도 아티팩트 생성"""
+    outputs = predictor.predict_outcome(cohort_df)
+    df_lgbm, df_xgb = outputs[4], outputs[5]
+    second_type = second_model_type(hospital_key)
+    second_model = predictor.mlp_model if second_type == "mlp" else predictor.xgb_model
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "hospital": hospital_key,
+        "models": {
+            "lgbm": summarize_model(predictor.lgbm_model, df_lgbm),
+            second_type: summarize_model(second_model, df_xgb),
+        },
+    }
+
+
+# ======================
+# 🔹 앱에서 사용하는 로드 / 시각화
+# ======================
+def read_global_importance(file_obj):
+    """JSON 아티팩트 로드 (BytesIO 또는 파일 객체)"""
+    data = json.load(file_obj)
+    if data.get("version") != ARTIFACT_VERSION:
+        return None
+    return data
+
+
+def plot_global_importance(entry, max_display=20, xlabel="mean(|SHAP value|)"):
+    """사전 계산된 mean |SHAP| 값으로 summary_plot(bar) 스타일 막대 그래프 생성"""
+    order = np.argsort(entry["mean_abs_shap"])[::-1][:max_display]
+    features = [entry["features"][i] for i in order][::-1]
+    values = [entry["mean_abs_shap"][i] for i in order][::-1]
+
+    fig, ax = plt.subplots(figsize=(8, 0.4 * len(features) + 1.5))
+    ax.barh(range(len(features)), values, color='#1E88E5')
+    ax.set_yticks(range(len(features)))
+    ax.set_yticklabels(features)
+    ax.set_xlabel(xlabel)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.subplots_adjust(top=0.88)
+    plt.tight_layout()
+    return fig
+
+
+# ======================
+# 🔹 오프라인 빌드 (CLI)
+# ======================
+def load_local_predictor(artifact_dir, hospital_key):
+    """로컬 디렉터리(predictors/, models/)에서 predictor를 로드하고 모델 주입"""
+    backend = LocalDirectoryBackend(artifact_dir)
+    shared_registry(backend.root, backend.read_bytes)
+    predictor = importlib.import_module(f"predictors.{hospital_key}").get_predictor()
+
+    for model_type, path in MODEL_FILES[hospital_key].items():
+        model = load_model_file(os.path.join(artifact_dir, path), model_type)
+        attr = "scaler" if model_type == "scaler" else f"{model_type}_model"
+        setattr(predictor, attr, model)
+    return predictor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="병원별 전역 변수 중요도 아티팩트 생성")
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", required=True, help="background 코호트 CSV (앱 입력과 동일한 컬럼)")
+    parser.add_argument("--hospital", action="append", choices=list(MODEL_FILES), help="대상 병원 (기본: 전체)")
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    cohort_df = pd.read_csv(args.cohort)
+
+    for hospital_key in args.hospital or list(MODEL_FILES):
+        predictor = load_local_predictor(artifact_dir, hospital_key)
+        artifact = build_hospital_artifact(hospital_key, predictor, cohort_df)
+
+        out_path = os.path.join(artifact_dir, global_importance_path(hospital_key))
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False)
+        print(f"✅ {hospital_key}: {out_path} ({os.path.getsize(out_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
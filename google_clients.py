@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Google Drive / Sheets 공통 인증 + HTTP 전송 계층
+
+서비스 계정 자격 증명 1개(토큰 캐시 공유, 갱신은 잠금으로 1회만)와
+연결 풀을 가진 requests 세션 1개를 Drive 클라이언트와 Sheets 클라이언트가 함께 사용한다.
+동시에 실행되는 아티팩트 다운로드와 Sheets 기록이 TLS 연결 / 토큰 발급을 각자 반복하지 않는다.
+
+    - Drive: 패키지에 포함된 discovery 문서 사용 (시작 시 discovery 요청 없음)
+    - Sheets: gspread 클라이언트에 같은 세션 주입
+
+    SSNHL_HTTP_POOL_SIZE=16      → 호스트당 연결 풀 크기 (기본 10)
+    SSNHL_DRIVE_CHUNK_MB=8       → Drive 다운로드 청크 크기 MB (기본 100, googleapiclient 기본값과 동일)
+"""
+import os
+import threading
+import streamlit as st
+
+from lazy_imports import lazy_module
+
+# Google 클라이언트 라이브러리는 실제로 접근할 때 로드
+service_account = lazy_module("google.oauth2.service_account")
+google_auth_requests = lazy_module("google.auth.transport.requests")
+discovery = lazy_module("googleapiclient.discovery")
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.readonly',
+]
+
+HTTP_POOL_SIZE_ENV = "SSNHL_HTTP_POOL_SIZE"
+DRIVE_CHUNK_ENV = "SSNHL_DRIVE_CHUNK_MB"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_DRIVE_CHUNK_MB = 100
+HTTP_TIMEOUT = 60
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _env_int(name, default):
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def download_chunk_size():
+    """MediaIoBaseDownload 청크 크기 (bytes)"""
+    return _env_int(DRIVE_CHUNK_ENV, DEFAULT_DRIVE_CHUNK_MB) * 1024 * 1024
+
+
+# ======================
+# 🔹 인증 / 세션
+# ======================
+def shared_credentials(service_account_info, scopes=SCOPES):
+    """스레드 간 공유용 서비스 계정 자격 증명 (만료 시 한 스레드만 갱신)"""
+    credentials = service_account.Credentials.from_service_account_info(
+        dict(service_account_info), scopes=scopes
+    )
+    return serialize_refresh(credentials)
+
+
+def serialize_refresh(credentials):
+    """refresh()를 잠금으로 감싼다: 동시에 요청한 스레드 중 하나만 갱신하고 나머지는 새 토큰을 사용
+
+    AuthorizedSession은 401(폐기된 토큰, 시계 오차) 후 토큰이 아직 유효해 보여도 refresh()를 부르므로
+    valid 여부가 아니라 "기다리는 동안 다른 스레드가 토큰을 바꿨는지"로 갱신 생략을 판단한다.
+    """
+    refresh = credentials.refresh
+    lock = threading.Lock()
+
+    def locked_refresh(request):
+        stale_token = credentials.token
+        with lock:
+            if credentials.token is not None and credentials.token != stale_token and credentials.valid:
+                return  # 대기하던 사이 다른 스레드가 이미 갱신함
+            refresh(request)
+
+    credentials.refresh = locked_refresh
+    return credentials
+
+
+def pooled_session(credentials, pool_size=None):
+    """연결 풀 + 재시도(멱등 요청만)가 설정된 인증 세션"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    pool_size = pool_size or _env_int(HTTP_POOL_SIZE_ENV, DEFAULT_POOL_SIZE)
+    session = google_auth_requests.AuthorizedSession(credentials)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=RETRY_STATUSES),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+class RequestsHttp:
+    """googleapiclient가 사용하는 httplib2.Http 인터페이스를 공유 requests 세션으로 제공
+
+    httplib2.Http는 스레드 간 공유가 안 되지만 requests 세션은 연결 풀을 통해 공유할 수 있다.
+    """
+
+    def __init__(self, session, timeout=HTTP_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        response = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info["status"] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        # 세션은 GoogleTransport가 소유 (서비스 객체가 닫아도 다른 클라이언트는 계속 사용)
+        pass
+
+
+class GoogleTransport:
+    """Drive / Sheets 클라이언트가 공유하는 자격 증명 + HTTP 세션"""
+
+    def __init__(self, service_account_info, scopes=SCOPES, pool_size=None):
+        self.credentials = shared_credentials(service_account_info, scopes)
+        self.session = pooled_session(self.credentials, pool_size)
+        self._lock = threading.Lock()
+        self._drive = None
+        self._sheets = None
+
+    def drive_service(self):
+        """Drive v3 서비스 (패키지 내장 discovery 문서, 공유 세션)"""
+        with self._lock:
+            if self._drive is None:
+                self._drive = discovery.build(
+                    'drive', 'v3', http=RequestsHttp(self.session),
+                    static_discovery=True, cache_discovery=False,
+                )
+            return self._drive
+
+    def sheets_client(self):
+        """gspread 클라이언트 (공유 세션)"""
+        import gspread
+
+        with self._lock:
+            if self._sheets is None:
+                self._sheets = gspread.authorize(self.credentials, session=self.session)
+            return self._sheets
+
+
+@st.cache_resource
+def get_google_transport():
+    """프로세스 공용 GoogleTransport (서비스 계정 정보가 없거나 실패하면 None)"""
+    try:
+        if 'google' in st.secrets:
+            service_account_info = st.secrets['google']
+        else:
+            st.error("Google 서비스 계정 정보가 설정되지 않았습니다.")
+            return None
+        return GoogleTransport(service_account_info)
+    except Exception as e:
+        st.error(f"Google 인증 초기화 실패: {str(e)}")
+        return None
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+독일하겐병원 다중 예측 기간(30 / 60 / 180일) 한 번에 예측
+
+기간별 predictor / 모델 번들은 그대로 두고, 같은 환자 입력으로 세 기간을 병렬 예측해
+회복 확률 추이(trajectory)를 하나의 그래프로 보여준다.
+추론 서버 사용 시에는 세 기간을 요청 1건으로 워커에서 처리한다 (inference_server.py).
+"""
+import traceback
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from lazy_imports import lazy_module, configure_matplotlib
+
+plt = lazy_module("matplotlib.pyplot", on_load=configure_matplotlib)
+
+# 예측 기간(일) → predictor 모듈
+HAGEN_HORIZONS = {
+    30: "predictors.hagen_30d",
+    60: "predictors.hagen_60d",
+    180: "predictors.hagen_180d",
+}
+DEFAULT_HORIZON = 180
+EMPTY_OUTPUTS = (None,) * 11  # 예측 실패 시 predict_outcome 반환값 자리
+
+
+@dataclass(frozen=True)
+class HorizonPrediction:
+    """예측 기간 1개의 결과 (inference: 해당 기간의 추론 컨텍스트, outputs: predict_outcome 11개 반환값)
+
+    예측 중 예외가 나면 outputs는 None 11개, error에 traceback 요약 (컨텍스트 생성 실패 시 inference도 None)
+    """
+    days: int
+    inference: object
+    outputs: tuple
+    error: str = None
+
+    @property
+    def lgbm_prob(self):
+        return self.outputs[1][0] if self.outputs[1] is not None else None
+
+    @property
+    def second_prob(self):
+        return self.outputs[3][0] if self.outputs[3] is not None else None
+
+    @property
+    def ok(self):
+        return self.error is None and self.lgbm_prob is not None and self.second_prob is not None
+
+
+def _failed(days, inference=None):
+    return HorizonPrediction(days, inference, EMPTY_OUTPUTS, error=traceback.format_exc(limit=3))
+
+
+def score_horizons(df_input, context_factory, horizons=HAGEN_HORIZONS):
+    """기간별 추론 컨텍스트를 만든 뒤 세 기간을 병렬 예측 ({일수: HorizonPrediction}, 일수 오름차순)
+
+    컨텍스트 생성(캐시 조회)은 호출 스레드에서 하고, 예측만 스레드 풀에서 실행한다
+    (LightGBM / XGBoost 예측은 GIL을 놓으므로 기간 수만큼 병렬로 진행된다).
+    한 기간의 predictor가 실패해도 나머지 기간 결과는 그대로 반환한다 (실패한 기간은 ok=False).
+    SHAP은 여기서 계산하지 않는다: 호출 측이 필요한 기간의 inference.shap_values 만 부른다.
+    """
+    predictions, contexts = {}, {}
+    for days, module_name in sorted(horizons.items()):
+        try:
+            contexts[days] = context_factory(module_name)
+        except Exception:
+            predictions[days] = _failed(days)
+
+    def predict(days, ctx):
+        # predictor가 입력을 수정해도 다른 기간에 영향이 없도록 기간별 복사본 사용
+        try:
+            return HorizonPrediction(days, ctx, tuple(ctx.predict(df_input.copy())))
+        except Exception:
+            return _failed(days, ctx)
+
+    if contexts:
+        with ThreadPoolExecutor(max_workers=len(contexts), thread_name_prefix="horizon") as pool:
+            futures = {days: pool.submit(predict, days, ctx) for days, ctx in contexts.items()}
+            predictions.update((days, future.result()) for days, future in futures.items())
+    return dict(sorted(predictions.items()))
+
+
+def trajectory_frame(predictions):
+    """기간별 회복 확률 표 (일수, LightGBM, 두 번째 모델 이름, 두 번째 모델 확률)"""
+    rows = []
+    for days, prediction in predictions.items():
+        bundle = prediction.inference.bundle
+        rows.append({
+            "days": days,
+            "lgbm_prob": prediction.lgbm_prob,
+            "second_model": bundle.second_model_name,
+            "second_prob": prediction.second_prob,
+            "lgbm_acc": bundle.lgbm_acc,
+            "second_acc": bundle.second_acc,
+        })
+    return pd.DataFrame(rows)
+
+
+def plot_trajectory(predictions, xlabel="Days", ylabel="Recovery probability (%)"):
+    """기간별 회복 확률 추이 그래프 (LightGBM / 두 번째 모델)
+
+    두 번째 모델은 기간마다 다를 수 있으므로 (30 / 180일 MLP, 60일 XGBoost) 점마다 모델별 마커와
+    범례를 따로 그리고, 기간 간 연결선은 점선으로만 표시한다.
+    """
+    df = trajectory_frame({d: p for d, p in predictions.items() if p.ok})
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    lgbm_color, second_color = "#1E88E5", "#43A047"
+    ax.plot(df["days"], df["lgbm_prob"] * 100, marker="o", linewidth=2, color=lgbm_color, label="LightGBM")
+    ax.plot(df["days"], df["second_prob"] * 100, linestyle=":", linewidth=1.5, color=second_color)
+    for (name, group), marker in zip(df.groupby("second_model", sort=False), ["s", "^", "D", "v"]):
+        days_label = ", ".join(f"{d}" for d in group["days"])
+        ax.scatter(group["days"], group["second_prob"] * 100, marker=marker, s=60, color=second_color,
+                   zorder=3, label=f"{name} ({days_label})")
+
+    for column, color in [("lgbm_prob", lgbm_color), ("second_prob", second_color)]:
+        for x, y in zip(df["days"], df[column] * 100):
+            ax.annotate(f"{y:.1f}%", (x, y), textcoords="offset points", xytext=(0, 8),
+                        ha="center", fontsize=9, color=color)
+
+    ax.axhline(50, color="gray", linestyle="--", linewidth=1)
+    ax.set_xticks(df["days"])
+    ax.set_xticklabels([f"{d}" for d in df["days"]])
+    ax.set_ylim(0, 105)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.legend(loc="lower right")
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.tight_layout()
+    return fig
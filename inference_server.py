@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+멀티 프로세스 추론 서버 (pre-fork, copy-on-write 모델 메모리 공유)
+
+부모 프로세스가 로컬 아티팩트 번들(SSNHL_ARTIFACT_DIR)에서 8개 병원의 모델 / scaler /
+TreeExplainer / predictor 코드를 한 번만 로드하고 gc.freeze() 후 워커를 fork 한다.
+워커는 부모의 메모리 페이지를 copy-on-write로 공유하므로 워커 수가 늘어도
+모델 메모리는 한 벌만 사용한다. Streamlit 프로세스는 모델을 로드하지 않고
+SSNHL_INFERENCE_SERVER=host:port 로 예측 / SHAP 계산을 워커에 위임한다.
+
+요청은 pickle로 주고받으므로 서버와 클라이언트 모두 SSNHL_INFERENCE_AUTHKEY(공유 비밀)가 필요하며,
+기본 주소는 localhost 이다. unix 소켓(unix:/경로)도 지원하고, 외부 주소에 열려면 --allow-remote 가 필요하다.
+
+    export SSNHL_INFERENCE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    SSNHL_ARTIFACT_DIR=./artifacts python inference_server.py --address 127.0.0.1:8600 --workers 4
+    SSNHL_INFERENCE_SERVER=127.0.0.1:8600 streamlit run main.py
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import argparse
+import importlib
+import ipaddress
+import traceback
+import multiprocessing
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+from model_store import MODEL_FILES, accuracy_path, load_model_artifact, parse_accuracy
+from model_bundles import ModelBundle, InferenceContext, build_model_bundle
+from compiled_models import with_compiled_models
+
+SERVER_ENV = "SSNHL_INFERENCE_SERVER"
+AUTHKEY_ENV = "SSNHL_INFERENCE_AUTHKEY"
+DEFAULT_ADDRESS = "127.0.0.1:8600"
+UNIX_PREFIX = "unix:"
+MAX_ACCEPT_FAILURES = 20  # 연속 accept 실패 시 워커 종료 (부모가 다시 띄움)
+
+
+def parse_address(address):
+    """"host:port" → (host, port), "unix:/경로" → 소켓 파일 경로"""
+    if address.startswith(UNIX_PREFIX):
+        return address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+def is_local_address(address):
+    parsed = parse_address(address)
+    if isinstance(parsed, str):
+        return True
+    host = parsed[0]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def get_authkey():
+    """공유 비밀 (미설정이면 서버 / 클라이언트 모두 거부)"""
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise RuntimeError(f"{AUTHKEY_ENV} 가 설정되지 않았습니다 (추론 서버와 앱에 같은 값 필요).")
+    return authkey.encode("utf-8")
+
+
+# ======================
+# 🔹 모델 레지스트리 (부모 프로세스에서 1회 로드)
+# ======================
+class ModelRegistry:
+    """병원별 번들 + TreeExplainer (fork 이후 읽기 전용)"""
+
+    def __init__(self, bundles, explainers, modules=None):
+        self.bundles = bundles
+        self.explainers = explainers
+        self.modules = modules or {}
+
+    @classmethod
+    def load(cls, backend):
+        import shap
+        from predictor_loader import shared_registry
+
+        shared_registry(backend.root, backend.read_bytes)
+        modules = import_predictor_modules()
+
+        def accuracy_fn(hospital_key, model_type):
+            content = backend.read_bytes(accuracy_path(hospital_key, model_type))
+            return parse_accuracy(content) if content else 0.75
+
+        bundles, explainers = {}, {}
+        for hospital_key, paths in MODEL_FILES.items():
+            models = {}
+            for model_type, path in paths.items():
+                model = load_model_artifact(backend, path, model_type)
+                if model is not None:
+                    models[model_type] = model
+            bundle = build_model_bundle(hospital_key, with_compiled_models(backend, hospital_key, models), accuracy_fn)
+            bundles[hospital_key] = bundle
+
+            # SHAP은 ONNX 사용 여부와 관계없이 원본 트리 모델로 계산
+            if models.get("lgbm") is not None:
+                explainers[(hospital_key, "lgbm")] = shap.TreeExplainer(models["lgbm"])
+            if bundle.second_model_type == "xgb" and models.get("xgb") is not None:
+                explainers[(hospital_key, "xgb")] = shap.TreeExplainer(models["xgb"])
+        return cls(bundles, explainers, modules)
+
+    def context(self, module_name):
+        hospital_key = module_name.split(".")[-1]
+        return InferenceContext.create(
+            module_name, self.bundles[hospital_key],
+            explainer_fn=lambda model_type: self.explainers.get((hospital_key, model_type))
+        )
+
+
+def import_predictor_modules():
+    """predictor / preprocessing 코드를 fork 전에 import (워커가 코드 객체도 copy-on-write로 공유)"""
+    modules = {}
+    for name in ["preprocessing"] + [f"predictors.{hospital_key}" for hospital_key in MODEL_FILES]:
+        try:
+            modules[name] = importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ {name} import 실패: {e}", file=sys.stderr, flush=True)
+    return modules
+
+
+def describe_bundle(bundle):
+    """원격 클라이언트용 번들 메타데이터 (모델 객체 제외)"""
+    return {
+        "hospital_key": bundle.hospital_key,
+        "second_model_type": bundle.second_model_type,
+        "lgbm_acc": bundle.lgbm_acc,
+        "second_acc": bundle.second_acc,
+    }
+
+
+def _prediction_payload(inference, outputs, explain):
+    """predict_outcome 반환값 중 전송할 7개 + (요청 시) SHAP 값"""
+    lgbm_result, lgbm_prob, xgb_result, xgb_prob, df_lgbm, df_xgb, df_ids = outputs[:7]
+    shap_values = None
+    if explain and lgbm_prob is not None:
+        shap_values = inference.shap_values(df_lgbm, df_xgb)
+    return {
+        "outputs": (lgbm_result, lgbm_prob, xgb_result, xgb_prob, df_lgbm, df_xgb, df_ids),
+        "shap_values": shap_values,
+    }
+
+
+def handle_request(registry, request):
+    """요청 1건 처리 (op: ping / describe / predict / predict_horizons)"""
+    op = request.get("op")
+    if op == "ping":
+        return {"pid": os.getpid()}
+
+    if op == "describe":
+        return describe_bundle(registry.bundles[request["hospital_key"]])
+
+    if op == "predict":
+        inference = registry.context(request["module_name"])
+        return _prediction_payload(inference, inference.predict(request["df"]), request.get("explain"))
+
+    if op == "predict_horizons":
+        # 하겐병원 30/60/180일: 요청 1건으로 기간별 예측 (SHAP은 explain_days 기간만)
+        from hagen_horizons import score_horizons
+
+        predictions = score_horizons(request["df"], registry.context, request["horizons"])
+        return {
+            days: dict(
+                _prediction_payload(p.inference, p.outputs, p.ok and days == request.get("explain_days")),
+                describe=describe_bundle(p.inference.bundle) if p.inference is not None else None,
+                error=p.error,
+            )
+            for days, p in predictions.items()
+        }
+
+    raise ValueError(f"알 수 없는 요청: {op}")
+
+
+# ======================
+# 🔹 pre-fork 서버
+# ======================
+def _worker_loop(listener, registry):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    failures = 0
+    while True:
+        try:
+            conn = listener.accept()
+        except (AuthenticationError, EOFError):
+            continue  # 잘못된 authkey / 핸드셰이크 중 끊긴 연결
+        except OSError as e:
+            # 닫히거나 망가진 listener에서 바쁜 루프를 돌지 않도록 backoff, 계속 실패하면 종료
+            failures += 1
+            if failures >= MAX_ACCEPT_FAILURES:
+                print(f"❌ worker {os.getpid()} accept 실패로 종료: {e}", file=sys.stderr, flush=True)
+                sys.exit(1)
+            time.sleep(min(0.1 * 2 ** failures, 5.0))
+            continue
+        failures = 0
+
+        try:
+            while True:
+                request = conn.recv()
+                try:
+                    conn.send({"ok": True, "result": handle_request(registry, request)})
+                except Exception:
+                    conn.send({"ok": False, "error": traceback.format_exc(limit=5)})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+
+def serve(address, workers, backend):
+    """모델을 1회 로드한 뒤 워커를 fork 하고, 워커가 종료되면 다시 띄운다"""
+    authkey = get_authkey()
+    registry = ModelRegistry.load(backend)
+    listener = Listener(parse_address(address), authkey=authkey)
+
+    # 이후 GC가 공유 객체의 헤더를 건드려 페이지가 복사되지 않도록 고정
+    gc.collect()
+    gc.freeze()
+
+    ctx = multiprocessing.get_context("fork")
+    procs = []
+
+    def spawn():
+        proc = ctx.Process(target=_worker_loop, args=(listener, registry), daemon=True)
+        proc.start()
+        return proc
+
+    def shutdown(signum, frame):
+        for proc in procs:
+            proc.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    procs.extend(spawn() for _ in range(workers))
+    print(f"✅ inference server {address} (pid {os.getpid()}, workers {[p.pid for p in procs]})", flush=True)
+
+    while True:
+        for i, proc in enumerate(procs):
+            proc.join(timeout=1.0)
+            if not proc.is_alive():
+                procs[i] = spawn()
+
+
+# ======================
+# 🔹 클라이언트 (Streamlit 프로세스)
+# ======================
+def request(address, payload):
+    """워커 1개에 요청을 보내고 결과를 반환 (요청마다 연결, 스레드 안전)"""
+    with Client(parse_address(address), authkey=get_authkey()) as conn:
+        conn.send(payload)
+        response = conn.recv()
+    if not response["ok"]:
+        raise RuntimeError(f"추론 서버 오류:\n{response['error']}")
+    return response["result"]
+
+
+class RemoteInferenceContext:
+    """InferenceContext와 같은 인터페이스로 추론 서버에 예측 / SHAP 계산을 위임"""
+
+    def __init__(self, address, module_name, bundle):
+        self.address = address
+        self.module_name = module_name
+        self.bundle = bundle
+        self.predictor = None
+        self._shap_values = None
+
+    @classmethod
+    def create(cls, address, module_name):
+        meta = request(address, {"op": "describe", "hospital_key": module_name.split(".")[-1]})
+        return cls.from_description(address, module_name, meta)
+
+    @classmethod
+    def from_description(cls, address, module_name, meta):
+        bundle = ModelBundle(
+            hospital_key=meta["hospital_key"], lgbm_model=None, second_model=None,
+            second_model_type=meta["second_model_type"], scaler=None,
+            lgbm_acc=meta["lgbm_acc"], second_acc=meta["second_acc"],
+        )
+        return cls(address, module_name, bundle)
+
+    def _outputs(self, result):
+        self._shap_values = result["shap_values"]
+        # predict_outcome과 같은 11개 반환값 (모델 객체는 원격에 있으므로 None)
+        return tuple(result["outputs"]) + (None, None, self.bundle.lgbm_acc, self.bundle.second_acc)
+
+    def predict(self, df_input):
+        return self._outputs(request(self.address, {
+            "op": "predict", "module_name": self.module_name, "df": df_input, "explain": True
+        }))
+
+    def predict_batch(self, df_input):
+        """여러 행 일괄 예측 (SHAP 없음, 이전 predict의 SHAP 값은 유지)"""
+        result = request(self.address, {
+            "op": "predict", "module_name": self.module_name, "df": df_input, "explain": False
+        })
+        return tuple(result["outputs"]) + (None, None, self.bundle.lgbm_acc, self.bundle.second_acc)
+
+    def shap_values(self, df_lgbm, df_xgb):
+        """predict 요청 시 워커에서 함께 계산된 SHAP 값"""
+        return self._shap_values
+
+
+def request_horizons(address, df_input, horizons, explain_days=None):
+    """하겐병원 기간별 예측을 요청 1건으로 처리 ({일수: HorizonPrediction})"""
+    from hagen_horizons import HorizonPrediction, EMPTY_OUTPUTS
+
+    results = request(address, {
+        "op": "predict_horizons", "df": df_input, "horizons": dict(horizons), "explain_days": explain_days
+    })
+    predictions = {}
+    for days, result in sorted(results.items()):
+        if result["describe"] is None:
+            predictions[days] = HorizonPrediction(days, None, EMPTY_OUTPUTS, error=result["error"])
+            continue
+        inference = RemoteInferenceContext.from_description(address, horizons[days], result["describe"])
+        predictions[days] = HorizonPrediction(days, inference, inference._outputs(result), error=result["error"])
+    return predictions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SSNHL 멀티 프로세스 추론 서버")
+    parser.add_argument("--address", default=os.environ.get(SERVER_ENV, DEFAULT_ADDRESS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--allow-remote", action="store_true", help="localhost / unix 소켓 외 주소 허용")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get(AUTHKEY_ENV):
+        parser.error(f"{AUTHKEY_ENV} (공유 비밀)가 필요합니다.")
+    if not is_local_address(args.address) and not args.allow_remote:
+        parser.error(f"{args.address} 는 외부 주소입니다. 방화벽 / TLS 구성 후 --allow-remote 로 실행하세요.")
+
+    from artifact_backends import local_backend_from_env
+
+    backend = local_backend_from_env()
+    if backend is None:
+        parser.error("SSNHL_ARTIFACT_DIR (로컬 아티팩트 번들)이 필요합니다. bundle_artifacts.py 참고")
+    serve(args.address, args.workers, backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+코호트 일괄 작업 큐 (SQLite 작업 테이블 + 워커 프로세스)
+
+코호트 예측(cohort_ingest)과 리포트 일괄 생성(cohort_reports)을 Streamlit 세션 스레드가 아닌
+별도 워커 프로세스에서 실행한다. 작업 상태 / 진행률 / 결과 파일 경로는 SQLite에 기록되므로
+브라우저 탭을 닫아도 작업은 계속되고, 나중에 다시 접속해 결과를 받을 수 있다.
+취소는 작업 테이블에 표시만 하고, 워커가 다음 진행 보고 시점에 멈춘 뒤 그때까지의 결과를 남긴다.
+
+    SSNHL_JOBS_DIR=/var/lib/ssnhl/jobs    (기본: $XDG_DATA_HOME/ssnhl/jobs — 환자 코호트이므로 앱 폴더 밖에 둔다)
+    SSNHL_JOB_WORKERS=2                   (앱이 띄우는 워커 프로세스 수, 0이면 띄우지 않음)
+    SSNHL_JOB_RETENTION_DAYS=7            (끝난 작업의 행 / 결과 파일 보관 기간, 0이면 삭제하지 않음)
+
+워커는 로컬 아티팩트(SSNHL_ARTIFACT_DIR)의 predictor로 실행한다 (미설정이면 앱은 작업 제출을 막는다).
+업로드한 코호트 입력 파일은 작업이 끝나면 바로 지운다.
+워커가 죽어(OOM 등) running으로 남은 작업은 다시 대기열에 넣되, MAX_ATTEMPTS회 시도 후에는 failed로 둔다.
+
+    python jobs.py worker --workers 2
+    python jobs.py list
+    python jobs.py purge --days 7
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import uuid
+import atexit
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+
+JOBS_DIR_ENV = "SSNHL_JOBS_DIR"
+JOB_WORKERS_ENV = "SSNHL_JOB_WORKERS"
+JOB_RETENTION_ENV = "SSNHL_JOB_RETENTION_DAYS"
+DEFAULT_JOBS_DIR = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share")),
+    "ssnhl", "jobs",
+)
+DEFAULT_WORKERS = 1
+DEFAULT_RETENTION_DAYS = 7
+MAX_ATTEMPTS = 3        # 워커 비정상 종료 후 재시도 포함 최대 실행 횟수
+POLL_INTERVAL = 1.0     # 초
+PURGE_INTERVAL = 3600   # 초, 워커가 보관 기간 지난 작업을 정리하는 주기
+
+JOB_KINDS = ("score", "reports")
+ACTIVE_STATUSES = ("queued", "running")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,
+    kind             TEXT NOT NULL,
+    params           TEXT NOT NULL,
+    status           TEXT NOT NULL DEFAULT 'queued',
+    progress_done    INTEGER NOT NULL DEFAULT 0,
+    progress_total   INTEGER,
+    message          TEXT,
+    result_path      TEXT,
+    error            TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid       INTEGER,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    created_at       TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+    started_at       TEXT,
+    finished_at      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+
+def jobs_dir():
+    return os.environ.get(JOBS_DIR_ENV) or DEFAULT_JOBS_DIR
+
+
+def retention_days():
+    try:
+        return max(0, int(os.environ.get(JOB_RETENTION_ENV, DEFAULT_RETENTION_DAYS)))
+    except ValueError:
+        return DEFAULT_RETENTION_DAYS
+
+
+class JobCancelled(Exception):
+    """진행 보고 시점에 취소 요청이 확인되면 발생"""
+
+
+# ======================
+# 🔹 작업 테이블
+# ======================
+class JobStore:
+    """작업 테이블 (스레드마다 별도 연결, WAL 모드, 여러 프로세스가 공유)"""
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or jobs_dir())
+        self.path = os.path.join(self.root, "jobs.sqlite3")
+        os.makedirs(self.root, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """이전 스키마(attempts 열 없음)의 작업 테이블 보완"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "attempts" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def job_dir(self, job_id):
+        path = os.path.join(self.root, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # ---------- 제출 / 조회 ----------
+    def submit(self, kind, params, job_id=None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"알 수 없는 작업 종류: {kind}")
+        job_id = job_id or uuid.uuid4().hex[:12]
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, params) VALUES (?, ?, ?)",
+            (job_id, kind, json.dumps(params, ensure_ascii=False)),
+        )
+        return job_id
+
+    def new_job_id(self):
+        return uuid.uuid4().hex[:12]
+
+    def _row(self, row):
+        return dict(row, params=json.loads(row["params"])) if row else None
+
+    def get(self, job_id):
+        return self._row(self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def recent(self, limit=20):
+        rows = self._connect().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row(row) for row in rows]
+
+    # ---------- 워커 ----------
+    def claim_next(self, worker_pid):
+        """대기 중인 가장 오래된 작업 1개를 running으로 바꿔 반환 (프로세스 간 원자적)"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND cancel_requested = 0"
+                " ORDER BY created_at, rowid LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_pid = ?, attempts = attempts + 1,"
+                    " started_at = datetime('now', 'localtime') WHERE id = ?",
+                    (worker_pid, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    def report(self, job_id, done, total=None, message=None, result_path=None):
+        """진행 상황 기록, 취소 요청이 있으면 JobCancelled"""
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET progress_done = ?, progress_total = COALESCE(?, progress_total),"
+            " message = COALESCE(?, message), result_path = COALESCE(?, result_path) WHERE id = ?",
+            (done, total, message, result_path, job_id),
+        )
+        cancelled = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if cancelled and cancelled[0]:
+            raise JobCancelled(job_id)
+
+    def finish(self, job_id, status, error=None, result_path=None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, result_path = COALESCE(?, result_path),"
+            " finished_at = datetime('now', 'localtime') WHERE id = ?",
+            (status, error, result_path, job_id),
+        )
+
+    def cancel(self, job_id):
+        """대기 중이면 바로 취소, 실행 중이면 워커가 다음 진행 보고 시점에 중단"""
+        conn = self._connect()
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = datetime('now', 'localtime')"
+            " WHERE id = ? AND status = 'queued'",
+            (job_id,),
+        )
+
+    def requeue_orphans(self, max_attempts=MAX_ATTEMPTS):
+        """워커 프로세스가 죽어 running으로 남은 작업을 다시 대기열로
+
+        취소 요청된 작업은 cancelled, max_attempts회 실행한 작업은 failed로 끝낸다.
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id, worker_pid, attempts, cancel_requested FROM jobs WHERE status = 'running'"
+        ).fetchall()
+        orphans = [row for row in rows if not _pid_alive(row["worker_pid"])]
+        for row in orphans:
+            if row["cancel_requested"]:
+                # claim_next는 취소 요청된 작업을 가져가지 않으므로 대기열로 돌리면 queued로 영원히 남음
+                self.finish(row["id"], "cancelled")
+            elif row["attempts"] >= max_attempts:
+                self.finish(row["id"], "failed",
+                            error=f"워커가 {row['attempts']}회 비정상 종료되어 중단했습니다 (메모리 부족 등).")
+            else:
+                conn.execute("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (row["id"],))
+        return len(orphans)
+
+    # ---------- 정리 ----------
+    def purge(self, older_than_days=None):
+        """보관 기간이 지난 끝난 작업의 행과 작업 폴더(입력 / 결과 파일) 삭제, 삭제한 작업 수 반환"""
+        days = retention_days() if older_than_days is None else older_than_days
+        if days <= 0:
+            return 0
+        conn = self._connect()
+        placeholders = ", ".join("?" * len(ACTIVE_STATUSES))
+        rows = conn.execute(
+            f"SELECT id FROM jobs WHERE status NOT IN ({placeholders})"
+            " AND COALESCE(finished_at, created_at) < datetime('now', 'localtime', ?)",
+            (*ACTIVE_STATUSES, f"-{days} days"),
+        ).fetchall()
+        for row in rows:
+            shutil.rmtree(os.path.join(self.root, row["id"]), ignore_errors=True)
+            conn.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+        return len(rows)
+
+    def remove_input(self, job):
+        """작업 폴더 안에 저장한 업로드 입력 파일 삭제 (작업 폴더 밖의 경로는 건드리지 않음)"""
+        path = os.path.abspath(job["params"].get("cohort") or "")
+        if os.path.dirname(path) == os.path.join(self.root, job["id"]) and os.path.isfile(path):
+            os.remove(path)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ======================
+# 🔹 작업 실행
+# ======================
+def artifact_dir_configured():
+    """작업 실행에 필요한 로컬 아티팩트(SSNHL_ARTIFACT_DIR)가 설정되어 있는지"""
+    from artifact_backends import local_backend_from_env
+
+    try:
+        return local_backend_from_env() is not None
+    except FileNotFoundError:
+        return False
+
+
+def _artifact_dir():
+    from artifact_backends import local_backend_from_env
+
+    backend = local_backend_from_env()
+    if backend is None:
+        raise RuntimeError("일괄 작업에는 로컬 아티팩트(SSNHL_ARTIFACT_DIR)가 필요합니다.")
+    return backend.root
+
+
+def _count_rows(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def run_score_job(store, job):
+    """코호트 예측 → result.csv (청크마다 기록, 취소 시 그때까지의 결과 유지)"""
+    from cohort_ingest import score_cohort_file, DEFAULT_CHUNKSIZE
+
+    params = job["params"]
+    out_path = os.path.join(store.job_dir(job["id"]), "result.csv")
+    total = _count_rows(params["cohort"])
+    state = {"rows": 0}
+
+    def progress(message):
+        state["rows"] = min(state["rows"] + params.get("chunksize", DEFAULT_CHUNKSIZE), total)
+        store.report(job["id"], state["rows"], total, message, result_path=out_path)
+
+    store.report(job["id"], 0, total, "predictor 로드 중", result_path=out_path)
+    score_cohort_file(_artifact_dir(), params["hospital"], params["cohort"], out_path,
+                      params.get("chunksize", DEFAULT_CHUNKSIZE), params.get("audiogram", False), progress)
+    return out_path
+
+
+def run_reports_job(store, job):
+    """코호트 리포트 → reports.zip / reports.pdf (취소 시 그때까지의 리포트로 파일을 닫음)"""
+    from cohort_reports import score_cohort, export_reports
+
+    params = job["params"]
+    out_path = os.path.join(store.job_dir(job["id"]), f"reports.{params.get('format', 'zip')}")
+    total = _count_rows(params["cohort"])
+    # 예측 / SHAP은 청크 단위로 필요할 때만 계산 (코호트 전체를 메모리에 두지 않음)
+    report_jobs = score_cohort(_artifact_dir(), params["hospital"], params["cohort"], params.get("hospital_name"))
+    state = {"done": 0}
+
+    def progress(message):
+        state["done"] += 1
+        store.report(job["id"], state["done"], total, message)
+
+    store.report(job["id"], 0, total, "리포트 생성 중", result_path=out_path)
+    export_reports(report_jobs, out_path, params.get("workers") or 2, progress, total=total)
+    return out_path
+
+
+RUNNERS = {"score": run_score_job, "reports": run_reports_job}
+
+
+def run_job(store, job):
+    try:
+        result_path = RUNNERS[job["kind"]](store, job)
+        store.finish(job["id"], "done", result_path=result_path)
+    except JobCancelled:
+        store.finish(job["id"], "cancelled")
+    except Exception as e:
+        store.finish(job["id"], "failed", error=f"{type(e).__name__}: {e}")
+    finally:
+        store.remove_input(job)
+
+
+def worker_loop(root=None, poll_interval=POLL_INTERVAL):
+    """작업을 하나씩 가져와 실행 (프로세스 진입점)"""
+    store = JobStore(root)
+    next_purge = 0.0
+    while True:
+        if time.monotonic() >= next_purge:
+            store.purge()
+            next_purge = time.monotonic() + PURGE_INTERVAL
+        job = store.claim_next(os.getpid())
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(store, job)
+
+
+def start_workers(count, root=None):
+    """워커 프로세스 시작 (spawn: Streamlit 서버 스레드 / 상태를 복제하지 않음)
+
+    리포트 작업이 프로세스 풀을 쓰므로 daemon이 아닌 프로세스로 띄우고, 부모 종료 시 함께 종료한다.
+    """
+    JobStore(root).requeue_orphans()
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for i in range(count):
+        process = context.Process(target=worker_loop, args=(root,), name=f"ssnhl-job-worker-{i}")
+        process.start()
+        processes.append(process)
+    atexit.register(_terminate, processes)
+    return processes
+
+
+def _terminate(processes):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def default_worker_count():
+    try:
+        return max(0, int(os.environ.get(JOB_WORKERS_ENV, DEFAULT_WORKERS)))
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="코호트 일괄 작업 워커 / 조회")
+    parser.add_argument("command", choices=["worker", "list", "cancel", "purge"])
+    parser.add_argument("--root", default=jobs_dir())
+    parser.add_argument("--workers", type=int, default=default_worker_count() or 1)
+    parser.add_argument("--id", help="취소할 작업 ID (cancel)")
+    parser.add_argument("--days", type=int, default=retention_days(), help="보관 기간 (purge)")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        processes = start_workers(args.workers, args.root)
+        print(f"✅ 워커 {len(processes)}개 실행 중 ({args.root})")
+        for process in processes:
+            process.join()
+        return 0
+
+    store = JobStore(args.root)
+    if args.command == "cancel":
+        store.cancel(args.id)
+        print(f"✅ 취소 요청: {args.id}")
+        return 0
+    if args.command == "purge":
+        print(f"✅ {store.purge(args.days)}개 작업 삭제 ({args.days}일 경과)")
+        return 0
+    for job in store.recent():
+        total = job["progress_total"] or "?"
+        print(f"{job['id']}  {job['kind']:>7}  {job['status']:>9}  {job['progress_done']}/{total}  "
+              f"{job['created_at']}  {job['error'] or job['message'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+무거운 라이브러리 지연 import
+
+Streamlit은 매 rerun마다 main.py를 다시 실행하므로, shap / matplotlib / reportlab /
+PIL / Google 클라이언트 라이브러리는 실제로 속성에 처음 접근할 때 import 한다.
+사이드바 입력 폼은 ML·그래프·리포트 스택이 로드되기 전에 먼저 그려진다.
+
+    shap = lazy_module("shap")
+    plt = lazy_module("matplotlib.pyplot", on_load=configure_matplotlib)
+"""
+import sys
+import types
+import importlib
+
+
+class LazyModule(types.ModuleType):
+    """첫 속성 접근 시 실제 모듈을 import 하는 프록시 모듈"""
+
+    def __init__(self, name, on_load=None):
+        super().__init__(name)
+        self.__dict__["_lazy_on_load"] = on_load
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            on_load = self.__dict__["_lazy_on_load"]
+            if on_load is not None:
+                on_load(module)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name, on_load=None):
+    """이미 import 된 모듈은 그대로, 아니면 LazyModule 프록시를 반환"""
+    module = sys.modules.get(name)
+    if module is not None and on_load is None:
+        return module
+    return LazyModule(name, on_load)
+
+
+def is_loaded(name):
+    """실제 모듈이 sys.modules에 로드되었는지 여부"""
+    return name in sys.modules
+
+
+def configure_matplotlib(pyplot):
+    """pyplot 최초 로드 시 한글 폰트 설정"""
+    pyplot.rc('font', family='Malgun Gothic')
@@ -1,28 +1,32 @@
 import streamlit as st
-# 🚨 캐시 완전 초기화
-st.cache_resource.clear()
 
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
-import os, sys, io, re, joblib, tempfile, json, datetime, traceback, shap, importlib, pickle, cloudpickle
-import matplotlib
-matplotlib.rc('font', family='Malgun Gothic')
-import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw, ImageFont
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
-# ======================
-# 🔹 Google Drive 설정
-# ======================
-FOLDER_ID = '1rTMoyzj1qxc8ET5648XvF0E-3oN46lel'
+import os, sys, io, re, json, datetime, traceback, importlib
+from lazy_imports import lazy_module, configure_matplotlib
+
+# 무거운 라이브러리는 첫 사용 시점에 로드 (사이드바 폼을 먼저 렌더링)
+shap = lazy_module("shap")
+plt = lazy_module("matplotlib.pyplot", on_load=configure_matplotlib)
+from global_importance import plot_global_importance
+from reports import create_summary_image, convert_image_to_pdf, summary_text
+from prediction_log import PredictionLog, SheetsMirror
+from google_clients import get_google_transport
+from translations import LANGUAGE_OPTIONS
+from hagen_horizons import HAGEN_HORIZONS, DEFAULT_HORIZON, trajectory_frame, plot_trajectory
+from whatif import NORMAL_RANGES, LAB_XLIMS, plot_response_curve
+from drift import DriftCollector, drift_rows
+from jobs import JobStore, ACTIVE_STATUSES, start_workers, default_worker_count, artifact_dir_configured
+from model_store import MODEL_FILES
+from audiogram import PTA_FREQUENCIES, DB_MIN, DB_MAX, audiogram_from_values, range_errors, audiogram_features
+from artifacts import (
+    load_predictor_modules, load_preprocessing_and_translation,
+    load_models_from_drive, load_global_importance_from_drive, load_partial_dependence_from_drive,
+    create_inference_context, remote_inference_address, predict_horizons, simulate_whatif,
+    get_translation_catalog, load_input_reference_from_drive, get_stylesheet_html, get_image_asset,
+    static_serving_enabled
+)
 
 # ======================
 # 🔹 Google Sheets 설정
@@ -31,101 +35,95 @@ SPREADSHEET_ID = '17Y24_hFUJSXXTdHVbL6doo6A2pnvmsRDCG98Ihvenlw'
 
 @st.cache_resource
 def get_sheets_client():
-    """Google Sheets 클라이언트 생성"""
+    """Google Sheets 클라이언트 (Drive와 자격 증명 / 연결 풀 공유)"""
+    transport = get_google_transport()
+    if not transport:
+        return None
     try:
-        if 'google' in st.secrets:
-            service_account_info = dict(st.secrets['google'])
-        else:
-            st.error("Google Sheets 서비스 계정 정보가 설정되지 않았습니다.")
-            return None
-        
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        credentials = ServiceAccountCredentials.from_json_keyfile_dict(
-            service_account_info, scope
-        )
-        client = gspread.authorize(credentials)
-        return client
+        return transport.sheets_client()
     except Exception as e:
         st.error(f"Google Sheets 클라이언트 초기화 실패: {str(e)}")
         return None
 
+def append_sheet_row(user_data):
+    """사용자 입력 데이터 1건을 Google Sheets에 추가 (실패 시 예외, st.* 호출 없음 - 복제 스레드에서 사용)"""
+    client = get_sheets_client()
+    if not client:
+        raise RuntimeError("Google Sheets 클라이언트를 사용할 수 없습니다.")
+
+    # 스프레드시트 열기
+    sheet = client.open_by_key(SPREADSHEET_ID).sheet1
+    
+    # 데이터를 리스트로 변환 (헤더 순서와 동일하게)
+    row_data = [
+        user_data.get('timestamp', ''),
+        user_data.get('language', ''),
+        user_data.get('hospital', ''),
+        user_data.get('id', ''),
+        user_data.get('birth', ''),
+        user_data.get('sex', ''),
+        user_data.get('name', ''),
+        user_data.get('hsptcd', ''),
+        user_data.get('side', ''),
+        user_data.get('hl_duration', ''),
+        user_data.get('clinic_date', ''),
+        user_data.get('steroid_treatment', ''),
+        user_data.get('it_dexa_treatment', ''),
+        user_data.get('hyperbaric_treatment', ''),
+        user_data.get('pta_rt_ac_250', ''),
+        user_data.get('pta_rt_ac_500', ''),
+        user_data.get('pta_rt_ac_1000', ''),
+        user_data.get('pta_rt_ac_2000', ''),
+        user_data.get('pta_rt_ac_3000', ''),
+        user_data.get('pta_rt_ac_4000', ''),
+        user_data.get('pta_rt_ac_8000', ''),
+        user_data.get('pta_lt_ac_250', ''),
+        user_data.get('pta_lt_ac_500', ''),
+        user_data.get('pta_lt_ac_1000', ''),
+        user_data.get('pta_lt_ac_2000', ''),
+        user_data.get('pta_lt_ac_3000', ''),
+        user_data.get('pta_lt_ac_4000', ''),
+        user_data.get('pta_lt_ac_8000', ''),
+        user_data.get('wbc', ''),
+        user_data.get('rbc', ''),
+        user_data.get('hb', ''),
+        user_data.get('plt', ''),
+        user_data.get('neutrophil', ''),
+        user_data.get('lymphocyte', ''),
+        user_data.get('ast', ''),
+        user_data.get('alt', ''),
+        user_data.get('bun', ''),
+        user_data.get('cr', ''),
+        user_data.get('glucose', ''),
+        user_data.get('total_protein', ''),
+        user_data.get('na', ''),
+        user_data.get('k', ''),
+        user_data.get('cl', ''),
+        user_data.get('dx_com', ''),
+        user_data.get('dx_ssnhl', ''),
+        user_data.get('dx_dizziness', ''),
+        user_data.get('dx_tinnitus', ''),
+        user_data.get('hx_htn', ''),
+        user_data.get('hx_dm', ''),
+        user_data.get('hx_crf', ''),
+        user_data.get('hx_mi', ''),
+        user_data.get('hx_stroke', ''),
+        user_data.get('hx_cancer', ''),
+        user_data.get('hx_others', ''),
+        user_data.get('prediction', ''),
+        user_data.get('probability', '')
+    ]
+    
+    # 시트에 행 추가
+    sheet.append_row(row_data)
+    return True
+
 def save_to_sheets(user_data):
-    """사용자 입력 데이터를 Google Sheets에 저장"""
+    """사용자 입력 데이터를 Google Sheets에 직접 저장 (로컬 기록 실패 시, 오류는 화면에 표시)"""
     try:
-        client = get_sheets_client()
-        if not client:
+        if not get_sheets_client():
             return False
-        
-        # 스프레드시트 열기
-        sheet = client.open_by_key(SPREADSHEET_ID).sheet1
-        
-        # 데이터를 리스트로 변환 (헤더 순서와 동일하게)
-        row_data = [
-            user_data.get('timestamp', ''),
-            user_data.get('language', ''),
-            user_data.get('hospital', ''),
-            user_data.get('id', ''),
-            user_data.get('birth', ''),
-            user_data.get('sex', ''),
-            user_data.get('name', ''),
-            user_data.get('hsptcd', ''),
-            user_data.get('side', ''),
-            user_data.get('hl_duration', ''),
-            user_data.get('clinic_date', ''),
-            user_data.get('steroid_treatment', ''),
-            user_data.get('it_dexa_treatment', ''),
-            user_data.get('hyperbaric_treatment', ''),
-            user_data.get('pta_rt_ac_250', ''),
-            user_data.get('pta_rt_ac_500', ''),
-            user_data.get('pta_rt_ac_1000', ''),
-            user_data.get('pta_rt_ac_2000', ''),
-            user_data.get('pta_rt_ac_3000', ''),
-            user_data.get('pta_rt_ac_4000', ''),
-            user_data.get('pta_rt_ac_8000', ''),
-            user_data.get('pta_lt_ac_250', ''),
-            user_data.get('pta_lt_ac_500', ''),
-            user_data.get('pta_lt_ac_1000', ''),
-            user_data.get('pta_lt_ac_2000', ''),
-            user_data.get('pta_lt_ac_3000', ''),
-            user_data.get('pta_lt_ac_4000', ''),
-            user_data.get('pta_lt_ac_8000', ''),
-            user_data.get('wbc', ''),
-            user_data.get('rbc', ''),
-            user_data.get('hb', ''),
-            user_data.get('plt', ''),
-            user_data.get('neutrophil', ''),
-            user_data.get('lymphocyte', ''),
-            user_data.get('ast', ''),
-            user_data.get('alt', ''),
-            user_data.get('bun', ''),
-            user_data.get('cr', ''),
-            user_data.get('glucose', ''),
-            user_data.get('total_protein', ''),
-            user_data.get('na', ''),
-            user_data.get('k', ''),
-            user_data.get('cl', ''),
-            user_data.get('dx_com', ''),
-            user_data.get('dx_ssnhl', ''),
-            user_data.get('dx_dizziness', ''),
-            user_data.get('dx_tinnitus', ''),
-            user_data.get('hx_htn', ''),
-            user_data.get('hx_dm', ''),
-            user_data.get('hx_crf', ''),
-            user_data.get('hx_mi', ''),
-            user_data.get('hx_stroke', ''),
-            user_data.get('hx_cancer', ''),
-            user_data.get('hx_others', ''),
-            user_data.get('prediction', ''),
-            user_data.get('probability', '')
-        ]
-        
-        # 시트에 행 추가
-        sheet.append_row(row_data)
-        return True
-        
+        return append_sheet_row(user_data)
     except Exception as e:
         st.error(f"❌ 데이터 저장 실패: {str(e)}")
         import traceback
@@ -133,223 +131,146 @@ def save_to_sheets(user_data):
         return False
 
 @st.cache_resource
-def get_drive_service():
-    """Google Drive 서비스 객체 생성"""
-    try:
-        if 'google' in st.secrets:
-            service_account_info = st.secrets['google']
-        else:
-            st.error("Google Drive 서비스 계정 정보가 설정되지 않았습니다.")
-            return None
-        
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info,
-            scopes=['https://www.googleapis.com/auth/drive.readonly']
-        )
-        return build('drive', 'v3', credentials=credentials)
-    except Exception as e:
-        st.error(f"Google Drive 서비스 초기화 실패: {str(e)}")
-        return None
-
-@st.cache_data
-def download_file_from_drive(file_name):
-    """Google Drive에서 지정된 파일을 다운로드 (predictors, models 폴더 포함)"""
-    service = get_drive_service()
-    if not service:
-        return None
-
-    def find_file_recursive(folder_id, target_name):
-        """폴더 전체를 재귀 탐색 (predictors/, models/ 모두 지원)"""
-        try:
-            # 현재 폴더에서 파일 검색
-            query = f"'{folder_id}' in parents and name='{target_name}' and trashed=false"
-            results = service.files().list(q=query, fields="files(id, name, mimeType)").execute()
-            files = results.get("files", [])
-            if files:
-                return files[0]["id"]
-
-            # 하위 폴더 검색
-            subfolders_query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            subfolders = service.files().list(q=subfolders_query, fields="files(id, name)").execute().get("files", [])
-
-            for sub in subfolders:
-                found = find_file_recursive(sub["id"], target_name)
-                if found:
-                    return found
-
-            return None
-        except Exception as e:
-            st.warning(f"폴더 탐색 중 오류 발생 ({target_name}): {e}")
-            return None
-
-    # 🔍 실제 탐색 시작
-    file_id = find_file_recursive(FOLDER_ID, os.path.basename(file_name))
+def get_prediction_log():
+    """로컬 예측 기록 (SQLite, 프로세스당 1개)"""
+    return PredictionLog()
 
-    if not file_id:
-        st.warning(f"❌ Google Drive에서 {file_name}을(를) 찾을 수 없습니다.")
-        return None
-
-    # ✅ 파일 다운로드
-    try:
-        request = service.files().get_media(fileId=file_id)
-        file_data = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_data, request)
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-        file_data.seek(0)
-        return file_data
-    except Exception as e:
-        st.error(f"📁 {file_name} 다운로드 실패: {str(e)}")
-        return None
-
-
-# ======================
-# 🔹 predictor 모듈 로드
-# ======================
 @st.cache_resource
-def load_predictor_modules():
-    predictor_files = [
-        'predictors/all.py', 'predictors/wonju.py', 'predictors/sev.py',
-        'predictors/hallym.py', 'predictors/jeju.py', 
-        'predictors/hagen_180d.py', 'predictors/hagen_60d.py', 'predictors/hagen_30d.py'
-    ]
-    temp_dir = tempfile.mkdtemp()
-    predictors_dir = os.path.join(temp_dir, 'predictors')
-    os.makedirs(predictors_dir, exist_ok=True)
-
-    with open(os.path.join(predictors_dir, '__init__.py'), 'w') as f:
-        f.write('')
-
-    for file_path in predictor_files:
-        content = download_file_from_drive(file_path)
-        if content:
-            with open(os.path.join(predictors_dir, os.path.basename(file_path)), 'wb') as f:
-                f.write(content.read())
-        else:
-            st.warning(f"⚠️ {file_path} 다운로드 실패")
-
-    if 'predictors' in sys.modules:
-        del sys.modules['predictors']
-
-    sys.path = [p for p in sys.path if 'predictors' not in p]
-    parent_dir = os.path.dirname(predictors_dir)
-    sys.path.insert(0, parent_dir)
-    sys.path.insert(0, predictors_dir)
-
-    return predictors_dir
+def get_sheets_mirror():
+    """로컬 기록 → Google Sheets 비동기 복제 스레드 (미복제 기록은 시작 시 재전송, 실패 시 backoff 재시도)"""
+    get_sheets_client()  # 인증 / 클라이언트 생성(오류 표시 포함)은 스크립트 스레드에서 1회
+    return SheetsMirror(get_prediction_log(), append_sheet_row).start()
 
-# ======================
-# 🔹 preprocessing / translation
-# ======================
 @st.cache_resource
-def load_preprocessing_and_translation():
-    files = ['preprocessing.py', 'translate_texts.py']
-    temp_dir = tempfile.mkdtemp()
-    if temp_dir not in sys.path:
-        sys.path.insert(0, temp_dir)
-
-    for f in files:
-        content = download_file_from_drive(f)
-        if content:
-            with open(os.path.join(temp_dir, f), 'wb') as w:
-                w.write(content.read())
+def get_drift_collector():
+    """입력 분포 수집기 (프로세스당 1개, 주기적으로 로컬 JSON에 기록)"""
+    return DriftCollector().start()
 
+def is_admin():
+    """?admin=<secrets의 admin_token> 으로 접속한 경우만 관리자 화면 표시"""
     try:
-        from preprocessing import load_and_process_data, impute_data, finalize_data
-        from translate_texts import texts_ko, texts_en_us, texts_ja, texts_zh, texts_es, texts_de, texts_hi, texts_ar
-        return True
-    except Exception as e:
-        st.error(f"모듈 로드 실패: {str(e)}")
+        token = st.secrets.get("admin_token")
+    except Exception:
         return False
+    return bool(token) and st.query_params.get("admin") == token
+
+def render_drift_admin():
+    """관리자 화면: 병원 × 변수별 입력 분포와 학습 기준 대비 PSI"""
+    collector = get_drift_collector()
+    st.markdown("### 🛰️ 입력 분포 모니터링")
+    st.caption(f"수집 시작 {collector.started_at} · 저장 위치 {collector.path}")
+
+    snapshot = collector.snapshot()
+    if not snapshot:
+        st.info("아직 수집된 입력이 없습니다.")
+        return
+    references = {key: load_input_reference_from_drive(key) for key in snapshot}
+    rows = pd.DataFrame(drift_rows(snapshot, references))
+    missing_reference = [key for key, reference in references.items() if not reference]
+    if missing_reference:
+        st.warning(f"⚠️ 기준 분포 없음: {', '.join(missing_reference)}")
+
+    for key, group in rows.groupby("hospital"):
+        flagged = group[group["status"].isin(["drift", "watch"])]
+        with st.expander(f"{key} (n={int(group['n'].max())}, 경고 {len(flagged)}개)", expanded=not flagged.empty):
+            st.dataframe(group.drop(columns="hospital").sort_values("psi", ascending=False), hide_index=True)
+
+    col1, col2 = st.columns(2)
+    if col1.button("💾 지금 저장"):
+        collector.flush()
+        st.success("✅ 저장 완료")
+    if col2.button("♻️ 통계 초기화"):
+        collector.reset()
+        st.rerun()
 
-# ======================
-# 🔹 모델 파일 로드 함수
-# ======================
 @st.cache_resource
-def load_models_from_drive():
-    """Google Drive에서 모델 파일 로드"""
-    model_files = {
-        "all": {
-            "lgbm": "models/all_lightgbm_model.joblib",
-            "xgb": "models/all_xgboost_model.joblib",
-            "scaler": "models/all_minmax_scaler.joblib"
-        },
-        "wonju": {
-            "lgbm": "models/ys_lightgbm_model.joblib",
-            "xgb": "models/ys_xgboost_model.joblib",
-            "scaler": "models/ys_minmax_scaler.joblib"
-        },
-        "sev": {
-            "lgbm": "models/sev_lightgbm_model.joblib",
-            "xgb": "models/sev_xgboost_model.joblib",
-            "scaler": "models/sev_minmax_scaler.joblib"
-        },
-        "hallym": {
-            "lgbm": "models/hallym_lightgbm_model.joblib",
-            "xgb": "models/hallym_xgboost_model.joblib",
-            "scaler": "models/hallym_minmax_scaler.joblib"
-        },
-        "jeju": {
-            "lgbm": "models/jeju_lightgbm_model.joblib",
-            "xgb": "models/jeju_xgboost_model.joblib",
-            "scaler": "models/jeju_minmax_scaler.joblib"
-        },
-        "hagen_180d": {
-            "lgbm": "models/hagen_180d_lightgbm_model.joblib",
-            "mlp": "models/hagen_180d_mlp_model.joblib",
-            "scaler": "models/hagen_180d_minmax_scaler.joblib"
-        },
-        "hagen_60d": {
-            "lgbm": "models/hagen_60d_lightgbm_model.joblib",
-            "xgb": "models/hagen_60d_xgboost_model.joblib",
-            "scaler": "models/hagen_60d_minmax_scaler.joblib"
-        },
-        "hagen_30d": {
-            "lgbm": "models/hagen_30d_lightgbm_model.joblib",
-            "mlp": "models/hagen_30d_mlp_model.joblib",
-            "scaler": "models/hagen_30d_minmax_scaler.joblib"
-        }
-    }
-
-    loaded_models = {}
-
-    for hospital, paths in model_files.items():
-            loaded_models[hospital] = {}
-            for model_type, path in paths.items():
-                try:
-                    content = download_file_from_drive(path)
-                    if content:
-                        tmp = tempfile.NamedTemporaryFile(delete=False)
-                        tmp.write(content.read())
-                        tmp.close()
-                        
-                        # scaler는 무조건 joblib로 로드
-                        if 'scaler' in model_type:
-                            try:
-                                loaded_models[hospital][model_type] = joblib.load(tmp.name)
-                            except Exception as e:
-                                pass  # 에러 발생 시 조용히 무시
-                        else:
-                            # 모델은 기존 방식대로
-                            try:
-                                with open(tmp.name, 'rb') as f:
-                                    loaded_models[hospital][model_type] = cloudpickle.load(f)
-                            except Exception as e1:
-                                try:
-                                    with open(tmp.name, 'rb') as f:
-                                        loaded_models[hospital][model_type] = pickle.load(f)
-                                except Exception as e2:
-                                    try:
-                                        loaded_models[hospital][model_type] = joblib.load(tmp.name)
-                                    except Exception as e3:
-                                        raise e3
-                    else:
-                        pass  # 경고 메시지 제거
-                except Exception as e:
-                    pass  # 에러 메시지 제거
-
-    return loaded_models
+def get_job_store():
+    """코호트 일괄 작업 테이블 + 워커 프로세스 (프로세스당 1회 시작, SSNHL_JOB_WORKERS=0 이면 외부 워커 사용)
+
+    워커는 로컬 아티팩트(SSNHL_ARTIFACT_DIR)가 있을 때만 띄운다 (없으면 모든 작업이 실패하므로).
+    """
+    store = JobStore()
+    if default_worker_count() and artifact_dir_configured():
+        start_workers(default_worker_count(), store.root)
+    return store
+
+def render_job_admin():
+    """관리자 화면: 코호트 일괄 예측 / 리포트 작업 제출, 진행률, 취소, 결과 다운로드"""
+    store = get_job_store()
+    st.markdown("### 🗂️ 코호트 일괄 작업")
+    can_submit = artifact_dir_configured()
+    if not can_submit:
+        st.warning("일괄 작업에는 로컬 아티팩트가 필요합니다. SSNHL_ARTIFACT_DIR를 설정한 뒤 앱을 다시 시작하세요.")
+
+    with st.form("job_submit", clear_on_submit=True):
+        cohort_file = st.file_uploader("코호트 파일 (앱 입력과 동일한 컬럼)", type=["csv", "parquet"])
+        col1, col2, col3 = st.columns(3)
+        hospital = col1.selectbox("병원", list(MODEL_FILES))
+        kind = col2.radio("작업", ["score", "reports"],
+                          format_func=lambda k: {"score": "예측 CSV", "reports": "환자별 리포트"}[k])
+        report_format = col3.radio("리포트 형식", ["zip", "pdf"])
+        submitted = st.form_submit_button("🚀 작업 제출", disabled=not can_submit)
+
+    if submitted:
+        if cohort_file is None:
+            st.warning("코호트 파일을 선택하세요.")
+        elif kind == "reports" and not cohort_file.name.lower().endswith(".csv"):
+            st.warning("리포트 작업은 CSV 코호트만 지원합니다.")
+        else:
+            job_id = store.new_job_id()
+            extension = os.path.splitext(cohort_file.name)[1].lower()
+            cohort_path = os.path.join(store.job_dir(job_id), f"cohort{extension}")
+            with open(cohort_path, "wb") as f:
+                f.write(cohort_file.getbuffer())
+            store.submit(kind, {"cohort": cohort_path, "hospital": hospital, "format": report_format}, job_id)
+            st.success(f"✅ 작업 {job_id} 제출 완료")
+
+    polling = any(job["status"] in ACTIVE_STATUSES for job in store.recent(10))
+
+    # 실행 중인 작업이 있을 때만 목록을 주기적으로 갱신 (페이지 전체는 다시 실행하지 않음)
+    # run_every는 데코레이터 시점에 고정되므로, 활성 여부가 바뀌면 앱을 다시 실행해 갱신 주기를 다시 정한다
+    @st.fragment(run_every=2 if polling else None)
+    def job_list():
+        jobs = store.recent(10)
+        if any(job["status"] in ACTIVE_STATUSES for job in jobs) != polling:
+            st.rerun()
+        for job in jobs:
+            total = job["progress_total"]
+            with st.container(border=True):
+                st.markdown(f"**{job['id']}** · {job['kind']} · {job['params'].get('hospital')} · "
+                            f"{job['status']} · {job['created_at']}")
+                if total:
+                    st.progress(min(job["progress_done"] / total, 1.0),
+                                text=f"{job['progress_done']:,}/{total:,}  {job['message'] or ''}")
+                elif job["message"]:
+                    st.caption(job["message"])
+                if job["error"]:
+                    st.error(job["error"])
+
+                if job["status"] in ACTIVE_STATUSES:
+                    if st.button("⏹️ 취소", key=f"cancel_{job['id']}", disabled=bool(job["cancel_requested"])):
+                        store.cancel(job["id"])
+                        st.rerun(scope="fragment")
+                elif job["result_path"] and os.path.exists(job["result_path"]):
+                    render_job_download(job)
+
+    job_list()
+
+
+def render_job_download(job):
+    """결과 파일은 '다운로드 준비'를 누른 작업만 읽음 (목록이 갱신될 때마다 모든 결과를 메모리에 올리지 않음)"""
+    ready_key = f"download_ready_{job['id']}"
+    if not st.session_state.get(ready_key):
+        size_mb = os.path.getsize(job["result_path"]) / 1e6
+        if st.button(f"📦 다운로드 준비 ({size_mb:,.1f} MB)", key=f"prepare_{job['id']}"):
+            st.session_state[ready_key] = True
+            st.rerun(scope="fragment")
+        return
+    # 취소된 작업도 그때까지의 결과 파일을 받을 수 있음
+    label = "📥 결과 다운로드" if job["status"] == "done" else "📥 부분 결과 다운로드"
+    with open(job["result_path"], "rb") as f:
+        st.download_button(label, f, file_name=os.path.basename(job["result_path"]), key=f"download_{job['id']}",
+                           on_click=lambda: st.session_state.pop(ready_key, None))
 
 # ======================
 # 🔹 메인 실행 (파일 로드)
@@ -360,124 +281,45 @@ with st.spinner("Google Drive에서 파일을 로드하는 중..."):
         st.error("필수 모듈 로드 실패")
         st.stop()
 
-    predictor_dir = load_predictor_modules()
-
-    # ✅ predictors import (강제 캐시 초기화 + 디버그)
-    if 'predictors' in sys.modules:
-        del sys.modules['predictors']
-    sys.path.insert(0, predictor_dir)
-
-    try:
-        predictors_all = importlib.import_module("predictors.all")
-    except ModuleNotFoundError as e:
-        st.warning(f"⚠️ Predictor 모듈 로드 실패: {e}")
-        predictors_all = None
-
-    # ✅ 모델 로드
-    models = load_models_from_drive()
-
-# 이후의 UI / 예측 파트는 그대로 유지
+# predictor / 모델 로드는 사이드바 입력 폼을 그린 뒤에 수행
 
 
 # 이제 import 가능
 from preprocessing import load_and_process_data, impute_data, finalize_data
-from translate_texts import texts_ko, texts_en_us, texts_ja, texts_zh, texts_es, texts_de, texts_hi, texts_ar
-
-# ==== 메인 UI 디자인
-st.markdown("""
-<style>
-/* ===== 1. 메인 제목 스타일 ===== */
-.main-title {
-    text-align: center;
-    font-size: 4em;
-    color: #0077B6;
-    font-weight: 700;
-    margin-bottom: 0.5em;
-    white-space: nowrap;
-}
-
-/* ===== 2. 본문 최대 폭 넓히기 ===== */
-.block-container {
-    max-width: 1200px;
-    padding-left: 5rem;
-    padding-right: 5rem;
-}
 
-/* ===== 3. 예측 버튼 스타일 ===== */
-div.stButton > button:first-child {
-    background-color: #0077B6;
-    color: white;
-    font-size: 18px;
-    padding: 0.6em 1.2em;
-    border-radius: 6px;
-}
-
-/* ===== 4. 사이드바 이미지 여백 제거 ===== */
-[data-testid="stSidebar"] img {
-    margin-top: 0px;
-}
-
-/* ===== 5. 사이드바 전체 위 여백 제거 ===== */
-[data-testid="stSidebar"] .block-container {
-    padding-top: 1rem;
-    padding-left: 1rem;
-    padding-right: 1rem;
-}
-[data-testid="stSidebar"] {
-    overflow-x: hidden;
-}
-            
-            
-</style>
+# ==== 메인 UI 디자인 (CSS는 static/app.css, 1회 읽어 캐시한 인라인 <style>)
+st.markdown(f"""
+{get_stylesheet_html()}
 
 <!-- 메인 제목 -->
 <div class="main-title">Prediction Model for Prognosis of SSNHL</div>
 """, unsafe_allow_html=True)
 
+# 관리자 화면 (입력 분포 / 드리프트)
+if is_admin():
+    render_drift_admin()
+    render_job_admin()
+    st.stop()
+
 # ===== 경로 설정
 BASE_DIR = os.path.dirname(__file__) if '__file__' in globals() else os.getcwd()
-sys.path.append(BASE_DIR)
-
-lang_options = {
-    "한국어": "ko",
-    "English": "en-us",
-    "日本語" : "ja",
-    "中文": "zh",
-    "Español": "es",
-    "Deutsch": "de",
-    "हिन्दी": "hi",
-    "العربية": "ar",
-}
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
 
 with st.sidebar:
     # 🌐 언어 선택 (사이드바 최상단)
-    lang_choice_label = st.sidebar.selectbox("🌐 Translate", list(lang_options.keys()), index=0)
-    lang_code = lang_options[lang_choice_label]
-
-    # 언어에 따라 텍스트 사전 선택
-    if lang_code == "ko":
-        texts = texts_ko
-    elif lang_code == "en-us":
-        texts = texts_en_us
-    elif lang_code == "ja":
-        texts = texts_ja
-    elif lang_code == "zh":
-        texts = texts_zh
-    elif lang_code == "es":
-        texts = texts_es
-    elif lang_code == "de":
-        texts = texts_de
-    elif lang_code == "hi":
-        texts = texts_hi
-    elif lang_code == "ar":
-        texts = texts_ar
-    else:
-        texts = texts_ko  # 기본값
-
-    # 로고 - Google Drive에서 로드
-    logo_content = download_file_from_drive("ON AIR.jpg")
-    if logo_content:
-        st.image(logo_content, use_column_width=True)
+    lang_choice_label = st.sidebar.selectbox("🌐 Translate", list(LANGUAGE_OPTIONS.keys()), index=0)
+    lang_code = LANGUAGE_OPTIONS[lang_choice_label]
+
+    # 선택된 언어의 카탈로그만 로드 (프로세스 공용 캐시)
+    texts = get_translation_catalog(lang_code)
+
+    # 로고 - 표시 크기로 줄인 정적 파일 (프로세스당 1회 생성, 브라우저 캐시)
+    logo_url, logo_bytes = get_image_asset("logo")
+    if logo_url and static_serving_enabled():
+        st.markdown(f'<img class="sidebar-logo" src="{logo_url}" alt="logo">', unsafe_allow_html=True)
+    elif logo_bytes:
+        st.image(logo_bytes, use_column_width=True)
 
 # ===== 병원 선택
 hospital_modules = {
@@ -494,111 +336,178 @@ selected_hospital = st.sidebar.selectbox("", list(hospital_modules.keys()))
 
 # 독일하겐병원 선택 시 기간 선택 추가
 selected_period = None
+multi_horizon = False  # 30/60/180일 한 번에 예측
 if selected_hospital == texts["독일하겐병원"]:
     period_options = {
         texts["180일 기준"]: "predictors.hagen_180d",
         texts["60일 기준"]: "predictors.hagen_60d",
-        texts["30일 기준"]: "predictors.hagen_30d"
+        texts["30일 기준"]: "predictors.hagen_30d",
+        texts.get("전체 기간 (30/60/180일)", "전체 기간 (30/60/180일)"): None,
     }
     st.sidebar.markdown("---")
     st.sidebar.subheader(f"📅 {texts['예측 기간 선택']}")
     selected_period = st.sidebar.selectbox("", list(period_options.keys()), key="period_select")
-    hospital_modules[selected_hospital] = period_options[selected_period]
+    multi_horizon = period_options[selected_period] is None
+    # 전체 기간 모드의 SHAP / 변수 중요도 / 저장은 기본 기간(180일) 기준
+    hospital_modules[selected_hospital] = period_options[selected_period] or HAGEN_HORIZONS[DEFAULT_HORIZON]
 
-# predictor 모듈 import 및 모델 설정
-try:
-    predictor = importlib.import_module(hospital_modules[selected_hospital]).get_predictor()
-    
-    # 해당 병원의 모델 설정
-    hospital_key = hospital_modules[selected_hospital].split('.')[-1]
-    if hospital_key in models:
-        # LightGBM 모델 주입 (모든 병원 공통)
-        if 'lgbm' in models[hospital_key]:
-            predictor.lgbm_model = models[hospital_key]['lgbm']
-        
-        # XGBoost 또는 MLP 모델 주입
-        if 'xgb' in models[hospital_key]:
-            predictor.xgb_model = models[hospital_key]['xgb']
-        elif 'mlp' in models[hospital_key]:
-            predictor.mlp_model = models[hospital_key]['mlp']
-        
-        # Scaler 주입
-        if 'scaler' in models[hospital_key]:
-            predictor.scaler = models[hospital_key]['scaler']
-except Exception as e:
-    st.error(f"Predictor 로드 실패: {str(e)}")
-    st.stop()
-
-# 입력값 수집
+# 입력값 수집 (st.form: 입력 중에는 rerun 없이 브라우저에만 보관, 제출 시 1회 처리)
 pta_values = {}
-pta_frequencies = ["250", "500", "1000", "2000", "3000", "4000", "8000"]
+pta_frequencies = PTA_FREQUENCIES
+numeric_inputs = {}  # 필드명 → (입력 문자열, 오류 표시 위치)
+
+def numeric_input(label, field, **kwargs):
+    """숫자 입력칸 + 바로 아래 오류 표시 위치 (파싱은 제출 시 1회)"""
+    raw = st.text_input(label, **kwargs)
+    numeric_inputs[field] = (raw, st.empty())
+    return raw
+
+def parse_numeric_inputs():
+    """제출된 숫자 입력 파싱 (빈 값은 None, 숫자가 아니면 해당 입력칸 아래에 오류 표시)"""
+    values, errors = {}, []
+    for field, (raw, slot) in numeric_inputs.items():
+        try:
+            values[field] = float(raw) if raw.strip() else None
+        except ValueError:
+            values[field] = None
+            errors.append(field)
+            slot.error(f"⚠️ {field}: '{raw}'")
+    return values, errors
+
+def prefill_from_record(record):
+    """이전 방문 기록(save_data)으로 입력 폼 위젯 값 채우기 (폼을 그리기 전에 호출)"""
+    state = {
+        "patient_id": record.get("id", ""),
+        "patient_name": record.get("name", ""),
+        "patient_hsptcd": record.get("hsptcd", ""),
+        "patient_sex": record.get("sex") or "Male",
+        "patient_side": record.get("side") or "Right",
+        "hl_duration": str(record.get("hl_duration", "") or ""),
+        "steroid": bool(record.get("steroid_treatment")),
+        "it_dexa": bool(record.get("it_dexa_treatment")),
+        "hbot": bool(record.get("hyperbaric_treatment")),
+        "hx_others": record.get("hx_others", "") or "",
+    }
+    if record.get("birth"):
+        state["patient_birth"] = datetime.date.fromisoformat(record["birth"])
+    for freq in pta_frequencies:
+        for ear in ("rt", "lt"):
+            state[f"{ear}_{freq}"] = str(record.get(f"pta_{ear}_ac_{freq}", "") or "")
+    for test in blood_tests:
+        state[f"blood_{test}"] = str(record.get(test.lower(), "") or "")
+    for flag in diagnosis + history:
+        state[f"flag_{flag}"] = bool(record.get(flag.lower()))
+    st.session_state.update(state)
+
+blood_tests = ["WBC", "RBC", "Hb", "PLT", "Neutrophil", "Lymphocyte",
+               "AST", "ALT", "BUN", "Cr", "Glucose", "Total_Protein",
+               "Na", "K", "Cl"]
+diagnosis = ["Dx_COM", "Dx_SSNHL", "Dx_Dizziness", "Dx_Tinnitus"]
+history = ["Hx_HTN", "Hx_DM", "Hx_CRF", "Hx_MI", "Hx_stroke", "Hx_cancer"]
+
+# 이전 방문 불러오기 (로컬 예측 기록에서 조회, 네트워크 없음)
+# 공개 앱이므로 다른 사용자의 환자 기록이 보이지 않도록 이 브라우저 세션에서 저장한 기록만 조회
+session_log_ids = st.session_state.setdefault("prediction_log_ids", [])
+with st.sidebar.expander(f"🗂️ {texts.get('이전 방문 불러오기', '이전 방문 불러오기')}"):
+    st.caption(texts.get("이 세션에서 예측한 기록만 불러올 수 있습니다.", "이 세션에서 예측한 기록만 불러올 수 있습니다."))
+    lookup_id = st.text_input("ID", key="prefill_lookup_id")
+    if st.button(texts.get("불러오기", "불러오기"), key="prefill_button") and lookup_id.strip():
+        previous = get_prediction_log().latest(lookup_id.strip(), prediction_ids=session_log_ids)
+        if previous:
+            prefill_from_record(previous["data"])
+            st.success(f"✅ {previous['timestamp']} ({previous['hospital']})")
+        else:
+            st.info(texts.get("이전 방문 기록이 없습니다.", "이전 방문 기록이 없습니다."))
 
-with st.sidebar:
+with st.sidebar.form("patient_form", border=False):
     with st.expander(f"🧍 {texts['기본 정보 입력']}"):
-        id_value = st.text_input("ID")
+        id_value = st.text_input("ID", key="patient_id")
         birth_date = st.date_input(
             texts["생년월일"],
             min_value=datetime.date(1900, 1, 1),
-            max_value=datetime.date.today()
+            max_value=datetime.date.today(),
+            key="patient_birth"
         )
-        gender = st.selectbox(texts["성별"], ["Male", "Female"])
-        name = st.text_input(texts["이름"])
-        hsptcd = st.text_input(texts["병원코드 (HSPTCD)"])
+        gender = st.selectbox(texts["성별"], ["Male", "Female"], key="patient_sex")
+        name = st.text_input(texts["이름"], key="patient_name")
+        hsptcd = st.text_input(texts["병원코드 (HSPTCD)"], key="patient_hsptcd")
 
     with st.expander(f"🧠 {texts['PTA 검사']}"):
         for freq in pta_frequencies:
-            rt = st.text_input(f"PTA_RT_AC_ {freq}", key=f"rt_{freq}")
-            lt = st.text_input(f"PTA_LT_AC_ {freq}", key=f"lt_{freq}")
-            pta_values[f"PTA_RT_AC_{freq}"] = float(rt) if rt.strip() else None
-            pta_values[f"PTA_LT_AC_{freq}"] = float(lt) if lt.strip() else None
+            numeric_input(f"PTA_RT_AC_ {freq}", f"PTA_RT_AC_{freq}", key=f"rt_{freq}")
+            numeric_input(f"PTA_LT_AC_ {freq}", f"PTA_LT_AC_{freq}", key=f"lt_{freq}")
 
     with st.expander(f"🧬 {texts['의료 정보']}"):
-        side = st.selectbox(texts["측면 (Side)"], ["Right", "Left"])
-        hl_duration = st.text_input(texts["HL_duration (일)"])
+        side = st.selectbox(texts["측면 (Side)"], ["Right", "Left"], key="patient_side")
+        hl_duration = numeric_input(texts["HL_duration (일)"], "HL_duration", key="hl_duration")
         clinic_date = st.date_input("Clinic_date")
-        steroid = st.checkbox(texts["스테로이드 치료"])
-        it_dexa = st.checkbox(texts["IT_dexa 치료"])
-        hbot = st.checkbox(texts["고압산소 치료"])
+        steroid = st.checkbox(texts["스테로이드 치료"], key="steroid")
+        it_dexa = st.checkbox(texts["IT_dexa 치료"], key="it_dexa")
+        hbot = st.checkbox(texts["고압산소 치료"], key="hbot")
 
     with st.expander(f"🧪 {texts['혈액 검사']}"):
-        blood_tests = ["WBC", "RBC", "Hb", "PLT", "Neutrophil", "Lymphocyte",
-                       "AST", "ALT", "BUN", "Cr", "Glucose", "Total_Protein",
-                       "Na", "K", "Cl"]
-        blood_values = {}
         for test in blood_tests:
-            val = st.text_input(test)
-            blood_values[test] = float(val) if val.strip() != "" else None
+            numeric_input(test, test, key=f"blood_{test}")
 
     with st.expander(f"📄 {texts['진단 및 병력']}"):
-        diagnosis = ["Dx_COM", "Dx_SSNHL", "Dx_Dizziness", "Dx_Tinnitus"]
-        diagnosis_values = {dx: int(st.checkbox(f"{dx} {texts['여부']}" )) for dx in diagnosis}
+        diagnosis_values = {dx: int(st.checkbox(f"{dx} {texts['여부']}", key=f"flag_{dx}")) for dx in diagnosis}
+        history_values = {hx: int(st.checkbox(f"{hx} {texts['여부']}", key=f"flag_{hx}")) for hx in history}
 
-        history = ["Hx_HTN", "Hx_DM", "Hx_CRF", "Hx_MI", "Hx_stroke", "Hx_cancer"]
-        history_values = {hx: int(st.checkbox(f"{hx} {texts['여부']}")) for hx in history}
-
-        hx_others_text = st.text_input(f"{texts['기타 병력']} (Hx_others)")
+        hx_others_text = st.text_input(f"{texts['기타 병력']} (Hx_others)", key="hx_others")
         hx_others = 1 if hx_others_text.strip() != "" else 0
 
-    st.sidebar.markdown("---")
-    
-    consent_texts = {
-        "ko": "개인정보 수집 및 이용 동의",
-        "en-us": "Consent to Data Collection and Use",
-        "ja": "個人情報の収集および利用への同意",
-        "zh": "个人信息收集和使用同意",
-        "es": "Consentimiento de recopilación y uso de datos",
-        "de": "Einwilligung zur Datenerhebung und -nutzung",
-        "hi": "डेटा संग्रह और उपयोग की सहमति",
-        "ar": "الموافقة على جمع واستخدام البيانات"
-    }
+    st.markdown("---")
     
+    # 폼 안의 체크박스는 제출 전까지 rerun이 없으므로 동의 여부는 제출 시 확인
     data_consent = st.checkbox(
-        consent_texts.get(lang_code, consent_texts["ko"]),
+        texts["개인정보 수집 및 이용 동의"],
         value=False,
         key="data_consent"
     )
 
-    predict_button = st.button(f"\U0001F50D {texts['예측 결과 보기']}", disabled=not data_consent)
+    predict_button = st.form_submit_button(f"\U0001F50D {texts['예측 결과 보기']}")
+
+# 제출 시에만 숫자 입력 파싱
+numeric_values, input_errors = parse_numeric_inputs() if predict_button else ({}, [])
+pta_values = {f"PTA_{ear}_AC_{freq}": numeric_values.get(f"PTA_{ear}_AC_{freq}")
+              for freq in pta_frequencies for ear in ("RT", "LT")}
+# 청력도 배열 (측정 범위 검사 / 파생 지표는 코호트 경로와 같은 audiogram 모듈 사용)
+audiogram = audiogram_from_values(pta_values)
+for column in range_errors(audiogram)[0]:
+    numeric_inputs[column][1].error(f"⚠️ {column}: {DB_MIN:.0f}–{DB_MAX:.0f} dB")
+    input_errors.append(column)
+blood_values = {test: numeric_values.get(test) for test in blood_tests}
+hl_duration_value = numeric_values.get("HL_duration")
+if input_errors:
+    st.sidebar.error(f"⚠️ {texts.get('숫자 입력 오류', '숫자 형식이 아닌 입력')}: " + ", ".join(input_errors))
+    predict_button = False
+
+# ======================
+# 🔹 predictor / 모델 로드 (사이드바 렌더링 이후)
+# ======================
+with st.spinner("Google Drive에서 파일을 로드하는 중..."):
+    # ✅ predictors import (메모리 finder, 모듈은 프로세스당 1회만 실행)
+    load_predictor_modules()
+
+    try:
+        predictors_all = importlib.import_module("predictors.all")
+    except ModuleNotFoundError as e:
+        st.warning(f"⚠️ Predictor 모듈 로드 실패: {e}")
+        predictors_all = None
+
+    # ✅ 모델 로드 (추론 서버 사용 시 모델은 서버 워커에만 로드)
+    if not remote_inference_address():
+        load_models_from_drive()
+
+# predictor 모듈 import 및 모델 설정 (공유 번들은 읽기 전용, predictor는 이 실행 전용)
+try:
+    inference = create_inference_context(hospital_modules[selected_hospital])
+    predictor = inference.predictor
+    model_bundle = inference.bundle
+    hospital_key = model_bundle.hospital_key
+except Exception as e:
+    st.error(f"Predictor 로드 실패: {str(e)}")
+    st.stop()
 
 # 매핑
 side_mapping = {"Right": 1, "Left": 2}
@@ -643,17 +552,7 @@ def create_combined_image(result_df, shap_fig, title="모델 결과 요약", sum
 # 예측 버튼
 if predict_button:
     if not data_consent:
-        warning_texts = {
-            "ko": "⚠️ 개인정보 수집 및 이용에 동의해주세요.",
-            "en-us": "⚠️ Please consent to data collection and use.",
-            "ja": "⚠️ 個人情報の収集および利用に同意してください。",
-            "zh": "⚠️ 请同意个人信息收集和使用。",
-            "es": "⚠️ Por favor, consienta la recopilación y uso de datos.",
-            "de": "⚠️ Bitte stimmen Sie der Datenerhebung und -nutzung zu.",
-            "hi": "⚠️ कृपया डेटा संग्रह और उपयोग के लिए सहमति दें।",
-            "ar": "⚠️ يرجى الموافقة على جمع واستخدام البيانات."
-        }
-        st.warning(warning_texts.get(lang_code, warning_texts["ko"]))
+        st.warning(texts["개인정보 동의 요청"])
         st.stop()
         
     with st.spinner(f"⏳ {texts['예측 진행 중...']}"):
@@ -663,7 +562,7 @@ if predict_button:
             "test_date": clinic_date.strftime("%Y-%m-%d"),
             "Sex": sex_mapping.get(gender, 1),
             "Side": side_mapping.get(side, 1),
-            "HL_duration": float(hl_duration) if hl_duration.strip() else None,
+            "HL_duration": hl_duration_value,
             "Steroid": int(steroid),
             "IT_dexa": int(it_dexa),
             "HBOT": int(hbot),
@@ -674,146 +573,214 @@ if predict_button:
             "Hx_others": hx_others
         }])
 
-        lgbm_result, lgbm_prob, xgb_result, xgb_prob, df_lgbm, df_xgb, df_ids, lgbm_model, xgb_model, lgbm_acc, xgb_acc = predictor.predict_outcome(df_input)
-
-        if all(v is not None for v in [lgbm_result, lgbm_prob, xgb_result, xgb_prob]):            
-
-            # 정확도 가져오기 - Google Drive에서 txt 파일 로드
-            def get_accuracy_from_drive(hospital_key, model_type):
-                """Google Drive에서 정확도 txt 파일 로드"""
-                try:
-                    file_name = f"txt/{hospital_key}_{model_type}_accuracy.txt"
-                    file_content = download_file_from_drive(file_name)
-                    if file_content:
-                        content = file_content.read().decode('utf-8')
-                        # 정확도 값 추출 (예: "0.8523" 형태의 숫자)
-                        import re
-                        numbers = re.findall(r"\d+\.\d+", content)
-                        if numbers:
-                            return float(numbers[0])
-                    return 0.75  # 기본값
-                except Exception as e:
-                    return 0.75  # 기본값
-
-            # 병원 키 가져오기
-            hospital_key = hospital_modules[selected_hospital].split('.')[-1]
-            
-            # 정확도 값 가져오기 (캐시 처리)
-            if not hasattr(predictor, 'lgbm_acc') or predictor.lgbm_acc is None:
-                predictor.lgbm_acc = get_accuracy_from_drive(hospital_key, 'lgbm')
-            
-            # XGBoost 또는 MLP 정확도 로드
-            if hasattr(predictor, 'xgb_model') and predictor.xgb_model is not None:
-                if not hasattr(predictor, 'xgb_acc') or predictor.xgb_acc is None:
-                    predictor.xgb_acc = get_accuracy_from_drive(hospital_key, 'xgb')
-            elif hasattr(predictor, 'mlp_model') and predictor.mlp_model is not None:
-                if not hasattr(predictor, 'mlp_acc') or predictor.mlp_acc is None:
-                    predictor.mlp_acc = get_accuracy_from_drive(hospital_key, 'mlp')
-
-            # LightGBM 결과
-            result_df_lgbm = pd.DataFrame({
-                "ID": df_ids["ID"].values,
-                "LightGBM 회복 판단": ["회복" if p >= 0.5 else "비회복" for p in lgbm_prob],
-                "LightGBM 회복 확률": [f"{(p * 100):.1f}%" for p in lgbm_prob],
-                "예측 정확도": [f"{predictor.lgbm_acc * 100:.1f}%" for _ in lgbm_result]
-            })
-
-            # 두 번째 모델 이름 결정 (XGBoost 또는 MLP)
-            if hasattr(predictor, 'xgb_model') and predictor.xgb_model is not None:
-                second_model_name = "XGBoost"
-                second_model_acc = predictor.xgb_acc
-            elif hasattr(predictor, 'mlp_model') and predictor.mlp_model is not None:
-                second_model_name = "MLP"
-                second_model_acc = predictor.mlp_acc
-            else:
-                second_model_name = "XGBoost"
-                second_model_acc = predictor.xgb_acc if hasattr(predictor, 'xgb_acc') else 0.75
-
-            # XGBoost/MLP 결과
-            result_df_xgb = pd.DataFrame({
-                "ID": df_ids["ID"].values,
-                f"{second_model_name} 회복 판단": ["회복" if p >= 0.5 else "비회복" for p in xgb_prob],
-                f"{second_model_name} 회복 확률": [f"{(p * 100):.1f}%" for p in xgb_prob],
-                "예측 정확도": [f"{second_model_acc * 100:.1f}%" for _ in xgb_result]
-            })
-
-            st.markdown(f"### 📋 {texts['summary_title']}")
+        if multi_horizon:
+            # 입력은 1회만 만들고 세 기간을 병렬 예측 (추론 서버 사용 시 요청 1건)
+            horizon_predictions = predict_horizons(df_input, HAGEN_HORIZONS, explain_days=DEFAULT_HORIZON)
+            default_prediction = horizon_predictions[DEFAULT_HORIZON]
+            if default_prediction.inference is not None:
+                inference = default_prediction.inference
+                model_bundle = inference.bundle
+            outputs = default_prediction.outputs
+        else:
+            horizon_predictions = None
+            outputs = inference.predict(df_input)
+
+        # 입력 분포 누적 (드리프트 감지, 병원별 고정 크기 히스토그램)
+        for monitored_key in ([HAGEN_HORIZONS[d].split(".")[-1] for d in horizon_predictions]
+                              if horizon_predictions else [hospital_key]):
+            get_drift_collector().observe(monitored_key, df_input)
+    lgbm_result, lgbm_prob, xgb_result, xgb_prob, df_lgbm, df_xgb, df_ids, lgbm_model, xgb_model, lgbm_acc, xgb_acc = outputs
+
+    if all(v is not None for v in [lgbm_result, lgbm_prob, xgb_result, xgb_prob]):            
+
+        # 정확도는 병원별 모델 번들에서 (공유 predictor를 수정하지 않음)
+        lgbm_acc = model_bundle.lgbm_acc
+        second_model_name = model_bundle.second_model_name
+        second_model_acc = model_bundle.second_acc
+
+        # LightGBM 결과
+        result_df_lgbm = pd.DataFrame({
+            "ID": df_ids["ID"].values,
+            "LightGBM 회복 판단": ["회복" if p >= 0.5 else "비회복" for p in lgbm_prob],
+            "LightGBM 회복 확률": [f"{(p * 100):.1f}%" for p in lgbm_prob],
+            "예측 정확도": [f"{lgbm_acc * 100:.1f}%" for _ in lgbm_result]
+        })
+
+        # XGBoost/MLP 결과
+        result_df_xgb = pd.DataFrame({
+            "ID": df_ids["ID"].values,
+            f"{second_model_name} 회복 판단": ["회복" if p >= 0.5 else "비회복" for p in xgb_prob],
+            f"{second_model_name} 회복 확률": [f"{(p * 100):.1f}%" for p in xgb_prob],
+            "예측 정확도": [f"{second_model_acc * 100:.1f}%" for _ in xgb_result]
+        })
+
+        st.markdown(f"### 📋 {texts['summary_title']}")
+    
+        # LightGBM 회복 확률 (첫 번째 샘플 기준)
+        lgbm_prob_val = lgbm_prob[0] * 100
+        xgb_prob_val = xgb_prob[0] * 100
+
+        # 통합 예측 요약 테이블 (표 스타일로)
+        
+        st.markdown(f"""
+        <table class="result-table">
+            <tr>
+                <th>{texts["모델"]}</th>
+                <th>{texts["회복 판단"]}</th>
+                <th>{texts["회복 확률"]}</th>
+                <th>{texts["예측 정확도"]}</th>
+            </tr>
+            <tr>
+                <td><b>LightGBM</b></td>
+                <td style="color: {'green' if lgbm_prob[0] >= 0.5 else 'red'}; font-weight: bold;">
+                    {texts['회복'] if lgbm_prob[0] >= 0.5 else texts['비회복']}
+                </td>
+                <td><b>{lgbm_prob[0]*100:.1f}%</b></td>
+                <td>{lgbm_acc*100:.1f}%</td>
+            </tr>
+            <tr>
+                <td><b>{second_model_name}</b></td>
+                <td style="color: {'green' if xgb_prob[0] >= 0.5 else 'red'}; font-weight: bold;">
+                    {texts['회복'] if xgb_prob[0] >= 0.5 else texts['비회복']}
+                </td>
+                <td><b>{xgb_prob[0]*100:.1f}%</b></td>
+                <td>{second_model_acc*100:.1f}%</td>
+            </tr>
+        </table>
+
+        <div class="result-comment">
+            <b>{name}</b>&nbsp;{texts["님의 예측 결과는 다음과 같습니다."]}<br><br>
+            🔵 <b>LightGBM</b> {texts["기준"]} : {texts["회복 확률"]} <b>{lgbm_prob[0]*100:.1f}%</b>, 
+             {texts["예측 정확도"]} <b>{lgbm_acc*100:.1f}%<br></b>
+            🟢 <b>{second_model_name}</b> {texts["기준"]} : {texts["회복 확률"]} <b>{xgb_prob[0]*100:.1f}%</b>, 
+             {texts["예측 정확도"]} <b>{second_model_acc*100:.1f}%<br></b>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # 📈 하겐병원 전체 기간: 30/60/180일 회복 확률 추이
+        if horizon_predictions:
+            valid_horizons = {d: p for d, p in horizon_predictions.items() if p.ok}
+            st.markdown(f"### 📈 {texts.get('기간별 회복 확률 추이', '기간별 회복 확률 추이')}")
+            if valid_horizons:
+                fig_trajectory = plot_trajectory(
+                    valid_horizons,
+                    xlabel=texts.get("예측 기간 (일)", "예측 기간 (일)"),
+                    ylabel=f"{texts['회복 확률']} (%)"
+                )
+                st.pyplot(fig_trajectory)
+                df_trajectory = trajectory_frame(valid_horizons)
+                st.dataframe(pd.DataFrame({
+                    texts.get("예측 기간 (일)", "예측 기간 (일)"): df_trajectory["days"],
+                    f"LightGBM {texts['회복 확률']}": [f"{p * 100:.1f}%" for p in df_trajectory["lgbm_prob"]],
+                    texts["모델"]: df_trajectory["second_model"],
+                    texts["회복 확률"]: [f"{p * 100:.1f}%" for p in df_trajectory["second_prob"]],
+                }), hide_index=True)
+            missing = [str(d) for d, p in horizon_predictions.items() if not p.ok]
+            if missing:
+                st.warning(f"⚠️ {', '.join(missing)}{texts.get('일 기준 예측 실패', '일 기준 예측 실패')}")
+
+        # 🦻 청력도 파생 지표 (코호트 경로와 같은 audiogram 모듈)
+        with st.expander(f"🦻 {texts.get('청력도 지표', '청력도 지표')}"):
+            audiogram_metrics = audiogram_features(audiogram, side_mapping.get(side, 1))
+            st.dataframe(pd.DataFrame(audiogram_metrics, index=[id_value]).round(1).T)
+
+        # 섹션 공용 설정 (정상범위 / 변수별 x축 범위 / 두 번째 모델 키)
+        normal_ranges = NORMAL_RANGES
         
-            # LightGBM 회복 확률 (첫 번째 샘플 기준)
-            lgbm_prob_val = lgbm_prob[0] * 100
-            xgb_prob_val = xgb_prob[0] * 100
-
-            # 통합 예측 요약 테이블 (표 스타일로)
-            
-            st.markdown(f"""
-            <style>
-            .result-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 1rem;
-            }}
-            .result-table th, .result-table td {{
-                border: 1px solid #ccc;
-                padding: 0.6rem 1rem;
-                text-align: center;
-                font-size: 1.05rem;
-            }}
-            .result-comment {{
-                font-size: 1.1rem;
-                line-height: 1.6;
-                background-color: #e7f5ff;
-                border-radius: 10px;
-                padding: 1.2rem;
-                border-left: 5px solid #0077B6;
-                margin-bottom: 2rem;
-            }}
-            </style>
-
-            <table class="result-table">
-                <tr>
-                    <th>{texts["모델"]}</th>
-                    <th>{texts["회복 판단"]}</th>
-                    <th>{texts["회복 확률"]}</th>
-                    <th>{texts["예측 정확도"]}</th>
-                </tr>
-                <tr>
-                    <td><b>LightGBM</b></td>
-                    <td style="color: {'green' if lgbm_prob[0] >= 0.5 else 'red'}; font-weight: bold;">
-                        {texts['회복'] if lgbm_prob[0] >= 0.5 else texts['비회복']}
-                    </td>
-                    <td><b>{lgbm_prob[0]*100:.1f}%</b></td>
-                    <td>{predictor.lgbm_acc*100:.1f}%</td>
-                </tr>
-                <tr>
-                    <td><b>{second_model_name}</b></td>
-                    <td style="color: {'green' if xgb_prob[0] >= 0.5 else 'red'}; font-weight: bold;">
-                        {texts['회복'] if xgb_prob[0] >= 0.5 else texts['비회복']}
-                    </td>
-                    <td><b>{xgb_prob[0]*100:.1f}%</b></td>
-                    <td>{second_model_acc*100:.1f}%</td>
-                </tr>
-            </table>
-
-            <div class="result-comment">
-                <b>{name}</b>&nbsp;{texts["님의 예측 결과는 다음과 같습니다."]}<br><br>
-                🔵 <b>LightGBM</b> {texts["기준"]} : {texts["회복 확률"]} <b>{lgbm_prob[0]*100:.1f}%</b>, 
-                 {texts["예측 정확도"]} <b>{predictor.lgbm_acc*100:.1f}%<br></b>
-                🟢 <b>{second_model_name}</b> {texts["기준"]} : {texts["회복 확률"]} <b>{xgb_prob[0]*100:.1f}%</b>, 
-                 {texts["예측 정확도"]} <b>{second_model_acc*100:.1f}%<br></b>
-            </div>
-            """, unsafe_allow_html=True)
-      
-            # 🎯 SHAP explainer 및 계산
-            explainer_lgbm = shap.TreeExplainer(predictor.lgbm_model)
-            shap_values_lgbm_raw = explainer_lgbm.shap_values(df_lgbm)  # 원본 저장
-
-            explainer_xgb = shap.TreeExplainer(predictor.xgb_model)
-            shap_values_xgb_raw = explainer_xgb.shap_values(df_xgb)
+        def plot_shap_dot_with_ranges(features, shap_values, feature_values, normal_ranges, title="SHAP Dot Plot"):
+            import matplotlib.pyplot as plt
+            import numpy as np
+
+            sorted_idx = np.argsort(shap_values)[::-1]
+            features_sorted = [features[i] for i in sorted_idx if features[i]]
+            shap_sorted = shap_values[sorted_idx]
+
+            fig, ax = plt.subplots(figsize=(6, 6))
+            y = np.arange(len(features_sorted))
+
+            normal_range_plotted = False
+            patient_point_plotted = False
+
+            # 정상범위 박스: 정확한 y 위치로 박스 그리기
+            for i, feat in enumerate(features_sorted):
+                if feat in normal_ranges:
+                    low, high = normal_ranges[feat]
+                    width = high - low
+                    label = texts["정상범위"] if not normal_range_plotted else ""
+                    ax.barh(i, width, left=low, height=0.6, color='green', alpha=0.2, label=label)
+                    normal_range_plotted = True
+
+                if feat in feature_values:
+                    label = texts["환자수치"] if not patient_point_plotted else ""
+                    ax.scatter(feature_values[feat], i, color='red', marker='.', label=label)
+                    patient_point_plotted = True
+
+            ax.set_yticks(y)
+            ax.set_yticklabels(features_sorted)
+            ax.set_xlabel(texts["수치"])
+            ax.set_title(title)
+            ax.invert_yaxis()
+            ax.legend(loc="lower right")
+            plt.tight_layout()
+            return fig
+                    
+        def plot_single_variable_graph(
+            feature,
+            value,
+            normal_ranges,
+            xlim_range=(0, 400),
+            title_fontsize=9,
+            tick_fontsize=8,
+            population=None
+        ):
+            import matplotlib.pyplot as plt
+
+            # population: 사전 계산된 모집단 반응 곡선 (격자, PD, ICE 하한, ICE 상한)
+            fig, ax = plt.subplots(figsize=(4.5, 1.0 if population is None else 1.6))  # 적당히 작게
+            ax.set_xlim(*xlim_range)
+            ax.set_yticks([])
+            ax.set_title(feature, fontsize=title_fontsize, pad=2)
+            ax.set_xlabel(texts["수치"], fontsize=tick_fontsize)
+
+            if feature in normal_ranges:
+                low, high = normal_ranges[feature]
+                width = high - low
+                ax.barh(0, width, left=low, height=0.3, color='green', alpha=0.2, label="정상범위")
+
+            if value is not None:
+                ax.scatter(value, 0, color='red', s=25, label="환자 수치")
+
+            if population is not None:
+                grid, pd_curve, ice_low, ice_high = population
+                ax_pd = ax.twinx()
+                if ice_low is not None:
+                    ax_pd.fill_between(grid, ice_low * 100, ice_high * 100, color='#1E88E5', alpha=0.12, linewidth=0)
+                ax_pd.plot(grid, pd_curve * 100, color='#1E88E5', linewidth=1.2)
+                ax_pd.set_ylim(0, 100)
+                ax_pd.set_ylabel("%", fontsize=tick_fontsize)
+                ax_pd.tick_params(axis='y', labelsize=tick_fontsize - 1)
+                ax_pd.set_frame_on(False)
+
+            ax.set_frame_on(False)
+            ax.tick_params(axis='x', labelsize=tick_fontsize)
+            plt.tight_layout()
+            return fig
+
+        # 변수별 x축 범위 설정 (없으면 기본값 사용)
+        custom_xlims = LAB_XLIMS
+        second_key = model_bundle.second_model_type
+
+        @st.fragment
+        def render_importance_section():
+            """SHAP 계산 + 전체 / 조정 가능 변수 중요도 (전체 실행 시 리포트용 그림과 정렬된 변수 반환)"""
+            # 🎯 SHAP 계산 (explainer는 프로세스 단위 캐시 사용)
+            with st.spinner(f"⏳ {texts.get('변수 중요도 계산 중...', '변수 중요도 계산 중...')}"):
+                shap_values_lgbm_raw, shap_values_xgb_raw = inference.shap_values(df_lgbm, df_xgb)  # 원본 저장
 
             # ⚠️ multiclass 대응 (보통 binary이면 list로 반환됨)
             shap_values_lgbm = shap_values_lgbm_raw[1] if isinstance(shap_values_lgbm_raw, list) else shap_values_lgbm_raw
             shap_values_xgb = shap_values_xgb_raw[1] if isinstance(shap_values_xgb_raw, list) else shap_values_xgb_raw
-            
+        
             target_features = [
                 "WBC", "RBC", "Hb", "PLT", "Neutrophil", "Lymphocyte",
                 "AST", "ALT", "BUN", "Cr", "Glucose", "Total_Protein",
@@ -830,95 +797,33 @@ if predict_button:
 
             st.markdown(f"### {texts['변수 중요도']}")
 
-            # 전체 변수 중요도 보기
+            # 전체 변수 중요도 보기 (사전 계산된 전역 중요도가 있으면 우선 사용)
+            global_importance = load_global_importance_from_drive(hospital_key)
+            global_models = global_importance["models"] if global_importance else {}
+
             with st.expander(f"📊 {texts['전체 변수 중요도 보기']}"):
                 col1, col2 = st.columns(2)
                 with col1:
-                    fig_lgbm = plt.figure()
                     st.subheader(f"🔍 LightGBM {texts['변수 중요도']}")
-                    shap.summary_plot(shap_values_lgbm, df_lgbm, plot_type='bar', show=False)
-                    plt.gcf().subplots_adjust(top=0.88)
-                    st.pyplot(plt.gcf())
+                    if "lgbm" in global_models:
+                        fig_lgbm = plot_global_importance(global_models["lgbm"])
+                    else:
+                        fig_lgbm = plt.figure()
+                        shap.summary_plot(shap_values_lgbm, df_lgbm, plot_type='bar', show=False)
+                        plt.gcf().subplots_adjust(top=0.88)
+                        fig_lgbm = plt.gcf()
+                    st.pyplot(fig_lgbm)
 
                 with col2:
                     st.subheader(f"🔍 XGBoost {texts['변수 중요도']}")
-                    fig_xgb = plt.figure()
-                    shap.summary_plot(shap_values_xgb, df_xgb, plot_type="bar", show=False)
-                    plt.gcf().subplots_adjust(top=0.88)
-                    st.pyplot(plt.gcf())
-
-            normal_ranges = {
-                "WBC": (4.0, 10.0), "RBC": (3.8, 5.2), "Hb": (12.0, 16.0), "PLT": (165, 360),
-                "Neutrophil": (35, 75), "Lymphocyte": (25, 40), "AST": (0, 35), "ALT": (0, 40),
-                "BUN": (5, 19), "Cr": (0.20, 1.10), "Glucose": (70, 110), "Total_Protein": (6.4, 8.3),
-                "Na": (136, 145), "K": (3.5, 5.1), "Cl": (98, 107)
-            }
-            
-            def plot_shap_dot_with_ranges(features, shap_values, feature_values, normal_ranges, title="SHAP Dot Plot"):
-                import matplotlib.pyplot as plt
-                import numpy as np
-
-                sorted_idx = np.argsort(shap_values)[::-1]
-                features_sorted = [features[i] for i in sorted_idx if features[i]]
-                shap_sorted = shap_values[sorted_idx]
-
-                fig, ax = plt.subplots(figsize=(6, 6))
-                y = np.arange(len(features_sorted))
-
-                normal_range_plotted = False
-                patient_point_plotted = False
-
-                # 정상범위 박스: 정확한 y 위치로 박스 그리기
-                for i, feat in enumerate(features_sorted):
-                    if feat in normal_ranges:
-                        low, high = normal_ranges[feat]
-                        width = high - low
-                        label = texts["정상범위"] if not normal_range_plotted else ""
-                        ax.barh(i, width, left=low, height=0.6, color='green', alpha=0.2, label=label)
-                        normal_range_plotted = True
-
-                    if feat in feature_values:
-                        label = texts["환자수치"] if not patient_point_plotted else ""
-                        ax.scatter(feature_values[feat], i, color='red', marker='.', label=label)
-                        patient_point_plotted = True
-
-                ax.set_yticks(y)
-                ax.set_yticklabels(features_sorted)
-                ax.set_xlabel(texts["수치"])
-                ax.set_title(title)
-                ax.invert_yaxis()
-                ax.legend(loc="lower right")
-                plt.tight_layout()
-                return fig
-                        
-            def plot_single_variable_graph(
-                feature,
-                value,
-                normal_ranges,
-                xlim_range=(0, 400),
-                title_fontsize=9,
-                tick_fontsize=8
-            ):
-                import matplotlib.pyplot as plt
-
-                fig, ax = plt.subplots(figsize=(4.5, 1.0))  # 적당히 작게
-                ax.set_xlim(*xlim_range)
-                ax.set_yticks([])
-                ax.set_title(feature, fontsize=title_fontsize, pad=2)
-                ax.set_xlabel(texts["수치"], fontsize=tick_fontsize)
-
-                if feature in normal_ranges:
-                    low, high = normal_ranges[feature]
-                    width = high - low
-                    ax.barh(0, width, left=low, height=0.3, color='green', alpha=0.2, label="정상범위")
-
-                if value is not None:
-                    ax.scatter(value, 0, color='red', s=25, label="환자 수치")
-
-                ax.set_frame_on(False)
-                ax.tick_params(axis='x', labelsize=tick_fontsize)
-                plt.tight_layout()
-                return fig
+                    if second_key in global_models:
+                        fig_xgb = plot_global_importance(global_models[second_key])
+                    else:
+                        fig_xgb = plt.figure()
+                        shap.summary_plot(shap_values_xgb, df_xgb, plot_type="bar", show=False)
+                        plt.gcf().subplots_adjust(top=0.88)
+                        fig_xgb = plt.gcf()
+                    st.pyplot(fig_xgb)
 
             # 조정 가능한 변수 중요도 보기
             with st.expander(f"🛠️ {texts['조정가능한 변수 중요도 보기']}"):
@@ -944,14 +849,6 @@ if predict_button:
                     plt.gcf().subplots_adjust(top=0.90)
                     st.pyplot(plt.gcf())
 
-            # 변수별 x축 범위 설정 (없으면 기본값 사용)
-            custom_xlims = {
-                "WBC": (0, 20), "RBC": (0, 8), "Hb": (0, 20), "PLT": (0, 500),
-                "Neutrophil": (0, 100), "Lymphocyte": (0, 100), "AST": (0, 100), "ALT": (0, 100),
-                "BUN": (0, 50), "Cr": (0, 3), "Glucose": (0, 200), "Total_Protein": (0, 10),
-                "Na": (120, 160), "K": (2, 7), "Cl": (80, 120)
-            }
-
             # --- 조정 가능한 변수 중요도 순 정렬 (LightGBM 기준) ---
             shap_mean_lgbm = np.abs(shap_values_lgbm[:, feature_indices_lgbm]).mean(axis=0)
             feature_importance_lgbm = list(zip(filtered_features_lgbm, shap_mean_lgbm))
@@ -968,9 +865,23 @@ if predict_button:
                 if feat in blood_values and feat in normal_ranges
             ]
 
+            return fig_lgbm, fig_xgb, sorted_features_lgbm, sorted_features_xgb
+
+        @st.fragment
+        def render_lab_section(sorted_features_lgbm, sorted_features_xgb):
+            """변수 중요도 순 환자 혈액검사 수치 + 정상범위 / 모집단 반응 곡선"""
+            # 모집단 반응 곡선 (오프라인 계산된 PD / ICE, 없으면 표시하지 않음)
+            partial_dependence = load_partial_dependence_from_drive(hospital_key)
+
+            def population_curve(model_type, feature):
+                return partial_dependence.curve(model_type, feature) if partial_dependence else None
+
             # ----------------- Streamlit 출력 -------------------
             with st.expander(f"📊 {texts['변수중요도 기반 환자 수치 확인']}"):
 
+                if partial_dependence is not None:
+                    st.caption(f"📈 {texts.get('파란 선: 모집단 평균 회복 확률 (음영: 환자 10~90%)', '파란 선: 모집단 평균 회복 확률 (음영: 환자 10~90%)')}")
+
                 # 좌/우 박스 생성
                 col_lgbm, col_xgb = st.columns(2)
 
@@ -990,7 +901,8 @@ if predict_button:
                             normal_ranges=normal_ranges,
                             xlim_range=custom_xlims.get(feature, (0, 400)),
                             title_fontsize=8,
-                            tick_fontsize=6
+                            tick_fontsize=6,
+                            population=population_curve("lgbm", feature)
                         )
                         lgbm_container.pyplot(fig)
 
@@ -1010,7 +922,8 @@ if predict_button:
                             normal_ranges=normal_ranges,
                             xlim_range=custom_xlims.get(feature, (0, 400)),
                             title_fontsize=8,
-                            tick_fontsize=6
+                            tick_fontsize=6,
+                            population=population_curve(second_key, feature)
                         )
                         xgb_container.pyplot(fig)
 
@@ -1031,180 +944,142 @@ if predict_button:
                             unsafe_allow_html=True
                         )
 
-
-            # ✅ Google Sheets에 데이터 저장
-            # 한국 시간(KST) 설정 (UTC+9)
-            kst_time = datetime.datetime.now() + datetime.timedelta(hours=9)
-            timestamp = kst_time.strftime("%Y-%m-%d %H:%M:%S")
-            
-            # 저장할 데이터 준비
-            save_data = {
-                'timestamp': timestamp,
-                'language': lang_choice_label,
-                'hospital': selected_hospital,
-                'id': id_value,
-                'birth': birth_date.strftime("%Y-%m-%d"),
-                'sex': gender,
-                'name': name,
-                'hsptcd': hsptcd,
-                'side': side,
-                'hl_duration': hl_duration.strip() if hl_duration else '',
-                'clinic_date': str(clinic_date),
-                'steroid_treatment': int(steroid),
-                'it_dexa_treatment': int(it_dexa),
-                'hyperbaric_treatment': int(hbot),
-                'pta_rt_ac_250': pta_values.get('PTA_RT_AC_250', ''),
-                'pta_rt_ac_500': pta_values.get('PTA_RT_AC_500', ''),
-                'pta_rt_ac_1000': pta_values.get('PTA_RT_AC_1000', ''),
-                'pta_rt_ac_2000': pta_values.get('PTA_RT_AC_2000', ''),
-                'pta_rt_ac_3000': pta_values.get('PTA_RT_AC_3000', ''),
-                'pta_rt_ac_4000': pta_values.get('PTA_RT_AC_4000', ''),
-                'pta_rt_ac_8000': pta_values.get('PTA_RT_AC_8000', ''),
-                'pta_lt_ac_250': pta_values.get('PTA_LT_AC_250', ''),
-                'pta_lt_ac_500': pta_values.get('PTA_LT_AC_500', ''),
-                'pta_lt_ac_1000': pta_values.get('PTA_LT_AC_1000', ''),
-                'pta_lt_ac_2000': pta_values.get('PTA_LT_AC_2000', ''),
-                'pta_lt_ac_3000': pta_values.get('PTA_LT_AC_3000', ''),
-                'pta_lt_ac_4000': pta_values.get('PTA_LT_AC_4000', ''),
-                'pta_lt_ac_8000': pta_values.get('PTA_LT_AC_8000', ''),
-                'wbc': blood_values.get('WBC', ''),
-                'rbc': blood_values.get('RBC', ''),
-                'hb': blood_values.get('Hb', ''),
-                'plt': blood_values.get('PLT', ''),
-                'neutrophil': blood_values.get('Neutrophil', ''),
-                'lymphocyte': blood_values.get('Lymphocyte', ''),
-                'ast': blood_values.get('AST', ''),
-                'alt': blood_values.get('ALT', ''),
-                'bun': blood_values.get('BUN', ''),
-                'cr': blood_values.get('Cr', ''),
-                'glucose': blood_values.get('Glucose', ''),
-                'total_protein': blood_values.get('Total_Protein', ''),
-                'na': blood_values.get('Na', ''),
-                'k': blood_values.get('K', ''),
-                'cl': blood_values.get('Cl', ''),
-                'dx_com': diagnosis_values.get('Dx_COM', 0),
-                'dx_ssnhl': diagnosis_values.get('Dx_SSNHL', 0),
-                'dx_dizziness': diagnosis_values.get('Dx_Dizziness', 0),
-                'dx_tinnitus': diagnosis_values.get('Dx_Tinnitus', 0),
-                'hx_htn': history_values.get('Hx_HTN', 0),
-                'hx_dm': history_values.get('Hx_DM', 0),
-                'hx_crf': history_values.get('Hx_CRF', 0),
-                'hx_mi': history_values.get('Hx_MI', 0),
-                'hx_stroke': history_values.get('Hx_stroke', 0),
-                'hx_cancer': history_values.get('Hx_cancer', 0),
-                'hx_others': hx_others_text,
-                'prediction': f"LightGBM: {lgbm_prob[0]*100:.1f}%, {second_model_name}: {xgb_prob[0]*100:.1f}%",
-                'probability': f"LightGBM: {'회복' if lgbm_prob[0] >= 0.5 else '비회복'}, {second_model_name}: {'회복' if xgb_prob[0] >= 0.5 else '비회복'}"
-            }
-            
-            # Google Sheets에 저장 (조용히 실행)
-            save_to_sheets(save_data)
-
-            # 결과 정리 텍스트
-            summary_lgbm = f"회복 확률 {lgbm_prob_val:.1f}%, 예측정확도 {predictor.lgbm_acc * 100:.1f}%."
-            summary_xgb = f"회복 확률 {xgb_prob_val:.1f}%, 예측정확도 {second_model_acc * 100:.1f}%."
-
-            # 📸 결과 요약 이미지 생성
-            def create_summary_image(
-                name,
-                hospital,
-                clinic_date,
-                summary_lgbm,
-                summary_xgb,
-                fig_lgbm,
-                fig_xgb,
-                font_path=None  # 폰트 경로를 None으로 설정
-            ):
-                # A4 이미지 사이즈 설정 (단위: 픽셀)
-                a4_width, a4_height = 595, 842  # 72dpi 기준 A4: 595 x 842
-                margin = 40
-                gap = 30
-                table_height = 120
-                text_height = 80
-                graph_width = (a4_width - margin * 2 - gap) // 2
-
-                # SHAP 그래프 저장 및 리사이징
-                buf_lgbm, buf_xgb = io.BytesIO(), io.BytesIO()
-                fig_lgbm.savefig(buf_lgbm, format='png', bbox_inches='tight')
-                fig_xgb.savefig(buf_xgb, format='png', bbox_inches='tight')
-                buf_lgbm.seek(0)
-                buf_xgb.seek(0)
-                img_lgbm = Image.open(buf_lgbm)
-                img_xgb = Image.open(buf_xgb)
-
-                # 그래프 크기 조정
-                img_lgbm = img_lgbm.resize((graph_width, int(graph_width * img_lgbm.height / img_lgbm.width)))
-                img_xgb = img_xgb.resize((graph_width, int(graph_width * img_xgb.height / img_xgb.width)))
-                graph_height = max(img_lgbm.height, img_xgb.height)
-
-                # 전체 이미지 캔버스 생성
-                total_height = margin + 30 + table_height + text_height + graph_height + margin
-                img = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-                draw = ImageDraw.Draw(img)
-
-                # 폰트 설정 - 기본 폰트 사용 또는 시스템 폰트 시도
-                try:
-                    # Windows 환경인 경우 맑은 고딕 시도
-                    if os.name == 'nt' and os.path.exists("C:/Windows/Fonts/malgun.ttf"):
-                        font_title = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 30)
-                        font_main = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 15)
-                        font_bold = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 15)
-                    else:
-                        # 기본 폰트 사용
-                        font_title = ImageFont.load_default()
-                        font_main = ImageFont.load_default()
-                        font_bold = ImageFont.load_default()
-                except:
-                    # 폰트 로드 실패 시 기본 폰트 사용
-                    font_title = ImageFont.load_default()
-                    font_main = ImageFont.load_default()
-                    font_bold = ImageFont.load_default()
-
-                # 제목 출력
-                title = "SSNHL 예측 결과 요약"
-                try:
-                    title_width = draw.textlength(title, font=font_title)
-                except:
-                    title_width = len(title) * 10  # 대략적인 계산
-                draw.text(((a4_width - title_width) // 2, margin), title, fill=(0, 0, 0), font=font_title)
-
-                # 기본 정보 출력
-                base_y = margin + 80
-                info_lines = [
-                    f"예측일자: {clinic_date}",
-                    f"병원명: {hospital}",
-                    f"환자명: {name}",
-                ]
-                for i, line in enumerate(info_lines):
-                    draw.text((margin, base_y + i * 20), line, fill=(0, 0, 0), font=font_main)
-
-                # 예측 결과 요약 텍스트 출력
-                result_y = base_y + 1 * 10 + 200
-                result_texts = [
-                    f"🔵 LightGBM 기준 : {summary_lgbm}",
-                    f"🟢 XGBoost 기준 : {summary_xgb}"
-                ]
-                for i, line in enumerate(result_texts):
+        @st.fragment
+        def render_whatif_section(sorted_features_lgbm, sorted_features_xgb):
+            """혈액검사 what-if 시뮬레이션"""
+            # 🔁 what-if: 혈액검사 수치를 바꾸면 회복 확률이 어떻게 달라지는지 (격자 전체를 1회 배치 예측)
+            whatif_features = sorted_features_lgbm + [f for f in sorted_features_xgb if f not in sorted_features_lgbm]
+            if whatif_features:
+                with st.expander(f"🔁 {texts.get('수치 조정 시 회복 확률 (What-if)', '수치 조정 시 회복 확률 (What-if)')}"):
                     try:
-                        text_width = draw.textlength(line, font=font_main)
-                    except:
-                        text_width = len(line) * 8
-                    draw.text(((a4_width - text_width) // 2, result_y + i * 22), line, fill=(0, 0, 0), font=font_main)
-
-                # SHAP 그래프 삽입
-                graph_y = result_y + len(result_texts) * 22 + 50
-                img.paste(img_lgbm, (margin, graph_y))
-                img.paste(img_xgb, (margin + graph_width + gap, graph_y))
-
-                # 그래프 아래 모델명 라벨 출력
-                draw.text((margin + graph_width // 2 - 70, graph_y - 20), "🔍 LightGBM 변수 중요도", font=font_bold, fill=(0, 0, 0))
-                draw.text((margin + graph_width + gap + graph_width // 2 - 70, graph_y - 20), "🔍 XGBoost 변수 중요도", font=font_bold, fill=(0, 0, 0))
-
-                # 이미지 반환 (BytesIO 형태로 반환)
-                result_buf = io.BytesIO()
-                img.save(result_buf, format="PNG")
-                result_buf.seek(0)
-                return result_buf
+                        whatif_result = simulate_whatif(hospital_modules[selected_hospital], df_input, tuple(whatif_features))
+                    except Exception as e:
+                        st.warning(f"⚠️ What-if 시뮬레이션 실패: {e}")
+                        whatif_result = None
+
+                    if whatif_result is not None:
+                        base_lgbm, base_second = whatif_result.baseline
+                        norm_lgbm, norm_second = whatif_result.normalized
+                        if whatif_result.normalized_values:
+                            adjusted = ", ".join(
+                                f"{f} {cur} → {new}" for f, (cur, new) in whatif_result.normalized_values.items()
+                            )
+                            st.markdown(
+                                f"{texts.get('모든 수치를 정상범위로 조정 시', '모든 수치를 정상범위로 조정 시')} ({adjusted})<br>"
+                                f"🔵 <b>LightGBM</b> : {base_lgbm*100:.1f}% → <b>{norm_lgbm*100:.1f}%</b><br>"
+                                f"🟢 <b>{second_model_name}</b> : {base_second*100:.1f}% → <b>{norm_second*100:.1f}%</b>",
+                                unsafe_allow_html=True
+                            )
+
+                        curve_cols = st.columns(2)
+                        for i, feature in enumerate(whatif_features):
+                            curve = whatif_result.curves.get(feature)
+                            if curve is None:
+                                continue
+                            fig = plot_response_curve(
+                                feature, curve,
+                                value=blood_values.get(feature),
+                                normal_range=normal_ranges.get(feature),
+                                second_model_name=second_model_name,
+                                xlabel=texts["수치"],
+                                ylabel=f"{texts['회복 확률']} (%)"
+                            )
+                            curve_cols[i % 2].pyplot(fig)
+                            plt.close(fig)
+
+        # 결과 아래 섹션은 각각 독립 fragment: 확률 표가 먼저 그려지고 섹션마다 계산이 끝나는 대로 이어서 표시되며,
+        # 섹션 안의 상호작용은 그 섹션만 다시 실행한다. 계산은 이 세션의 스크립트 스레드에서 한다.
+        fig_lgbm, fig_xgb, sorted_features_lgbm, sorted_features_xgb = render_importance_section()
+        render_lab_section(sorted_features_lgbm, sorted_features_xgb)
+        render_whatif_section(sorted_features_lgbm, sorted_features_xgb)
+
+        # ✅ Google Sheets에 데이터 저장
+        # 한국 시간(KST) 설정 (UTC+9)
+        kst_time = datetime.datetime.now() + datetime.timedelta(hours=9)
+        timestamp = kst_time.strftime("%Y-%m-%d %H:%M:%S")
+        
+        # 저장할 데이터 준비
+        save_data = {
+            'timestamp': timestamp,
+            'language': lang_choice_label,
+            'hospital': selected_hospital,
+            'id': id_value,
+            'birth': birth_date.strftime("%Y-%m-%d"),
+            'sex': gender,
+            'name': name,
+            'hsptcd': hsptcd,
+            'side': side,
+            'hl_duration': hl_duration.strip() if hl_duration else '',
+            'clinic_date': str(clinic_date),
+            'steroid_treatment': int(steroid),
+            'it_dexa_treatment': int(it_dexa),
+            'hyperbaric_treatment': int(hbot),
+            'pta_rt_ac_250': pta_values.get('PTA_RT_AC_250', ''),
+            'pta_rt_ac_500': pta_values.get('PTA_RT_AC_500', ''),
+            'pta_rt_ac_1000': pta_values.get('PTA_RT_AC_1000', ''),
+            'pta_rt_ac_2000': pta_values.get('PTA_RT_AC_2000', ''),
+            'pta_rt_ac_3000': pta_values.get('PTA_RT_AC_3000', ''),
+            'pta_rt_ac_4000': pta_values.get('PTA_RT_AC_4000', ''),
+            'pta_rt_ac_8000': pta_values.get('PTA_RT_AC_8000', ''),
+            'pta_lt_ac_250': pta_values.get('PTA_LT_AC_250', ''),
+            'pta_lt_ac_500': pta_values.get('PTA_LT_AC_500', ''),
+            'pta_lt_ac_1000': pta_values.get('PTA_LT_AC_1000', ''),
+            'pta_lt_ac_2000': pta_values.get('PTA_LT_AC_2000', ''),
+            'pta_lt_ac_3000': pta_values.get('PTA_LT_AC_3000', ''),
+            'pta_lt_ac_4000': pta_values.get('PTA_LT_AC_4000', ''),
+            'pta_lt_ac_8000': pta_values.get('PTA_LT_AC_8000', ''),
+            'wbc': blood_values.get('WBC', ''),
+            'rbc': blood_values.get('RBC', ''),
+            'hb': blood_values.get('Hb', ''),
+            'plt': blood_values.get('PLT', ''),
+            'neutrophil': blood_values.get('Neutrophil', ''),
+            'lymphocyte': blood_values.get('Lymphocyte', ''),
+            'ast': blood_values.get('AST', ''),
+            'alt': blood_values.get('ALT', ''),
+            'bun': blood_values.get('BUN', ''),
+            'cr': blood_values.get('Cr', ''),
+            'glucose': blood_values.get('Glucose', ''),
+            'total_protein': blood_values.get('Total_Protein', ''),
+            'na': blood_values.get('Na', ''),
+            'k': blood_values.get('K', ''),
+            'cl': blood_values.get('Cl', ''),
+            'dx_com': diagnosis_values.get('Dx_COM', 0),
+            'dx_ssnhl': diagnosis_values.get('Dx_SSNHL', 0),
+            'dx_dizziness': diagnosis_values.get('Dx_Dizziness', 0),
+            'dx_tinnitus': diagnosis_values.get('Dx_Tinnitus', 0),
+            'hx_htn': history_values.get('Hx_HTN', 0),
+            'hx_dm': history_values.get('Hx_DM', 0),
+            'hx_crf': history_values.get('Hx_CRF', 0),
+            'hx_mi': history_values.get('Hx_MI', 0),
+            'hx_stroke': history_values.get('Hx_stroke', 0),
+            'hx_cancer': history_values.get('Hx_cancer', 0),
+            'hx_others': hx_others_text,
+            'prediction': f"LightGBM: {lgbm_prob[0]*100:.1f}%, {second_model_name}: {xgb_prob[0]*100:.1f}%",
+            'probability': f"LightGBM: {'회복' if lgbm_prob[0] >= 0.5 else '비회복'}, {second_model_name}: {'회복' if xgb_prob[0] >= 0.5 else '비회복'}"
+        }
+        
+        # 로컬 예측 기록에 먼저 저장하고, Google Sheets는 백그라운드에서 복제 (조용히 실행)
+        try:
+            log_id = get_prediction_log().append(
+                save_data, lgbm_prob=lgbm_prob[0], second_prob=xgb_prob[0], second_model=second_model_name
+            )
+        except Exception as e:
+            log_id = None
+            save_to_sheets(save_data)  # 로컬 기록 실패 시 기존처럼 직접 저장
+        if log_id is not None:
+            st.session_state.setdefault("prediction_log_ids", []).append(log_id)
+            try:
+                get_sheets_mirror().enqueue(log_id)
+            except Exception:
+                pass  # 복제되지 않은 기록은 다음 복제 스레드 시작 시 pending_sync로 다시 보냄 (직접 저장하면 중복)
+
+        # 📸 요약 이미지 / PDF 리포트: 독립 fragment로 렌더링
+        # (다운로드 버튼을 눌러도 이 영역만 다시 실행되어 위의 결과가 사라지지 않음)
+        @st.fragment
+        def render_report_section(fig_lgbm, fig_xgb):
+            # 결과 정리 텍스트
+            summary_lgbm = summary_text(lgbm_prob[0], lgbm_acc)
+            summary_xgb = summary_text(xgb_prob[0], second_model_acc)
 
             # 이미지 생성
             img_buf = create_summary_image(
@@ -1217,17 +1092,6 @@ if predict_button:
                 fig_xgb=fig_xgb
             )
 
-            def convert_image_to_pdf(image_bytes):
-                buffer = io.BytesIO()
-                c = canvas.Canvas(buffer, pagesize=A4)
-                width, height = A4
-                image = ImageReader(image_bytes)
-                c.drawImage(image, 0, 0, width=width, height=height)
-                c.showPage()
-                c.save()
-                buffer.seek(0)
-                return buffer
-            
             pdf_buf = convert_image_to_pdf(img_buf)
 
             # 🔽 예측 결과 다운로드
@@ -1240,3 +1104,9 @@ if predict_button:
                         st.download_button("🖼 PNG"+texts["저장"], data=img_buf, file_name="result.png", mime="image/png")
                     with col2:
                         st.download_button("📄 PDF"+ texts["저장"], data=pdf_buf, file_name="result.pdf", mime="application/pdf")
+
+        render_report_section(fig_lgbm, fig_xgb)
+
+    elif horizon_predictions:
+        # 기본 기간(180일) 예측이 실패한 경우: 다른 기간 결과와 관계없이 실패를 알린다
+        st.error(f"⚠️ {DEFAULT_HORIZON}{texts.get('일 기준 예측 실패', '일 기준 예측 실패')}")
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+병원별 불변(frozen) 모델 번들과 요청 단위 추론 컨텍스트
+
+st.cache_resource 객체는 모든 세션(스레드)이 공유하므로 직접 수정하면 안 된다.
+모델 / scaler / 정확도는 병원별 ModelBundle에 한 번만 묶어 두고(읽기 전용),
+predictor 객체는 요청마다 InferenceContext에서 새로 만들어 주입한다.
+"""
+import copy
+import importlib
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from model_store import second_model_type
+
+DEFAULT_ACCURACY = 0.75
+SECOND_MODEL_NAMES = {"xgb": "XGBoost", "mlp": "MLP"}
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """병원 1곳의 모델 묶음 (세션 간 공유, 수정 불가)"""
+    hospital_key: str
+    lgbm_model: object
+    second_model: object
+    second_model_type: str
+    scaler: object
+    lgbm_acc: float = DEFAULT_ACCURACY
+    second_acc: float = DEFAULT_ACCURACY
+    extras: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def second_model_name(self):
+        return SECOND_MODEL_NAMES.get(self.second_model_type, "XGBoost")
+
+
+def build_model_bundle(hospital_key, hospital_models, accuracy_fn=None):
+    """load_models_from_drive() 결과의 병원 항목으로 번들 생성"""
+    second_type = second_model_type(hospital_key)
+    accuracy_fn = accuracy_fn or (lambda key, model_type: DEFAULT_ACCURACY)
+    known = {"lgbm", second_type, "scaler"}
+
+    return ModelBundle(
+        hospital_key=hospital_key,
+        lgbm_model=hospital_models.get("lgbm"),
+        second_model=hospital_models.get(second_type),
+        second_model_type=second_type,
+        scaler=hospital_models.get("scaler"),
+        lgbm_acc=accuracy_fn(hospital_key, "lgbm"),
+        second_acc=accuracy_fn(hospital_key, second_type),
+        extras=MappingProxyType({k: v for k, v in hospital_models.items() if k not in known}),
+    )
+
+
+@dataclass
+class InferenceContext:
+    """요청(예측 1회) 단위 컨텍스트: 공유 번들 + 이 요청 전용 predictor"""
+    bundle: ModelBundle
+    predictor: object
+    explainer_fn: object = None  # model_type → 공유 TreeExplainer (없으면 None)
+
+    @classmethod
+    def create(cls, module_name, bundle, explainer_fn=None):
+        """predictor 모듈에서 새 predictor를 만들고 (공유 객체는 복사) 번들 모델 주입"""
+        predictor = copy.copy(importlib.import_module(module_name).get_predictor())
+
+        if bundle.lgbm_model is not None:
+            predictor.lgbm_model = bundle.lgbm_model
+        if bundle.second_model is not None:
+            setattr(predictor, f"{bundle.second_model_type}_model", bundle.second_model)
+        if bundle.scaler is not None:
+            predictor.scaler = bundle.scaler
+        return cls(bundle=bundle, predictor=predictor, explainer_fn=explainer_fn)
+
+    def predict(self, df_input):
+        return self.predictor.predict_outcome(df_input)
+
+    def predict_batch(self, df_input):
+        """여러 행 일괄 예측 (what-if 격자 등, SHAP 계산 없음)"""
+        return self.predictor.predict_outcome(df_input)
+
+    def _explainer(self, model_type):
+        explainer = self.explainer_fn(model_type) if self.explainer_fn else None
+        if explainer is None:
+            import shap
+            model = self.predictor.lgbm_model if model_type == "lgbm" else self.predictor.xgb_model
+            # ONNX 어댑터(CompiledModel)는 원본 모델로 설명
+            explainer = shap.TreeExplainer(getattr(model, "original", model))
+        return explainer
+
+    def shap_values(self, df_lgbm, df_xgb):
+        """LightGBM / 두 번째 모델의 SHAP 값 (원본 형태 그대로)"""
+        return (
+            self._explainer("lgbm").shap_values(df_lgbm),
+            self._explainer("xgb").shap_values(df_xgb),
+        )
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+병원별 predictor 코드 / 모델 아티팩트 경로 정의 및 공통 로더
+
+Google Drive 폴더 구조(predictors/, models/, txt/)를 그대로 따른다.
+main.py(Streamlit)와 오프라인 아티팩트 빌드 스크립트가 함께 사용한다.
+"""
+import os
+import re
+import mmap
+import pickle
+import tempfile
+
+# ======================
+# 🔹 코드 / 정적 파일
+# ======================
+CODE_FILES = ['preprocessing.py', 'translate_texts.py']
+STATIC_FILES = ['ON AIR.jpg']
+
+# 언어별 번역 카탈로그 (translate_texts.py에서 빌드, translations.py 참고)
+TRANSLATION_LANGUAGES = ['ko', 'en-us', 'ja', 'zh', 'es', 'de', 'hi', 'ar']
+
+# ======================
+# 🔹 predictor 코드 파일
+# ======================
+PREDICTOR_FILES = [
+    'predictors/all.py', 'predictors/wonju.py', 'predictors/sev.py',
+    'predictors/hallym.py', 'predictors/jeju.py',
+    'predictors/hagen_180d.py', 'predictors/hagen_60d.py', 'predictors/hagen_30d.py'
+]
+
+# ======================
+# 🔹 병원별 모델 파일
+# ======================
+MODEL_FILES = {
+    "all": {
+        "lgbm": "models/all_lightgbm_model.joblib",
+        "xgb": "models/all_xgboost_model.joblib",
+        "scaler": "models/all_minmax_scaler.joblib"
+    },
+    "wonju": {
+        "lgbm": "models/ys_lightgbm_model.joblib",
+        "xgb": "models/ys_xgboost_model.joblib",
+        "scaler": "models/ys_minmax_scaler.joblib"
+    },
+    "sev": {
+        "lgbm": "models/sev_lightgbm_model.joblib",
+        "xgb": "models/sev_xgboost_model.joblib",
+        "scaler": "models/sev_minmax_scaler.joblib"
+    },
+    "hallym": {
+        "lgbm": "models/hallym_lightgbm_model.joblib",
+        "xgb": "models/hallym_xgboost_model.joblib",
+        "scaler": "models/hallym_minmax_scaler.joblib"
+    },
+    "jeju": {
+        "lgbm": "models/jeju_lightgbm_model.joblib",
+        "xgb": "models/jeju_xgboost_model.joblib",
+        "scaler": "models/jeju_minmax_scaler.joblib"
+    },
+    "hagen_180d": {
+        "lgbm": "models/hagen_180d_lightgbm_model.joblib",
+        "mlp": "models/hagen_180d_mlp_model.joblib",
+        "scaler": "models/hagen_180d_minmax_scaler.joblib"
+    },
+    "hagen_60d": {
+        "lgbm": "models/hagen_60d_lightgbm_model.joblib",
+        "xgb": "models/hagen_60d_xgboost_model.joblib",
+        "scaler": "models/hagen_60d_minmax_scaler.joblib"
+    },
+    "hagen_30d": {
+        "lgbm": "models/hagen_30d_lightgbm_model.joblib",
+        "mlp": "models/hagen_30d_mlp_model.joblib",
+        "scaler": "models/hagen_30d_minmax_scaler.joblib"
+    }
+}
+
+
+def model_prefix(hospital_key):
+    """모델 파일명 접두어 (예: wonju → ys)"""
+    scaler_path = MODEL_FILES[hospital_key]["scaler"]
+    return os.path.basename(scaler_path).rsplit("_minmax_scaler", 1)[0]
+
+
+def second_model_type(hospital_key):
+    """LightGBM 외 두 번째 모델 종류 ('xgb' 또는 'mlp')"""
+    return "mlp" if "mlp" in MODEL_FILES.get(hospital_key, {}) else "xgb"
+
+
+def global_importance_path(hospital_key):
+    """joblib 모델 옆에 배포되는 전역 변수 중요도 아티팩트 경로"""
+    return f"models/{model_prefix(hospital_key)}_global_importance.json"
+
+
+def partial_dependence_path(hospital_key):
+    """joblib 모델 옆에 배포되는 partial dependence / ICE 아티팩트 경로"""
+    return f"models/{model_prefix(hospital_key)}_partial_dependence.npz"
+
+
+def input_reference_path(hospital_key):
+    """학습 코호트 입력 분포(드리프트 감지 기준) 아티팩트 경로"""
+    return f"models/{model_prefix(hospital_key)}_input_reference.json"
+
+
+def compiled_model_path(hospital_key, model_type):
+    """빌드 시 변환된 ONNX 모델 경로 (joblib 모델 옆)"""
+    return f"models/{model_prefix(hospital_key)}_{model_type}.onnx"
+
+
+def compiled_reference_path(hospital_key, model_type):
+    """ONNX 모델 출력 일치 검사용 기준 입력 (npz)"""
+    return f"models/{model_prefix(hospital_key)}_{model_type}_onnx_reference.npz"
+
+
+def accuracy_path(hospital_key, model_type):
+    """모델 정확도 txt 경로"""
+    return f"txt/{hospital_key}_{model_type}_accuracy.txt"
+
+
+def translation_catalog_path(lang_code):
+    """언어별 번역 카탈로그 경로"""
+    return f"i18n/{lang_code}.json"
+
+
+def all_artifact_paths():
+    """번들에 포함할 전체 아티팩트 경로 (Drive 폴더 기준)"""
+    paths = list(CODE_FILES) + list(PREDICTOR_FILES)
+    paths.extend(translation_catalog_path(code) for code in TRANSLATION_LANGUAGES)
+    for hospital_key, files in MODEL_FILES.items():
+        paths.extend(files.values())
+        paths.append(global_importance_path(hospital_key))
+        paths.append(partial_dependence_path(hospital_key))
+        paths.append(input_reference_path(hospital_key))
+        paths.extend(accuracy_path(hospital_key, t) for t in files if t != "scaler")
+        for model_type in files:
+            if model_type != "scaler":
+                paths.extend([compiled_model_path(hospital_key, model_type),
+                              compiled_reference_path(hospital_key, model_type)])
+    return paths + list(STATIC_FILES)
+
+
+def _open_for_unpickle(path, mmap_mode):
+    f = open(path, 'rb')
+    if mmap_mode is None:
+        return f
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+
+
+def load_model_file(path, model_type, mmap_mode=None):
+    """모델 파일 로드 (scaler는 joblib, 모델은 cloudpickle → pickle → joblib 순서로 시도)
+
+    mmap_mode='r' 이면 파일을 메모리 매핑해서 읽고, joblib 배열은 매핑된 상태로 유지한다.
+    """
+    import joblib
+    import cloudpickle
+
+    if 'scaler' in model_type:
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+    try:
+        with _open_for_unpickle(path, mmap_mode) as f:
+            return cloudpickle.load(f)
+    except Exception:
+        try:
+            with _open_for_unpickle(path, mmap_mode) as f:
+                return pickle.load(f)
+        except Exception:
+            return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def load_model_artifact(backend, path, model_type):
+    """백엔드에서 모델 1개 로드 (로컬 파일은 mmap으로 직접, 그 외는 임시 파일 경유)"""
+    local_path = backend.local_path(path)
+    if local_path:
+        return load_model_file(local_path, model_type, mmap_mode='r')
+
+    content = backend.open(path)
+    if not content:
+        return None
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.write(content.read())
+    tmp.close()
+    return load_model_file(tmp.name, model_type)
+
+
+def parse_accuracy(content, default=0.75):
+    """정확도 txt 내용에서 첫 번째 소수 값 추출 (예: "0.8523")"""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    numbers = re.findall(r"\d+\.\d+", content or "")
+    return float(numbers[0]) if numbers else default
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+예측 / SHAP golden output parity 검사
+
+현재 기준 경로(환자 1명씩 predict_outcome + TreeExplainer)로 병원별 고정 환자 코호트의
+회복 확률과 SHAP 값을 기록해 두고, 최적화된 대체 엔진이 같은 값을 내는지 허용 오차와
+행당 소요 시간으로 비교한다. 새 최적화는 check가 통과할 때만 도입한다.
+
+    record : parity/<병원>.npz 에 코호트 입력 + 기준 출력 저장
+    check  : 엔진별 최대 오차 / 행당 ms 표 출력 (허용 오차 초과 시 종료 코드 1)
+
+    python parity.py record --artifact-dir ./drive_mirror
+    python parity.py check --artifact-dir ./drive_mirror --engine batch --engine onnx
+    python parity.py check --artifact-dir ./drive_mirror --engine server --server 127.0.0.1:8600 --json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from model_store import MODEL_FILES, second_model_type
+from global_importance import load_local_predictor, positive_class_shap
+
+GOLDEN_DIR = "parity"
+GOLDEN_VERSION = 1
+CORPUS_SIZE = 32
+CORPUS_TEST_DATE = "2024-01-01"  # 나이 계산이 날짜에 따라 바뀌지 않도록 고정
+
+# 엔진별 기본 허용 오차 (확률, SHAP)
+TOLERANCES = {
+    "reference": (1e-9, 1e-9),
+    "batch": (1e-6, 1e-6),
+    "onnx": (1e-4, None),      # ONNX는 예측만 대체 (SHAP은 원본 모델)
+    "server": (1e-9, 1e-9),
+}
+
+
+# ======================
+# 🔹 코호트 / golden 파일
+# ======================
+def golden_path(artifact_dir, hospital_key):
+    return os.path.join(artifact_dir, GOLDEN_DIR, f"{hospital_key}.npz")
+
+
+def build_corpus(cohort_csv=None, size=CORPUS_SIZE, seed=0):
+    """고정 환자 코호트 (CSV가 없으면 bench_e2e 가상 환자, 날짜 고정)"""
+    if cohort_csv:
+        return pd.read_csv(cohort_csv).head(size).reset_index(drop=True)
+
+    from bench_e2e import synthetic_patient, patient_frame
+
+    rng = np.random.default_rng(seed)
+    frames = [patient_frame(synthetic_patient(rng, i), test_date=CORPUS_TEST_DATE) for i in range(size)]
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_golden(path, hospital_key, corpus, outputs):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = {"version": GOLDEN_VERSION, "hospital": hospital_key,
+            "corpus": corpus.to_json(orient="split", force_ascii=False)}
+    arrays = {k: np.asarray(v, dtype=np.float64) for k, v in outputs.items() if v is not None}
+    with open(path, "wb") as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+
+def read_golden(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays.pop("meta")))
+    if meta.get("version") != GOLDEN_VERSION:
+        raise ValueError(f"{path}: golden 파일 버전이 다릅니다. record를 다시 실행하세요.")
+    corpus = pd.read_json(meta["corpus"], orient="split", dtype=False)
+    return corpus, arrays
+
+
+# ======================
+# 🔹 엔진
+# ======================
+def _tree_shap(model, X):
+    import shap
+    return positive_class_shap(shap.TreeExplainer(model).shap_values(X))
+
+
+def _outputs(lgbm_prob, second_prob, shap_lgbm=None, shap_second=None):
+    return {"lgbm_prob": lgbm_prob, "second_prob": second_prob,
+            "shap_lgbm": shap_lgbm, "shap_second": shap_second}
+
+
+def engine_reference(predictor, hospital_key, corpus, **kwargs):
+    """기준 경로: 환자 1명씩 predict_outcome + TreeExplainer (앱과 동일)"""
+    second_type = second_model_type(hospital_key)
+    lgbm, second, shap_lgbm, shap_second = [], [], [], []
+    for i in range(len(corpus)):
+        outputs = predictor.predict_outcome(corpus.iloc[[i]].copy())
+        lgbm.append(outputs[1][0])
+        second.append(outputs[3][0])
+        shap_lgbm.append(_tree_shap(predictor.lgbm_model, outputs[4])[0])
+        if second_type == "xgb":
+            shap_second.append(_tree_shap(predictor.xgb_model, outputs[5])[0])
+    return _outputs(lgbm, second, shap_lgbm, shap_second or None)
+
+
+def engine_batch(predictor, hospital_key, corpus, **kwargs):
+    """코호트 전체를 predict_outcome 1회 + SHAP 1회로 계산"""
+    outputs = predictor.predict_outcome(corpus.copy())
+    shap_second = _tree_shap(predictor.xgb_model, outputs[5]) if second_model_type(hospital_key) == "xgb" else None
+    return _outputs(outputs[1], outputs[3], _tree_shap(predictor.lgbm_model, outputs[4]), shap_second)
+
+
+def engine_onnx(predictor, hospital_key, corpus, artifact_dir=None, **kwargs):
+    """검증된 ONNX 모델(compiled_models)을 주입한 predictor로 1명씩 예측"""
+    from artifact_backends import LocalDirectoryBackend
+    from compiled_models import load_compiled_model
+
+    backend = LocalDirectoryBackend(artifact_dir)
+    second_type = second_model_type(hospital_key)
+    for model_type, attr in (("lgbm", "lgbm_model"), (second_type, f"{second_type}_model")):
+        compiled = load_compiled_model(backend, hospital_key, model_type, getattr(predictor, attr))
+        if compiled is None:
+            raise RuntimeError(f"{hospital_key}/{model_type} ONNX 모델이 없거나 로드 시 검증에 실패했습니다.")
+        setattr(predictor, attr, compiled)
+
+    lgbm, second = [], []
+    for i in range(len(corpus)):
+        outputs = predictor.predict_outcome(corpus.iloc[[i]].copy())
+        lgbm.append(outputs[1][0])
+        second.append(outputs[3][0])
+    return _outputs(lgbm, second)
+
+
+def engine_server(predictor, hospital_key, corpus, server=None, **kwargs):
+    """멀티 프로세스 추론 서버(inference_server.py)로 1명씩 예측 + SHAP"""
+    from inference_server import RemoteInferenceContext
+
+    if not server:
+        raise RuntimeError("--server 주소가 필요합니다.")
+    inference = RemoteInferenceContext.create(server, f"predictors.{hospital_key}")
+    second_type = second_model_type(hospital_key)
+    lgbm, second, shap_lgbm, shap_second = [], [], [], []
+    for i in range(len(corpus)):
+        outputs = inference.predict(corpus.iloc[[i]].copy())
+        lgbm.append(outputs[1][0])
+        second.append(outputs[3][0])
+        values_lgbm, values_second = inference.shap_values(outputs[4], outputs[5])
+        shap_lgbm.append(positive_class_shap(values_lgbm)[0])
+        if second_type == "xgb":
+            shap_second.append(positive_class_shap(values_second)[0])
+    return _outputs(lgbm, second, shap_lgbm, shap_second or None)
+
+
+ENGINES = {
+    "reference": engine_reference,
+    "batch": engine_batch,
+    "onnx": engine_onnx,
+    "server": engine_server,
+}
+
+
+# ======================
+# 🔹 비교
+# ======================
+def max_abs_diff(actual, expected):
+    if actual is None or expected is None:
+        return None
+    actual, expected = np.asarray(actual, dtype=np.float64), np.asarray(expected, dtype=np.float64)
+    if actual.shape != expected.shape:
+        return float("inf")
+    return float(np.max(np.abs(actual - expected))) if actual.size else 0.0
+
+
+def compare_outputs(outputs, golden, prob_tol, shap_tol):
+    """항목별 최대 절대 오차와 통과 여부"""
+    result = {"ok": True}
+    for key, tol in (("lgbm_prob", prob_tol), ("second_prob", prob_tol),
+                     ("shap_lgbm", shap_tol), ("shap_second", shap_tol)):
+        if tol is None or key not in golden:
+            continue
+        diff = max_abs_diff(outputs.get(key), golden[key])
+        result[key] = diff
+        if diff is None or diff > tol:
+            result["ok"] = False
+    return result
+
+
+def run_check(artifact_dir, hospitals, engines, server=None, prob_tol=None, shap_tol=None):
+    rows = []
+    for hospital_key in hospitals:
+        path = golden_path(artifact_dir, hospital_key)
+        if not os.path.exists(path):
+            rows.append({"hospital": hospital_key, "engine": "-", "ok": False, "error": "golden 파일 없음"})
+            continue
+        corpus, golden = read_golden(path)
+
+        for engine in engines:
+            engine_prob_tol, engine_shap_tol = TOLERANCES[engine]
+            if prob_tol is not None:
+                engine_prob_tol = prob_tol
+            if shap_tol is not None and engine_shap_tol is not None:
+                engine_shap_tol = shap_tol  # SHAP을 대체하지 않는 엔진은 계속 검사 제외
+            row = {"hospital": hospital_key, "engine": engine}
+            try:
+                predictor = load_local_predictor(artifact_dir, hospital_key)
+                t0 = time.perf_counter()
+                outputs = ENGINES[engine](predictor, hospital_key, corpus,
+                                          artifact_dir=artifact_dir, server=server)
+                row["ms_per_row"] = round((time.perf_counter() - t0) / len(corpus) * 1000, 3)
+                row.update(compare_outputs(outputs, golden, engine_prob_tol, engine_shap_tol))
+            except Exception as e:
+                row.update(ok=False, error=str(e))
+            rows.append(row)
+    return rows
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2e}" if value else "0"
+    return str(value)
+
+
+def print_table(rows):
+    columns = ["hospital", "engine", "lgbm_prob", "second_prob", "shap_lgbm", "shap_second", "ms_per_row", "ok"]
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{_fmt(row.get(c)):>12}" for c in columns) + (f"  {row['error']}" if "error" in row else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="예측 / SHAP golden output parity 검사")
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--hospital", action="append", choices=list(MODEL_FILES), help="대상 병원 (기본: 전체)")
+    parser.add_argument("--cohort", help="코호트 CSV (record, 기본: 고정 시드 가상 환자)")
+    parser.add_argument("--size", type=int, default=CORPUS_SIZE, help="코호트 환자 수 (record)")
+    parser.add_argument("--engine", action="append", choices=list(ENGINES), help="검사할 엔진 (check, 기본: batch)")
+    parser.add_argument("--server", help="server 엔진용 추론 서버 주소 (host:port)")
+    parser.add_argument("--prob-tol", type=float, help="확률 허용 오차 (기본: 엔진별)")
+    parser.add_argument("--shap-tol", type=float, help="SHAP 허용 오차 (기본: 엔진별)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    hospitals = args.hospital or list(MODEL_FILES)
+
+    if args.command == "record":
+        corpus = build_corpus(args.cohort, args.size)
+        for hospital_key in hospitals:
+            predictor = load_local_predictor(artifact_dir, hospital_key)
+            outputs = engine_reference(predictor, hospital_key, corpus)
+            path = golden_path(artifact_dir, hospital_key)
+            write_golden(path, hospital_key, corpus, outputs)
+            print(f"✅ {hospital_key}: {path} ({len(corpus)}명)")
+        return 0
+
+    rows = run_check(artifact_dir, hospitals, args.engine or ["batch"], args.server, args.prob_tol, args.shap_tol)
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+    return 0 if all(row["ok"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+병원별 partial dependence(PD) / ICE 아티팩트
+
+혈액검사 변수(TARGET_FEATURES)마다 LAB_XLIMS 범위의 격자 값을 코호트 전체에 대입해
+predict_outcome으로 예측하고, 모델별 평균 반응 곡선(PD)과 개별 곡선(ICE, 일부 환자)을
+models/ 폴더의 joblib 파일 옆에 압축 npz로 저장한다.
+앱은 이 파일만 읽어 모집단 반응 곡선을 추론 없이 겹쳐 그린다.
+
+사용 예 (Google Drive 폴더를 로컬에 내려받은 디렉터리 기준):
+    python partial_dependence.py --artifact-dir ./drive_mirror --cohort background.csv
+    python partial_dependence.py --artifact-dir ./drive_mirror --cohort background.csv --hospital wonju
+"""
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+from global_importance import load_local_predictor
+from model_store import MODEL_FILES, partial_dependence_path, second_model_type
+from whatif import NORMAL_RANGES, LAB_XLIMS, DEFAULT_XLIM, GRID_POINTS
+
+ARTIFACT_VERSION = 1
+TARGET_FEATURES = list(NORMAL_RANGES)
+MAX_COHORT_ROWS = 500   # PD 계산에 사용할 최대 코호트 행 수
+ICE_ROWS = 50           # 저장할 ICE 곡선 수
+ICE_BAND = (10, 90)     # 앱에서 표시할 ICE 분위 범위
+
+
+# ======================
+# 🔹 오프라인 계산
+# ======================
+def feature_grid(feature, n_points=GRID_POINTS):
+    return np.linspace(*LAB_XLIMS.get(feature, DEFAULT_XLIM), n_points)
+
+
+def compute_feature_curves(predictor, cohort_df, feature, grid):
+    """코호트 전체에 격자 값을 대입해 1회 배치 예측 → 모델별 (격자 수, 행 수) 확률 배열"""
+    n_rows = len(cohort_df)
+    stacked = pd.concat([cohort_df] * len(grid), ignore_index=True)
+    stacked[feature] = np.repeat(grid, n_rows)
+    if "ID" in stacked.columns:
+        # predictor 전처리가 ID 기준으로 행을 합치지 않도록 행마다 고유 ID 부여
+        stacked["ID"] = [f"pd_{i}" for i in range(len(stacked))]
+
+    outputs = predictor.predict_outcome(stacked)
+    lgbm_prob, second_prob = np.asarray(outputs[1], dtype=float), np.asarray(outputs[3], dtype=float)
+    if len(lgbm_prob) != len(stacked):
+        raise ValueError(f"{feature}: 예측 결과 행 수({len(lgbm_prob)})가 입력 행 수({len(stacked)})와 다릅니다.")
+    return lgbm_prob.reshape(len(grid), n_rows), second_prob.reshape(len(grid), n_rows)
+
+
+def build_hospital_artifact(hospital_key, predictor, cohort_df, features=None, n_points=GRID_POINTS, seed=0):
+    """병원 1곳의 PD / ICE 배열 (npz에 그대로 저장할 dict)"""
+    rng = np.random.default_rng(seed)
+    if len(cohort_df) > MAX_COHORT_ROWS:
+        cohort_df = cohort_df.iloc[np.sort(rng.choice(len(cohort_df), MAX_COHORT_ROWS, replace=False))]
+    cohort_df = cohort_df.reset_index(drop=True)
+    ice_rows = np.sort(rng.choice(len(cohort_df), min(ICE_ROWS, len(cohort_df)), replace=False))
+
+    features = [f for f in (features or TARGET_FEATURES) if f in cohort_df.columns]
+    second_type = second_model_type(hospital_key)
+    grids, pd_curves, ice_curves = [], {"lgbm": [], second_type: []}, {"lgbm": [], second_type: []}
+
+    for feature in features:
+        grid = feature_grid(feature, n_points)
+        for model_type, probs in zip(("lgbm", second_type), compute_feature_curves(predictor, cohort_df, feature, grid)):
+            pd_curves[model_type].append(probs.mean(axis=1))
+            ice_curves[model_type].append(probs[:, ice_rows].T)
+        grids.append(grid)
+
+    arrays = {
+        "meta": np.array(json.dumps({
+            "version": ARTIFACT_VERSION,
+            "hospital": hospital_key,
+            "features": features,
+            "models": ["lgbm", second_type],
+            "n": int(len(cohort_df)),
+        }, ensure_ascii=False)),
+        "grid": np.asarray(grids, dtype=np.float32),
+    }
+    for model_type in ("lgbm", second_type):
+        arrays[f"pd_{model_type}"] = np.asarray(pd_curves[model_type], dtype=np.float32)
+        arrays[f"ice_{model_type}"] = np.asarray(ice_curves[model_type], dtype=np.float16)  # (변수, ICE 행, 격자)
+    return arrays
+
+
+# ======================
+# 🔹 앱에서 사용하는 로드
+# ======================
+class PartialDependence:
+    """npz 아티팩트 래퍼: curve(model_type, feature) → (grid, pd, ice 하한, ice 상한)"""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self._index = {feature: i for i, feature in enumerate(meta["features"])}
+
+    @property
+    def hospital(self):
+        return self.meta["hospital"]
+
+    def has(self, model_type, feature):
+        return feature in self._index and f"pd_{model_type}" in self.arrays
+
+    def curve(self, model_type, feature):
+        if not self.has(model_type, feature):
+            return None
+        i = self._index[feature]
+        ice = self.arrays[f"ice_{model_type}"][i].astype(np.float32)
+        low, high = np.percentile(ice, ICE_BAND, axis=0) if len(ice) else (None, None)
+        return self.arrays["grid"][i], self.arrays[f"pd_{model_type}"][i], low, high
+
+
+def read_partial_dependence(file_obj):
+    """npz 아티팩트 로드 (BytesIO 또는 파일 객체, pickle 미사용)"""
+    with np.load(file_obj, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays.pop("meta")))
+    if meta.get("version") != ARTIFACT_VERSION:
+        return None
+    return PartialDependence(meta, arrays)
+
+
+# ======================
+# 🔹 CLI
+# ======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="병원별 partial dependence / ICE 아티팩트 생성")
+    parser.add_argument("--artifact-dir", required=True, help="predictors/, models/ 가 있는 로컬 디렉터리")
+    parser.add_argument("--cohort", required=True, help="background 코호트 CSV (앱 입력과 동일한 컬럼)")
+    parser.add_argument("--hospital", action="append", choices=list(MODEL_FILES), help="대상 병원 (기본: 전체)")
+    parser.add_argument("--points", type=int, default=GRID_POINTS, help="변수별 격자 점 수")
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    cohort_df = pd.read_csv(args.cohort)
+
+    for hospital_key in args.hospital or list(MODEL_FILES):
+        predictor = load_local_predictor(artifact_dir, hospital_key)
+        arrays = build_hospital_artifact(hospital_key, predictor, cohort_df, n_points=args.points)
+
+        out_path = os.path.join(artifact_dir, partial_dependence_path(hospital_key))
+        with open(out_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        print(f"✅ {hospital_key}: {out_path} ({os.path.getsize(out_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
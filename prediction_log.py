@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 예측 기록 (SQLite, append-only)
+
+예측 1건마다 save_to_sheets와 같은 레코드를 로컬 SQLite에 먼저 기록하고
+(ID / 병원코드 / 시각 인덱스), Google Sheets는 백그라운드 스레드가 비동기로 복제한다.
+이전 방문 조회(사이드바 불러오기)와 코호트 조회는 네트워크 없이 로컬에서 처리한다.
+
+    SSNHL_PREDICTION_DB=/var/lib/ssnhl/predictions.sqlite3
+    (기본: $XDG_DATA_HOME/ssnhl/prediction_log.sqlite3 — 환자 기록이므로 앱 폴더 밖에 둔다)
+
+    python prediction_log.py --id 12345678
+    python prediction_log.py --hospital 원주세브란스기독병원 --since 2025-01-01 --csv cohort.csv
+"""
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import sqlite3
+import argparse
+import threading
+
+PREDICTION_DB_ENV = "SSNHL_PREDICTION_DB"
+DEFAULT_DB_PATH = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share")),
+    "ssnhl", "prediction_log.sqlite3",
+)
+RETRY_BASE = 5.0     # 초, Sheets 복제 실패 시 재시도 간격 (실패마다 2배)
+RETRY_MAX = 600.0
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp    TEXT NOT NULL,
+    patient_id   TEXT NOT NULL,
+    hsptcd       TEXT,
+    hospital     TEXT,
+    lgbm_prob    REAL,
+    second_prob  REAL,
+    second_model TEXT,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_patient ON predictions (patient_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_predictions_hsptcd ON predictions (hsptcd, timestamp);
+CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp);
+
+-- 예측 기록은 수정하지 않고, Sheets 복제 완료 여부만 별도 테이블에 추가
+CREATE TABLE IF NOT EXISTS sheets_sync (
+    prediction_id INTEGER PRIMARY KEY REFERENCES predictions (id),
+    synced_at     TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+
+def default_db_path():
+    return os.environ.get(PREDICTION_DB_ENV) or DEFAULT_DB_PATH
+
+
+class PredictionLog:
+    """예측 기록 저장소 (스레드마다 별도 연결, WAL 모드)"""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- 기록 ----------
+    def append(self, record, lgbm_prob=None, second_prob=None, second_model=None):
+        """save_to_sheets 레코드(dict) 1건 추가 후 id 반환"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO predictions (timestamp, patient_id, hsptcd, hospital, lgbm_prob, second_prob,"
+                " second_model, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.get("timestamp", ""), str(record.get("id", "")), record.get("hsptcd") or None,
+                    record.get("hospital"), _as_float(lgbm_prob), _as_float(second_prob), second_model,
+                    json.dumps(record, ensure_ascii=False, default=str),
+                ),
+            )
+            return cursor.lastrowid
+
+    # ---------- 조회 ----------
+    def _rows(self, sql, params=()):
+        rows = self._connect().execute(sql, params).fetchall()
+        return [dict(row, data=json.loads(row["data"])) for row in rows]
+
+    def get(self, prediction_id):
+        rows = self._rows("SELECT * FROM predictions WHERE id = ?", (prediction_id,))
+        return rows[0] if rows else None
+
+    def latest(self, patient_id, hsptcd=None, prediction_ids=None):
+        """환자의 가장 최근 방문 기록 (없으면 None)
+
+        prediction_ids가 주어지면 그 기록 중에서만 찾는다 (앱에서는 현재 세션이 만든 기록으로 제한).
+        """
+        sql = "SELECT * FROM predictions WHERE patient_id = ?"
+        params = [str(patient_id)]
+        if hsptcd:
+            sql += " AND hsptcd = ?"
+            params.append(hsptcd)
+        if prediction_ids is not None:
+            ids = [int(i) for i in prediction_ids]
+            if not ids:
+                return None
+            sql += f" AND id IN ({', '.join('?' * len(ids))})"
+            params.extend(ids)
+        rows = self._rows(sql + " ORDER BY timestamp DESC, id DESC LIMIT 1", params)
+        return rows[0] if rows else None
+
+    def history(self, patient_id, limit=50):
+        """환자의 방문 기록 (최근 순)"""
+        return self._rows(
+            "SELECT * FROM predictions WHERE patient_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (str(patient_id), limit),
+        )
+
+    def query(self, hospital=None, hsptcd=None, since=None, until=None, limit=None):
+        """코호트 조회 → DataFrame (입력 레코드 컬럼 + 확률)"""
+        import pandas as pd
+
+        clauses, params = [], []
+        for column, op, value in (("hospital", "=", hospital), ("hsptcd", "=", hsptcd),
+                                  ("timestamp", ">=", since), ("timestamp", "<", until)):
+            if value:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT * FROM predictions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        rows = self._rows(sql, params)
+        return pd.DataFrame([
+            {**row["data"], "log_id": row["id"], "lgbm_prob": row["lgbm_prob"],
+             "second_prob": row["second_prob"], "second_model": row["second_model"]}
+            for row in rows
+        ])
+
+    # ---------- Sheets 복제 상태 ----------
+    def pending_sync(self, limit=100):
+        return self._rows(
+            "SELECT p.* FROM predictions p LEFT JOIN sheets_sync s ON s.prediction_id = p.id"
+            " WHERE s.prediction_id IS NULL ORDER BY p.id LIMIT ?",
+            (limit,),
+        )
+
+    def is_synced(self, prediction_id):
+        row = self._connect().execute(
+            "SELECT 1 FROM sheets_sync WHERE prediction_id = ?", (prediction_id,)
+        ).fetchone()
+        return row is not None
+
+    def mark_synced(self, prediction_id):
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO sheets_sync (prediction_id) VALUES (?)", (prediction_id,))
+
+
+def _as_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SheetsMirror:
+    """로컬 기록을 Google Sheets로 비동기 복제 (실패한 건은 backoff 후 같은 스레드에서 재시도)
+
+    save_fn은 백그라운드 스레드에서 호출되므로 st.* 를 쓰지 않고 실패 시 False 또는 예외로 알린다.
+    """
+
+    def __init__(self, log, save_fn, retry_base=RETRY_BASE, retry_max=RETRY_MAX):
+        self.log = log
+        self.save_fn = save_fn  # save_fn(record) -> bool (main.append_sheet_row)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.failures = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ssnhl-sheets-mirror", daemon=True)
+
+    def start(self):
+        for row in self.log.pending_sync():
+            self._queue.put(row["id"])
+        self._thread.start()
+        return self
+
+    def enqueue(self, prediction_id):
+        self._queue.put(prediction_id)
+
+    def sync_one(self, prediction_id):
+        """1건 복제, 성공 여부 반환 (이미 삭제된 기록 / 이미 복제된 기록은 다시 쓰지 않고 성공으로 간주)
+
+        start()의 pending_sync와 enqueue()가 같은 id를 넣을 수 있으므로 복제 직전에 완료 여부를 확인한다.
+        """
+        if self.log.is_synced(prediction_id):
+            return True
+        row = self.log.get(prediction_id)
+        if row is None:
+            return True
+        try:
+            ok = bool(self.save_fn(row["data"]))
+        except Exception as e:
+            logger.warning("Sheets 복제 실패 (prediction %s): %s", prediction_id, e)
+            return False
+        if ok:
+            self.log.mark_synced(prediction_id)
+        return ok
+
+    def retry_delay(self):
+        return min(self.retry_base * 2 ** max(self.failures - 1, 0), self.retry_max)
+
+    def _run(self):
+        while True:
+            prediction_id = self._queue.get()
+            if self.sync_one(prediction_id):
+                self.failures = 0
+                continue
+            # Sheets 장애 중에는 다음 건도 실패하므로 복제 스레드 전체를 쉬었다가 다시 큐에 넣는다
+            self.failures += 1
+            delay = self.retry_delay()
+            logger.warning("Sheets 복제 %d회 연속 실패, %.0f초 후 재시도", self.failures, delay)
+            time.sleep(delay)
+            self._queue.put(prediction_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 예측 기록 조회")
+    parser.add_argument("--db", default=default_db_path())
+    parser.add_argument("--id", help="환자 ID 방문 기록")
+    parser.add_argument("--hospital")
+    parser.add_argument("--hsptcd")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    parser.add_argument("--csv", help="코호트 조회 결과 CSV 저장 경로")
+    args = parser.parse_args(argv)
+
+    log = PredictionLog(args.db)
+    if args.id:
+        for row in log.history(args.id):
+            print(f"{row['timestamp']}  {row['hospital']}  LightGBM {row['lgbm_prob']}  "
+                  f"{row['second_model']} {row['second_prob']}")
+        return 0
+
+    df = log.query(hospital=args.hospital, hsptcd=args.hsptcd, since=args.since, until=args.until)
+    if args.csv:
+        df.to_csv(args.csv, index=False, encoding="utf-8-sig")
+        print(f"✅ {len(df)}건 → {args.csv}")
+    else:
+        print(df.to_string(max_rows=50))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
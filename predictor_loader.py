@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+아티팩트 저장소의 파이썬 코드(predictors/*.py, preprocessing.py, translate_texts.py)를
+임시 디렉터리나 sys.path 변경 없이 메모리에서 import 하는 finder / loader
+
+    registry = ArtifactModuleRegistry(fetch_source)   # fetch_source(path) -> bytes | None
+    registry.install()
+    importlib.import_module("predictors.wonju")        # 최초 1회만 다운로드 / 실행
+    registry.reload()                                  # 아티팩트가 바뀐 경우에만 다시 import
+
+오프라인 도구 / 워커처럼 같은 프로세스에서 여러 번 로드하는 경우 shared_registry(root, fetch_source)로
+백엔드 루트당 registry 1개를 재사용한다. sys.meta_path 에는 항상 registry 1개만 등록된다.
+"""
+import os
+import sys
+import threading
+import importlib
+import importlib.abc
+import importlib.util
+
+from model_store import CODE_FILES, PREDICTOR_FILES
+
+PACKAGE_NAME = "predictors"
+ORIGIN_PREFIX = "artifact://"
+
+
+def default_module_paths():
+    """모듈 이름 → 아티팩트 경로"""
+    paths = {}
+    for path in CODE_FILES:
+        paths[os.path.splitext(path)[0]] = path
+    for path in PREDICTOR_FILES:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        paths[f"{PACKAGE_NAME}.{stem}"] = path
+        # 기존 방식(predictors 디렉터리를 sys.path에 추가)과의 호환: `import wonju`
+        paths.setdefault(stem, path)
+    return paths
+
+
+class _ArtifactLoader(importlib.abc.InspectLoader):
+    def __init__(self, registry, path):
+        self.registry = registry
+        self.path = path
+
+    def is_package(self, fullname):
+        return self.path is None
+
+    def get_source(self, fullname):
+        if self.path is None:
+            return ""
+        return self.registry.source(self.path).decode("utf-8")
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        if self.path is None:
+            return
+        code = compile(self.registry.source(self.path), module.__spec__.origin, "exec")
+        exec(code, module.__dict__)
+
+
+class ArtifactModuleRegistry(importlib.abc.MetaPathFinder):
+    """아티팩트 코드 모듈 finder + 소스 캐시 + hot-reload"""
+
+    def __init__(self, fetch_source, module_paths=None):
+        self.fetch_source = fetch_source
+        self.module_paths = module_paths or default_module_paths()
+        self.generation = 0
+        self._sources = {}
+        self._lock = threading.RLock()
+
+    # ---------- 소스 캐시 ----------
+    def source(self, path):
+        with self._lock:
+            if path not in self._sources:
+                content = self.fetch_source(path)
+                if content is None:
+                    raise ImportError(f"아티팩트에서 {path}을(를) 찾을 수 없습니다.")
+                self._sources[path] = content
+            return self._sources[path]
+
+    def prefetch(self, paths):
+        """여러 파일을 미리 받아 두고, 받지 못한 경로 목록을 반환"""
+        missing = []
+        for path in paths:
+            try:
+                self.source(path)
+            except ImportError:
+                missing.append(path)
+        return missing
+
+    # ---------- finder ----------
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname == PACKAGE_NAME:
+            spec = importlib.util.spec_from_loader(
+                fullname, _ArtifactLoader(self, None), origin=f"{ORIGIN_PREFIX}{PACKAGE_NAME}", is_package=True
+            )
+            spec.submodule_search_locations = []
+            return spec
+
+        artifact_path = self.module_paths.get(fullname)
+        if artifact_path is None:
+            return None
+        try:
+            self.source(artifact_path)
+        except ImportError:
+            return None
+        return importlib.util.spec_from_loader(
+            fullname, _ArtifactLoader(self, artifact_path), origin=f"{ORIGIN_PREFIX}{artifact_path}"
+        )
+
+    def install(self):
+        """sys.meta_path 맨 앞에 1회 등록 (다른 registry는 제거: 같은 모듈 이름을 finder 하나만 제공)"""
+        others = [f for f in sys.meta_path if isinstance(f, ArtifactModuleRegistry) and f is not self]
+        for finder in others:
+            sys.meta_path.remove(finder)
+        if others:
+            # 이전 registry 소스로 import된 모듈은 이 registry에서 다시 import
+            for name in self.managed_modules():
+                del sys.modules[name]
+            importlib.invalidate_caches()
+        if not any(f is self for f in sys.meta_path):
+            sys.meta_path.insert(0, self)
+        return self
+
+    def managed_modules(self):
+        return [name for name in list(sys.modules) if name == PACKAGE_NAME or name in self.module_paths]
+
+    # ---------- hot-reload ----------
+    def reload(self):
+        """받아 둔 소스를 다시 받아 바뀐 경우에만 관리 모듈 전체를 다시 import 대상으로 만든다"""
+        with self._lock:
+            changed = []
+            for path, old in list(self._sources.items()):
+                new = self.fetch_source(path)
+                if new is not None and new != old:
+                    self._sources[path] = new
+                    changed.append(path)
+
+            if changed:
+                # 모듈 간 `from preprocessing import ...` 참조가 있으므로 전체를 함께 교체
+                for name in self.managed_modules():
+                    del sys.modules[name]
+                importlib.invalidate_caches()
+                self.generation += 1
+            return changed
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_registry(key, fetch_source):
+    """key(백엔드 루트 등)당 1개만 만들어 설치한 registry (반복 호출 시 finder가 쌓이지 않음)"""
+    with _shared_lock:
+        registry = _shared.get(key)
+        if registry is None:
+            registry = _shared[key] = ArtifactModuleRegistry(fetch_source)
+        return registry.install()
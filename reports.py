@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+예측 결과 요약 이미지 / PDF 리포트
+
+앱(환자 1명)과 코호트 리포트 작업(cohort_reports.py, 워커 프로세스)이 같은 코드로
+A4 요약 이미지와 PDF를 만든다.
+"""
+import io
+import os
+
+from lazy_imports import lazy_module
+
+Image = lazy_module("PIL.Image")
+ImageDraw = lazy_module("PIL.ImageDraw")
+ImageFont = lazy_module("PIL.ImageFont")
+canvas = lazy_module("reportlab.pdfgen.canvas")
+pagesizes = lazy_module("reportlab.lib.pagesizes")
+reportlab_utils = lazy_module("reportlab.lib.utils")
+
+
+def summary_text(prob, accuracy):
+    """요약 이미지에 들어가는 모델별 결과 문장"""
+    return f"회복 확률 {prob * 100:.1f}%, 예측정확도 {accuracy * 100:.1f}%."
+
+
+def create_summary_image(
+    name,
+    hospital,
+    clinic_date,
+    summary_lgbm,
+    summary_xgb,
+    fig_lgbm,
+    fig_xgb,
+    font_path=None  # 폰트 경로를 None으로 설정
+):
+    """A4 크기 결과 요약 이미지 (PNG BytesIO)"""
+    # A4 이미지 사이즈 설정 (단위: 픽셀)
+    a4_width, a4_height = 595, 842  # 72dpi 기준 A4: 595 x 842
+    margin = 40
+    gap = 30
+    table_height = 120
+    text_height = 80
+    graph_width = (a4_width - margin * 2 - gap) // 2
+
+    # SHAP 그래프 저장 및 리사이징
+    buf_lgbm, buf_xgb = io.BytesIO(), io.BytesIO()
+    fig_lgbm.savefig(buf_lgbm, format='png', bbox_inches='tight')
+    fig_xgb.savefig(buf_xgb, format='png', bbox_inches='tight')
+    buf_lgbm.seek(0)
+    buf_xgb.seek(0)
+    img_lgbm = Image.open(buf_lgbm)
+    img_xgb = Image.open(buf_xgb)
+
+    # 그래프 크기 조정
+    img_lgbm = img_lgbm.resize((graph_width, int(graph_width * img_lgbm.height / img_lgbm.width)))
+    img_xgb = img_xgb.resize((graph_width, int(graph_width * img_xgb.height / img_xgb.width)))
+    graph_height = max(img_lgbm.height, img_xgb.height)
+
+    # 전체 이미지 캔버스 생성
+    total_height = margin + 30 + table_height + text_height + graph_height + margin
+    img = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+
+    # 폰트 설정 - 기본 폰트 사용 또는 시스템 폰트 시도
+    try:
+        # Windows 환경인 경우 맑은 고딕 시도
+        if os.name == 'nt' and os.path.exists("C:/Windows/Fonts/malgun.ttf"):
+            font_title = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 30)
+            font_main = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 15)
+            font_bold = ImageFont.truetype("C:/Windows/Fonts/malgun.ttf", 15)
+        else:
+            # 기본 폰트 사용
+            font_title = ImageFont.load_default()
+            font_main = ImageFont.load_default()
+            font_bold = ImageFont.load_default()
+    except:
+        # 폰트 로드 실패 시 기본 폰트 사용
+        font_title = ImageFont.load_default()
+        font_main = ImageFont.load_default()
+        font_bold = ImageFont.load_default()
+
+    # 제목 출력
+    title = "SSNHL 예측 결과 요약"
+    try:
+        title_width = draw.textlength(title, font=font_title)
+    except:
+        title_width = len(title) * 10  # 대략적인 계산
+    draw.text(((a4_width - title_width) // 2, margin), title, fill=(0, 0, 0), font=font_title)
+
+    # 기본 정보 출력
+    base_y = margin + 80
+    info_lines = [
+        f"예측일자: {clinic_date}",
+        f"병원명: {hospital}",
+        f"환자명: {name}",
+    ]
+    for i, line in enumerate(info_lines):
+        draw.text((margin, base_y + i * 20), line, fill=(0, 0, 0), font=font_main)
+
+    # 예측 결과 요약 텍스트 출력
+    result_y = base_y + 1 * 10 + 200
+    result_texts = [
+        f"🔵 LightGBM 기준 : {summary_lgbm}",
+        f"🟢 XGBoost 기준 : {summary_xgb}"
+    ]
+    for i, line in enumerate(result_texts):
+        try:
+            text_width = draw.textlength(line, font=font_main)
+        except:
+            text_width = len(line) * 8
+        draw.text(((a4_width - text_width) // 2, result_y + i * 22), line, fill=(0, 0, 0), font=font_main)
+
+    # SHAP 그래프 삽입
+    graph_y = result_y + len(result_texts) * 22 + 50
+    img.paste(img_lgbm, (margin, graph_y))
+    img.paste(img_xgb, (margin + graph_width + gap, graph_y))
+
+    # 그래프 아래 모델명 라벨 출력
+    draw.text((margin + graph_width // 2 - 70, graph_y - 20), "🔍 LightGBM 변수 중요도", font=font_bold, fill=(0, 0, 0))
+    draw.text((margin + graph_width + gap + graph_width // 2 - 70, graph_y - 20), "🔍 XGBoost 변수 중요도", font=font_bold, fill=(0, 0, 0))
+
+    # 이미지 반환 (BytesIO 형태로 반환)
+    result_buf = io.BytesIO()
+    img.save(result_buf, format="PNG")
+    result_buf.seek(0)
+    return result_buf
+
+
+def convert_image_to_pdf(image_bytes):
+    """요약 이미지(PNG) 1장 → A4 PDF 1쪽"""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=pagesizes.A4)
+    width, height = pagesizes.A4
+    image = reportlab_utils.ImageReader(image_bytes)
+    c.drawImage(image, 0, 0, width=width, height=height)
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+class MultiPagePdf:
+    """요약 이미지를 한 쪽씩 이어 붙이는 PDF (쪽마다 바로 기록해 이미지를 메모리에 쌓지 않음)"""
+
+    def __init__(self, file_obj):
+        self.canvas = canvas.Canvas(file_obj, pagesize=pagesizes.A4)
+        self.pages = 0
+
+    def add_page(self, image_bytes):
+        width, height = pagesizes.A4
+        self.canvas.drawImage(reportlab_utils.ImageReader(image_bytes), 0, 0, width=width, height=height)
+        self.canvas.showPage()
+        self.pages += 1
+
+    def close(self):
+        self.canvas.save()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+배포용 실행 스크립트
+
+health/readiness 서버를 먼저 띄우고 백그라운드에서 warm-up을 시작한 뒤
+같은 프로세스에서 Streamlit 서버를 실행한다.
+warm-up은 main.py와 동일한 st.cache_resource / st.cache_data 캐시를 채우므로
+로드밸런서는 /readyz 가 200이 된 replica로만 트래픽을 보내면 된다.
+
+health 서버 주소는 배포 시 필수다. 로드밸런서 / kubelet이 접근할 수 있는 주소(pod IP, 0.0.0.0 등)를
+--health-host 또는 SSNHL_HEALTH_HOST 로 지정한다 (/reload 는 admin 토큰으로 보호됨).
+나머지 인자는 그대로 Streamlit에 전달한다.
+
+    python serve.py --health-host "$POD_IP" --server.port 8501 --server.headless true
+"""
+import os
+import sys
+import argparse
+
+from streamlit.web import cli as stcli
+
+from warmup import start_health_server, start_background_warmup, HEALTH_PORT
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="health 서버 + warm-up + Streamlit 실행", allow_abbrev=False)
+    parser.add_argument("--health-host", default=os.environ.get("SSNHL_HEALTH_HOST"),
+                        help="health / readiness 서버 bind 주소 (필수, 로드밸런서가 접근할 수 있는 주소)")
+    parser.add_argument("--health-port", type=int, default=HEALTH_PORT)
+    args, streamlit_args = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if not args.health_host:
+        parser.error("--health-host 또는 SSNHL_HEALTH_HOST 로 health 서버 주소를 지정하세요 (예: pod IP).")
+
+    start_health_server(args.health_port, args.health_host)
+    start_background_warmup()
+
+    sys.argv = ["streamlit", "run", MAIN_SCRIPT] + streamlit_args
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
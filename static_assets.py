@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+정적 자산(로고 / CSS) 파이프라인
+
+아티팩트 저장소의 원본 이미지를 프로세스당 1회만 받아 표시 크기로 줄이고 재압축한 뒤
+Streamlit 정적 폴더(static/build/)에 내용 해시 파일명으로 저장하고, 페이지에는 <img> 태그만 보낸다.
+URL에 ?v=<해시>를 붙이면 Streamlit(tornado) 정적 파일 핸들러가 장기 Cache-Control 헤더를
+붙이므로, 브라우저는 내용이 바뀔 때까지 이미지를 다시 받지 않는다.
+
+CSS(static/app.css)는 인라인 <style>로 보낸다. Streamlit 정적 핸들러는 이미지 / PDF 외 확장자를
+text/plain + nosniff 로 보내므로 <link rel="stylesheet"> 는 브라우저가 거부한다.
+파일은 프로세스당 1회만 읽는다 (artifacts.get_stylesheet_html 캐시).
+.streamlit/config.toml 의 server.enableStaticServing 이 꺼져 있으면 이미지는 st.image로 대체한다.
+"""
+import io
+import os
+import hashlib
+from dataclasses import dataclass
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+BUILD_DIR = os.path.join(STATIC_DIR, "build")
+STATIC_URL = "app/static"
+STYLESHEET = "app.css"
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    source: str          # 아티팩트 경로 (Drive 폴더 기준)
+    max_width: int       # 표시 폭 × 2 (고해상도 화면)
+    quality: int = 80
+
+
+IMAGE_ASSETS = {
+    "logo": ImageAsset("ON AIR.jpg", max_width=600),
+}
+
+
+def _digest(content):
+    return hashlib.sha1(content).hexdigest()[:12]
+
+
+def static_url(relative_path, digest):
+    return f"{STATIC_URL}/{relative_path}?v={digest}"
+
+
+# ======================
+# 🔹 이미지
+# ======================
+def optimize_image(content, spec):
+    """원본 bytes → (표시 크기로 줄인 bytes, 확장자) (WebP, 미지원 시 progressive JPEG)"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(content))
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    if image.width > spec.max_width:
+        height = round(image.height * spec.max_width / image.width)
+        image = image.resize((spec.max_width, height), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    try:
+        image.save(buf, format="WEBP", quality=spec.quality, method=6)
+        return buf.getvalue(), "webp"
+    except (OSError, KeyError):
+        buf = io.BytesIO()
+        image.convert("RGB").save(buf, format="JPEG", quality=spec.quality, optimize=True, progressive=True)
+        return buf.getvalue(), "jpg"
+
+
+def publish(name, content, extension):
+    """static/build/<name>.<해시>.<확장자> 로 저장 (이미 있으면 재사용) 후 URL 반환"""
+    digest = _digest(content)
+    filename = f"{name}.{digest}.{extension}"
+    path = os.path.join(BUILD_DIR, filename)
+    if not os.path.exists(path):
+        os.makedirs(BUILD_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return static_url(f"build/{filename}", digest)
+
+
+def build_image_asset(name, read_bytes):
+    """IMAGE_ASSETS 항목 1개를 최적화해 게시 → (URL, 최적화된 bytes) (원본이 없으면 (None, None))"""
+    spec = IMAGE_ASSETS[name]
+    content = read_bytes(spec.source)
+    if not content:
+        return None, None
+    optimized, extension = optimize_image(content, spec)
+    return publish(name, optimized, extension), optimized
+
+
+# ======================
+# 🔹 CSS
+# ======================
+def read_stylesheet():
+    with open(os.path.join(STATIC_DIR, STYLESHEET), "rb") as f:
+        return f.read()
+
+
+def stylesheet_html():
+    """인라인 <style> 블록 (정적 핸들러가 .css를 text/plain으로 보내므로 <link>는 사용하지 않음)"""
+    return f"<style>\n{read_stylesheet().decode('utf-8')}\n</style>"
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""테스트에서 앱 폴더의 모듈(audiogram, jobs, ...)을 바로 import 하도록 경로 추가"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import tarfile
+
+import pytest
+
+import artifact_backends
+from artifact_backends import TarballBackend, LocalDirectoryBackend, extract_bundle, safe_members
+
+
+def _bundle(path, files=None, links=()):
+    """files: {이름: 내용}, links: [(이름, 대상)] → tar.gz 번들"""
+    with tarfile.open(path, "w:gz") as tar:
+        for name, content in (files or {}).items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        for name, target in links:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tar.addfile(info)
+    return str(path)
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "models/../../evil.py", "/etc/evil.py"])
+def test_safe_members_rejects_paths_outside_dest(tmp_path, name):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"ok.py": b"", name: b"x"})
+    with tarfile.open(path) as tar, pytest.raises(ValueError):
+        safe_members(tar, str(tmp_path / "dest"))
+
+
+def test_safe_members_rejects_links(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", links=[("models/link", "/etc/passwd")])
+    with tarfile.open(path) as tar, pytest.raises(ValueError):
+        safe_members(tar, str(tmp_path / "dest"))
+
+
+def test_safe_members_accepts_nested_files(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"models/a.pkl": b"a", "./preprocessing.py": b"b"})
+    with tarfile.open(path) as tar:
+        assert [m.name for m in safe_members(tar, str(tmp_path / "dest"))] == ["models/a.pkl", "./preprocessing.py"]
+
+
+def test_extract_bundle_is_cached_and_complete(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"models/a.pkl": b"model"})
+    cache = tmp_path / "cache"
+
+    dest = extract_bundle(path, str(cache))
+    assert os.path.exists(os.path.join(dest, ".complete"))
+    with open(os.path.join(dest, "models", "a.pkl"), "rb") as f:
+        assert f.read() == b"model"
+    assert extract_bundle(path, str(cache)) == dest
+    # 임시 디렉터리는 남지 않음
+    assert os.listdir(cache) == [os.path.basename(dest)]
+
+
+def test_extract_bundle_replaces_partial_extraction(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"models/a.pkl": b"model"})
+    cache = tmp_path / "cache"
+    dest = extract_bundle(path, str(cache))
+    # 중단된 압축 해제: 완료 표시 없이 일부 파일만 있는 상태
+    os.remove(os.path.join(dest, ".complete"))
+    os.remove(os.path.join(dest, "models", "a.pkl"))
+
+    assert extract_bundle(path, str(cache)) == dest
+    assert os.path.exists(os.path.join(dest, "models", "a.pkl"))
+
+
+def test_extract_bundle_leaves_no_directory_on_unsafe_bundle(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"ok.py": b"", "../evil.py": b"x"})
+    cache = tmp_path / "cache"
+
+    with pytest.raises(ValueError):
+        extract_bundle(path, str(cache))
+    assert os.listdir(cache) == []
+    assert not (tmp_path / "evil.py").exists()
+
+
+def test_backends_read_by_path_and_basename(tmp_path):
+    path = _bundle(tmp_path / "bundle.tar.gz", {"models/wonju_lgbm.pkl": b"lgbm"})
+    backend = TarballBackend(path, cache_dir=str(tmp_path / "cache"))
+
+    assert backend.read_bytes("models/wonju_lgbm.pkl") == b"lgbm"
+    assert backend.read_bytes("wonju_lgbm.pkl") == b"lgbm"  # Drive처럼 파일명만으로도 찾음
+    assert backend.read_bytes("models/missing.pkl") is None
+    assert backend.describe() == f"tarball:{path}"
+
+
+def test_local_backend_from_env(tmp_path, monkeypatch):
+    monkeypatch.delenv(artifact_backends.ARTIFACT_DIR_ENV, raising=False)
+    assert artifact_backends.local_backend_from_env() is None
+
+    monkeypatch.setenv(artifact_backends.ARTIFACT_DIR_ENV, str(tmp_path))
+    assert isinstance(artifact_backends.local_backend_from_env(), LocalDirectoryBackend)
+
+    monkeypatch.setenv(artifact_backends.ARTIFACT_DIR_ENV, str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError):
+        artifact_backends.local_backend_from_env()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import audiogram  # noqa: E402
+
+
+def _values(rt, lt):
+    """귀별 7개 주파수 역치 → 단일 환자 pta_values dict"""
+    values = {}
+    for ear, thresholds in (("RT", rt), ("LT", lt)):
+        for freq, value in zip(audiogram.PTA_FREQUENCIES, thresholds):
+            values[audiogram.pta_column(ear, freq)] = value
+    return values
+
+
+def test_pta4_and_asymmetry_follow_affected_side():
+    audiograms = audiogram.audiogram_from_values(_values([70] * 7, [10] * 7))
+
+    right = audiogram.audiogram_features(audiograms, 1)
+    assert right["pta4_affected"][0] == 70
+    assert right["pta4_contralateral"][0] == 10
+    assert right["asymmetry"][0] == 60
+
+    left = audiogram.audiogram_features(audiograms, 2)
+    assert left["pta4_affected"][0] == 10
+    assert left["asymmetry"][0] == -60
+
+
+def test_hf_slope_is_db_per_octave():
+    # 1000 → 8000 Hz 에서 옥타브마다 10 dB 증가
+    octaves = np.log2(np.array([1000, 2000, 3000, 4000, 8000]) / 1000)
+    rt = [20, 20] + list(20 + 10 * octaves)
+    features = audiogram.audiogram_features(audiogram.audiogram_from_values(_values(rt, [10] * 7)), 1)
+    assert features["hf_slope"][0] == pytest.approx(10.0)
+
+
+def test_hf_slope_needs_two_points():
+    rt = [None, None, 40, None, None, None, None]
+    features = audiogram.audiogram_features(audiogram.audiogram_from_values(_values(rt, [10] * 7)), 1)
+    assert np.isnan(features["hf_slope"][0])
+
+
+def test_siegel_baselines():
+    features = audiogram.audiogram_features(audiogram.audiogram_from_values(_values([60] * 7, [30] * 7)), 1)
+    assert features["siegel_gain_to_complete"][0] == 35
+    assert features["siegel_max_gain"][0] == 30
+    assert bool(features["siegel_gain_measurable"][0])
+
+
+def test_out_of_range_values_are_excluded():
+    rt = [60, 60, 60, 999, 60, 60, 60]  # 2000 Hz 입력 오류
+    audiograms = audiogram.audiogram_from_values(_values(rt, [10] * 7))
+
+    features = audiogram.audiogram_features(audiograms, 1)
+    assert features["pta4_rt"][0] == 60
+    assert audiogram.range_errors(audiograms) == [["PTA_RT_AC_2000"]]
+    # 원본 배열은 바뀌지 않음
+    assert audiograms[0, 0, 3] == 999
+
+
+def test_missing_values_are_nan():
+    audiograms = audiogram.audiogram_from_values(_values([""] * 7, [None] * 7))
+    features = audiogram.audiogram_features(audiograms, 1)
+    assert np.isnan(features["pta4_rt"][0]) and np.isnan(features["pta4_lt"][0])
+
+
+def test_features_frame_matches_single_patient():
+    pd = pytest.importorskip("pandas")
+
+    values = _values([50, 55, 60, 65, 70, 75, 80], [10] * 7)
+    df = pd.DataFrame([dict(values, Side=1), dict(values, Side=2)])
+    features = audiogram.features_frame(df)
+    single = audiogram.audiogram_features(audiogram.audiogram_from_values(values), 1)
+
+    assert features.loc[0, "pta4_affected"] == pytest.approx(single["pta4_affected"][0])
+    assert features.loc[1, "pta4_affected"] == 10
+    assert (features["range_errors"] == "").all()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import cohort_ingest  # noqa: E402
+from cohort_ingest import downcast_chunk, read_chunks  # noqa: E402
+
+
+def test_downcast_chunk_dtypes_and_codes():
+    chunk = pd.DataFrame({
+        "ID": [12345678, 87654321],
+        "Sex": ["Male", "F"],
+        "Side": ["L", 1],
+        "PTA_RT_AC_250": ["30", "bad"],
+        "HL_duration": [3, None],
+        "Steroid": [1, None],
+    })
+    out = downcast_chunk(chunk)
+
+    assert out["ID"].tolist() == ["12345678", "87654321"]
+    assert out["Sex"].tolist() == [1, 2]
+    assert out["Side"].tolist() == [2, 1]
+    assert out["Sex"].dtype == np.int8 and out["Steroid"].dtype == np.int8
+    assert out["PTA_RT_AC_250"].dtype == np.float32
+    assert out["PTA_RT_AC_250"].iloc[0] == 30 and np.isnan(out["PTA_RT_AC_250"].iloc[1])
+    assert out["Steroid"].tolist() == [1, 0]
+
+
+def test_downcast_chunk_fills_missing_columns():
+    out = downcast_chunk(pd.DataFrame({"ID": ["a"]}, index=[7]))
+
+    assert list(out.index) == [7]
+    assert set(cohort_ingest.INPUT_COLUMNS) - set(out.columns) == {"Name", "Birth", "test_date"}
+    assert out["Side"].iloc[0] == 1  # 알 수 없으면 Right
+    assert out[cohort_ingest.FLAG_COLUMNS].eq(0).all(axis=None)
+    assert out[cohort_ingest.FLOAT_COLUMNS].isna().all(axis=None)
+
+
+def test_read_chunks_keeps_ids_as_text(tmp_path):
+    path = tmp_path / "cohort.csv"
+    pd.DataFrame({"ID": ["00012", "00034", "00056"], "Side": [1, 2, 1], "extra": [1, 2, 3]}).to_csv(path, index=False)
+
+    chunks = list(read_chunks(str(path), chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[0]["ID"].tolist() == ["00012", "00034"]
+    assert "extra" not in chunks[0]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import cohort_reports  # noqa: E402
+
+
+def test_row_labels_use_id_column():
+    chunk = pd.DataFrame({"ID": [123, 456]}, index=[10, 11])
+    assert cohort_reports._row_labels(chunk).tolist() == ["123", "456"]
+
+
+def test_row_labels_fall_back_to_row_index():
+    chunk = pd.DataFrame({"Side": [1, 2]}, index=[10, 11])
+    invalid = pd.Series([False, True], index=chunk.index)
+    assert cohort_reports._row_labels(chunk)[invalid].tolist() == ["row 11"]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import io
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import compiled_models  # noqa: E402
+from compiled_models import CompiledModel, load_compiled_model, with_compiled_models  # noqa: E402
+from model_store import compiled_model_path, compiled_reference_path  # noqa: E402
+
+
+class FakeOriginal:
+    """양성 확률 = 첫 번째 입력값"""
+    classes_ = np.array(["no", "yes"])
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        p = np.asarray(X, dtype=np.float64)[:, 0]
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(np.asarray(X)[:, 0] >= 0.5).astype(int)]
+
+
+class FakeSession:
+    """onnxruntime.InferenceSession 대역 (fail_after회 이후 실행 실패, offset만큼 출력 오차)"""
+
+    def __init__(self, fail_after=None, offset=0.0):
+        self.fail_after = fail_after
+        self.offset = offset
+        self.runs = 0
+        self.dtypes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input")]
+
+    def get_outputs(self):
+        return [SimpleNamespace(name="label"), SimpleNamespace(name="probabilities")]
+
+    def run(self, output_names, feeds):
+        assert output_names == ["probabilities"]
+        self.runs += 1
+        if self.fail_after is not None and self.runs > self.fail_after:
+            raise RuntimeError("onnxruntime 오류")
+        X = feeds["input"]
+        self.dtypes.append(X.dtype)
+        return [X[:, 0] + self.offset]  # 1차원 양성 확률
+
+
+X = pd.DataFrame({"a": [0.2, 0.7], "b": [1.0, 2.0]})
+
+
+def test_runs_onnx_with_float32_and_delegates_attributes():
+    session, original = FakeSession(), FakeOriginal()
+    compiled = CompiledModel(session, original, "lgbm")
+
+    probs = compiled.predict_proba(X)
+    assert probs.dtype == np.float64 and probs.shape == (2, 2)
+    assert probs[:, 1] == pytest.approx([0.2, 0.7])
+    assert session.dtypes == [np.float32]
+    assert compiled.predict(X).tolist() == ["no", "yes"]
+    assert original.calls == 0
+    assert compiled.classes_ is original.classes_
+
+
+def test_failure_switches_to_original_permanently(caplog):
+    session, original = FakeSession(fail_after=1), FakeOriginal()
+    compiled = CompiledModel(session, original, "xgb")
+    compiled.predict_proba(X)
+
+    with caplog.at_level("WARNING", logger="compiled_models"):
+        probs = compiled.predict_proba(X)
+    assert compiled.failed
+    assert probs[:, 1] == pytest.approx([0.2, 0.7])
+    assert "ONNX 실행 실패" in caplog.text
+
+    compiled.predict_proba(X)
+    compiled.predict(X)
+    assert session.runs == 2  # 실패 이후에는 ONNX를 다시 시도하지 않음
+    assert original.calls == 2
+
+
+class FakeBackend:
+    def __init__(self, files):
+        self.files = files
+
+    def read_bytes(self, path):
+        return self.files.get(path)
+
+
+def _backend(reference_dtype=np.float64):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, X=X.to_numpy(dtype=reference_dtype), columns=np.array(list(X.columns)))
+    return FakeBackend({compiled_model_path("wonju", "lgbm"): b"onnx",
+                        compiled_reference_path("wonju", "lgbm"): buf.getvalue()})
+
+
+@pytest.mark.parametrize("reference_dtype", [np.float64, np.float32])
+def test_load_checks_parity(monkeypatch, reference_dtype):
+    monkeypatch.setattr(compiled_models, "create_session", lambda model_bytes: FakeSession())
+    compiled = load_compiled_model(_backend(reference_dtype), "wonju", "lgbm", FakeOriginal())
+    assert isinstance(compiled, CompiledModel)
+
+
+def test_load_rejects_mismatch_and_missing_files(monkeypatch, caplog):
+    monkeypatch.setattr(compiled_models, "create_session", lambda model_bytes: FakeSession(offset=0.01))
+    with caplog.at_level("WARNING", logger="compiled_models"):
+        assert load_compiled_model(_backend(), "wonju", "lgbm", FakeOriginal()) is None
+    assert "출력 불일치" in caplog.text
+    assert load_compiled_model(FakeBackend({}), "wonju", "lgbm", FakeOriginal()) is None
+
+
+def test_load_failure_falls_back(monkeypatch):
+    def broken(model_bytes):
+        raise ImportError("onnxruntime 없음")
+
+    monkeypatch.setattr(compiled_models, "create_session", broken)
+    assert load_compiled_model(_backend(), "wonju", "lgbm", FakeOriginal()) is None
+
+
+def test_with_compiled_models_only_for_configured_hospitals(monkeypatch):
+    monkeypatch.setattr(compiled_models, "create_session", lambda model_bytes: FakeSession())
+    models = {"lgbm": FakeOriginal(), "scaler": object()}
+
+    monkeypatch.delenv(compiled_models.COMPILED_MODELS_ENV, raising=False)
+    assert with_compiled_models(_backend(), "wonju", models) is models
+
+    monkeypatch.setenv(compiled_models.COMPILED_MODELS_ENV, "wonju")
+    replaced = with_compiled_models(_backend(), "wonju", models)
+    assert isinstance(replaced["lgbm"], CompiledModel)
+    assert replaced["scaler"] is models["scaler"]
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import drift  # noqa: E402
+from drift import FeatureSketch, psi  # noqa: E402
+
+EDGES = np.linspace(0, 100, 11)
+
+
+def test_batch_updates_match_numpy_moments():
+    rng = np.random.default_rng(0)
+    values = rng.normal(50, 10, 1000)
+    sketch = FeatureSketch(EDGES)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+
+    assert sketch.n == 1000
+    assert sketch.mean == pytest.approx(values.mean())
+    assert sketch.std == pytest.approx(values.std(ddof=1))
+    assert sketch.min == values.min() and sketch.max == values.max()
+    assert sketch.counts.sum() == 1000
+
+
+def test_missing_and_out_of_range_values():
+    sketch = FeatureSketch(EDGES)
+    sketch.update([np.nan, -5, 150, 50])
+
+    assert sketch.missing == 1
+    assert sketch.n == 3
+    assert sketch.counts[0] == 1 and sketch.counts[-1] == 1  # underflow / overflow 구간
+
+
+def test_quantile_is_interpolated_within_bins():
+    sketch = FeatureSketch(EDGES)
+    sketch.update(np.arange(0.5, 100, 1.0))
+
+    assert sketch.quantile(0.5) == pytest.approx(50, abs=1)
+    assert sketch.quantile(0.0) >= sketch.min
+    assert sketch.quantile(1.0) <= sketch.max
+    assert FeatureSketch(EDGES).quantile(0.5) is None
+
+
+def test_round_trip_and_changed_bins():
+    sketch = FeatureSketch(EDGES)
+    sketch.update([10, 20, np.nan])
+    restored = FeatureSketch.from_dict(EDGES, sketch.to_dict())
+
+    assert restored.to_dict() == sketch.to_dict()
+    # 구간 정의가 바뀌면 새로 누적
+    assert FeatureSketch.from_dict(np.linspace(0, 100, 5), sketch.to_dict()).n == 0
+
+
+def test_psi():
+    assert psi([10, 20, 30], [10, 20, 30]) == pytest.approx(0.0)
+    assert psi([0, 0, 0], [1, 2, 3]) is None
+    shifted = psi([30, 20, 10], [10, 20, 30])
+    assert shifted > drift.PSI_DRIFT
+    assert psi([10, 20, 30], [30, 20, 10]) == pytest.approx(shifted)
+
+
+def test_drift_rows_status(tmp_path):
+    column = drift.MONITORED_FEATURES[0]
+    rng = np.random.default_rng(1)
+    reference = drift.build_sketches(pd.DataFrame({column: rng.normal(30, 5, 500)}))
+    collector = drift.DriftCollector(path=str(tmp_path / "stats.json"))
+    collector.observe("wonju", pd.DataFrame({column: rng.normal(80, 5, 100)}))
+    collector.observe("other", pd.DataFrame({column: rng.normal(30, 5, 10)}))
+
+    references = {"wonju": {k: v.to_dict() for k, v in reference.items()}}
+    rows = {row["hospital"]: row for row in drift.drift_rows(collector.snapshot(), references)
+            if row["feature"] == column}
+    assert rows["wonju"]["status"] == "drift"
+    assert rows["other"]["status"] == "-"  # 기준 분포 없음
+
+
+def test_collector_flush_and_reload(tmp_path):
+    path = str(tmp_path / "stats.json")
+    collector = drift.DriftCollector(path=path)
+    assert not collector.flush()  # 변경 없음
+    collector.observe("wonju", pd.DataFrame({"HL_duration": [3, 7, None]}))
+    assert collector.flush()
+
+    reloaded = drift.DriftCollector(path=path)
+    assert reloaded.snapshot() == collector.snapshot()
+
+
+def test_unreadable_stats_are_logged(tmp_path, caplog):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    with caplog.at_level("WARNING", logger="drift"):
+        collector = drift.DriftCollector(path=str(path))
+    assert collector.snapshot() == {}
+    assert "드리프트 통계 로드 실패" in caplog.text
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from google_clients import serialize_refresh  # noqa: E402
+
+
+class FakeCredentials:
+    def __init__(self, token="t0"):
+        self.token = token
+        self.valid = True
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f"t{self.refreshes}"
+        self.valid = True
+
+
+def test_refresh_runs_even_when_token_looks_valid():
+    # 401 후 AuthorizedSession이 부르는 refresh는 토큰이 유효해 보여도 실행되어야 함
+    credentials = serialize_refresh(FakeCredentials())
+    credentials.refresh(None)
+    credentials.refresh(None)
+    assert credentials.refreshes == 2
+    assert credentials.token == "t2"
+
+
+def test_concurrent_refresh_runs_once():
+    credentials = FakeCredentials()
+    entered, release = threading.Event(), threading.Event()
+    original = credentials.refresh
+
+    def slow_refresh(request):
+        entered.set()
+        release.wait(5)
+        original(request)
+
+    credentials.refresh = slow_refresh
+    serialize_refresh(credentials)
+
+    first = threading.Thread(target=credentials.refresh, args=(None,))
+    first.start()
+    entered.wait(5)
+    # 갱신 중에 들어온 스레드: 기존 토큰(t0)을 본 뒤 잠금을 기다림
+    second = threading.Thread(target=credentials.refresh, args=(None,))
+    second.start()
+    time.sleep(0.1)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert credentials.refreshes == 1
+    assert credentials.token == "t1"
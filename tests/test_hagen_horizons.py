@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from hagen_horizons import HAGEN_HORIZONS, score_horizons, trajectory_frame  # noqa: E402
+
+
+class FakeContext:
+    """predict → predict_outcome 11개 반환값 (기간별 확률), fail이면 예외"""
+
+    def __init__(self, prob, second_model="MLP", fail=False):
+        self.prob = prob
+        self.fail = fail
+        self.bundle = SimpleNamespace(second_model_name=second_model, lgbm_acc=0.8, second_acc=0.7)
+        self.inputs = []
+
+    def predict(self, df):
+        self.inputs.append(df)
+        if self.fail:
+            raise RuntimeError("predictor 오류")
+        df["mutated"] = 1  # predictor가 입력을 수정해도 다른 기간에 영향 없음
+        outputs = [None] * 11
+        outputs[1], outputs[3] = [self.prob], [self.prob / 2]
+        return outputs
+
+
+@pytest.fixture
+def df_input():
+    return pd.DataFrame([{"ID": "p1", "Side": 1}])
+
+
+def test_all_horizons_in_day_order(df_input):
+    contexts = {name: FakeContext(days / 200) for days, name in HAGEN_HORIZONS.items()}
+    predictions = score_horizons(df_input, contexts.__getitem__)
+
+    assert list(predictions) == [30, 60, 180]
+    assert all(p.ok for p in predictions.values())
+    assert predictions[60].lgbm_prob == pytest.approx(0.3)
+    assert predictions[60].second_prob == pytest.approx(0.15)
+    assert "mutated" not in df_input
+
+
+def test_failing_predictor_is_isolated(df_input):
+    contexts = {name: FakeContext(0.5, fail=days == 60) for days, name in HAGEN_HORIZONS.items()}
+    predictions = score_horizons(df_input, contexts.__getitem__)
+
+    assert predictions[30].ok and predictions[180].ok
+    failed = predictions[60]
+    assert not failed.ok
+    assert "predictor 오류" in failed.error
+    assert failed.lgbm_prob is None and failed.inference is contexts[HAGEN_HORIZONS[60]]
+
+
+def test_failing_context_is_isolated(df_input):
+    def factory(module_name):
+        if module_name == HAGEN_HORIZONS[30]:
+            raise ImportError("번들 없음")
+        return FakeContext(0.4)
+
+    predictions = score_horizons(df_input, factory)
+    assert list(predictions) == [30, 60, 180]
+    assert not predictions[30].ok and predictions[30].inference is None
+    assert "번들 없음" in predictions[30].error
+    assert predictions[60].ok and predictions[180].ok
+
+
+def test_horizons_run_in_parallel(df_input):
+    barrier = threading.Barrier(len(HAGEN_HORIZONS), timeout=5)
+
+    class WaitingContext(FakeContext):
+        def predict(self, df):
+            barrier.wait()  # 순차 실행이면 BrokenBarrierError
+            return super().predict(df)
+
+    predictions = score_horizons(df_input, lambda name: WaitingContext(0.5))
+    assert all(p.ok for p in predictions.values())
+
+
+def test_trajectory_frame(df_input):
+    contexts = {name: FakeContext(0.6, second_model="XGBoost" if days == 60 else "MLP")
+                for days, name in HAGEN_HORIZONS.items()}
+    df = trajectory_frame(score_horizons(df_input, contexts.__getitem__))
+
+    assert df["days"].tolist() == [30, 60, 180]
+    assert df["second_model"].tolist() == ["MLP", "XGBoost", "MLP"]
+    assert df["lgbm_prob"].tolist() == pytest.approx([0.6] * 3)
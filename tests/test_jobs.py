@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+
+import pytest
+
+import jobs
+from jobs import JobStore, JobCancelled
+
+DEAD_PID = 2 ** 22 + 1  # pid_max보다 큰 값: 살아 있는 프로세스가 없음
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path))
+
+
+def test_submit_and_claim_in_order(store):
+    first = store.submit("score", {"cohort": "a.csv"})
+    second = store.submit("reports", {"cohort": "b.csv"})
+
+    job = store.claim_next(os.getpid())
+    assert job["id"] == first
+    assert job["status"] == "running" and job["attempts"] == 1
+    assert job["params"] == {"cohort": "a.csv"}
+    assert store.claim_next(os.getpid())["id"] == second
+    assert store.claim_next(os.getpid()) is None
+
+
+def test_unknown_kind_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.submit("train", {})
+
+
+def test_cancel_queued_job(store):
+    job_id = store.submit("score", {})
+    store.cancel(job_id)
+
+    assert store.get(job_id)["status"] == "cancelled"
+    assert store.claim_next(os.getpid()) is None
+
+
+def test_cancel_running_job_stops_at_next_report(store):
+    job_id = store.submit("score", {})
+    store.claim_next(os.getpid())
+    store.report(job_id, 10, 100, "청크 1")
+    store.cancel(job_id)
+
+    with pytest.raises(JobCancelled):
+        store.report(job_id, 20)
+    job = store.get(job_id)
+    assert job["status"] == "running"
+    assert (job["progress_done"], job["progress_total"], job["message"]) == (20, 100, "청크 1")
+
+
+def test_run_job_records_outcome_and_removes_input(store, monkeypatch):
+    job_id = store.new_job_id()
+    cohort = os.path.join(store.job_dir(job_id), "cohort.csv")
+    with open(cohort, "w") as f:
+        f.write("ID\n1\n")
+    store.submit("score", {"cohort": cohort}, job_id)
+
+    def runner(store, job):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.RUNNERS, "score", runner)
+    jobs.run_job(store, store.claim_next(os.getpid()))
+    job = store.get(job_id)
+    assert job["status"] == "failed" and job["error"] == "RuntimeError: boom"
+    assert not os.path.exists(cohort)
+
+
+def test_remove_input_ignores_paths_outside_job_dir(store, tmp_path):
+    outside = tmp_path / "cohort.csv"
+    outside.write_text("ID\n")
+    job_id = store.submit("score", {"cohort": str(outside)})
+
+    store.remove_input(store.get(job_id))
+    assert outside.exists()
+
+
+def test_requeue_orphans_until_max_attempts(store):
+    job_id = store.submit("score", {})
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        assert store.claim_next(DEAD_PID)["attempts"] == attempt
+        assert store.requeue_orphans() == 1
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"]
+    assert store.claim_next(os.getpid()) is None
+
+
+def test_requeue_orphans_finishes_cancelled_jobs(store):
+    job_id = store.submit("score", {})
+    store.claim_next(DEAD_PID)
+    store.cancel(job_id)
+
+    assert store.requeue_orphans() == 1
+    job = store.get(job_id)
+    assert job["status"] == "cancelled" and job["finished_at"]
+    assert store.claim_next(os.getpid()) is None
+
+
+def test_requeue_orphans_keeps_live_workers(store):
+    job_id = store.submit("score", {})
+    store.claim_next(os.getpid())
+
+    assert store.requeue_orphans() == 0
+    assert store.get(job_id)["status"] == "running"
+
+
+def test_purge_old_finished_jobs(store):
+    old = store.submit("score", {})
+    recent = store.submit("score", {})
+    queued = store.submit("score", {})
+    for job_id in (old, recent):
+        store.finish(job_id, "done")
+        store.job_dir(job_id)
+    store._connect().execute(
+        "UPDATE jobs SET finished_at = datetime('now', 'localtime', '-10 days'), "
+        "created_at = datetime('now', 'localtime', '-10 days') WHERE id IN (?, ?)", (old, queued))
+
+    assert store.purge(0) == 0  # 0일이면 삭제하지 않음
+    assert store.purge(7) == 1
+    assert store.get(old) is None and not os.path.exists(os.path.join(store.root, old))
+    assert store.get(recent) is not None and os.path.exists(os.path.join(store.root, recent))
+    assert store.get(queued)["status"] == "queued"
+
+
+def test_migrates_table_without_attempts(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "jobs.sqlite3"))
+    conn.executescript(jobs.SCHEMA.replace("attempts         INTEGER NOT NULL DEFAULT 0,", ""))
+    conn.execute("INSERT INTO jobs (id, kind, params) VALUES ('old', 'score', '{}')")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(str(tmp_path))
+    assert store.get("old")["attempts"] == 0
+    assert store.claim_next(os.getpid())["attempts"] == 1
+
+
+def test_env_settings(monkeypatch):
+    monkeypatch.setenv(jobs.JOB_WORKERS_ENV, "bad")
+    assert jobs.default_worker_count() == jobs.DEFAULT_WORKERS
+    monkeypatch.setenv(jobs.JOB_RETENTION_ENV, "-3")
+    assert jobs.retention_days() == 0
+    monkeypatch.delenv("SSNHL_ARTIFACT_DIR", raising=False)
+    assert not jobs.artifact_dir_configured()
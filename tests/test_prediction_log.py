@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import types
+
+import pytest
+
+from prediction_log import PredictionLog, SheetsMirror
+
+
+@pytest.fixture
+def log(tmp_path):
+    return PredictionLog(str(tmp_path / "predictions.sqlite3"))
+
+
+def _record(patient_id, timestamp, hsptcd="A", **extra):
+    return {"id": patient_id, "timestamp": timestamp, "hsptcd": hsptcd, "hospital": "wonju", **extra}
+
+
+def test_append_and_get(log):
+    prediction_id = log.append(_record(123, "2025-01-01 10:00", Age=60), lgbm_prob="0.7", second_prob="n/a")
+    row = log.get(prediction_id)
+
+    assert row["patient_id"] == "123"
+    assert row["data"]["Age"] == 60
+    assert row["lgbm_prob"] == 0.7
+    assert row["second_prob"] is None
+    assert log.get(prediction_id + 1) is None
+
+
+def test_latest_and_history(log):
+    first = log.append(_record("p1", "2025-01-01 10:00"))
+    second = log.append(_record("p1", "2025-02-01 10:00", hsptcd="B"))
+    log.append(_record("p2", "2025-03-01 10:00"))
+
+    assert log.latest("p1")["id"] == second
+    assert log.latest("p1", hsptcd="A")["id"] == first
+    assert log.latest("missing") is None
+    assert [row["id"] for row in log.history("p1")] == [second, first]
+
+
+def test_latest_is_scoped_to_given_ids(log):
+    first = log.append(_record("p1", "2025-01-01 10:00"))
+    log.append(_record("p1", "2025-02-01 10:00"))
+
+    assert log.latest("p1", prediction_ids=[first])["id"] == first
+    assert log.latest("p1", prediction_ids=[]) is None
+
+
+def test_query(log):
+    pytest.importorskip("pandas")
+    log.append(_record("p1", "2025-01-01 10:00", Age=60), lgbm_prob=0.2)
+    log.append(_record("p2", "2025-02-01 10:00", Age=70), lgbm_prob=0.8)
+
+    df = log.query(since="2025-01-15")
+    assert df["id"].tolist() == ["p2"]
+    assert df["lgbm_prob"].tolist() == [0.8]
+
+
+def test_pending_sync(log):
+    first = log.append(_record("p1", "2025-01-01 10:00"))
+    second = log.append(_record("p2", "2025-01-02 10:00"))
+    log.mark_synced(first)
+    log.mark_synced(first)  # 중복 표시는 무시
+
+    assert [row["id"] for row in log.pending_sync()] == [second]
+
+
+def test_mirror_sync_one(log):
+    saved = []
+    prediction_id = log.append(_record("p1", "2025-01-01 10:00"))
+
+    def failing(record):
+        raise ConnectionError("quota")
+
+    assert not SheetsMirror(log, failing).sync_one(prediction_id)
+    assert not SheetsMirror(log, lambda record: False).sync_one(prediction_id)
+    assert log.pending_sync()
+
+    assert SheetsMirror(log, lambda record: saved.append(record) or True).sync_one(prediction_id)
+    assert saved[0]["id"] == "p1"
+    assert not log.pending_sync()
+    # 없는 기록은 성공으로 간주 (재시도하지 않음)
+    assert SheetsMirror(log, failing).sync_one(prediction_id + 100)
+
+
+def test_mirror_retry_delay_backs_off():
+    mirror = SheetsMirror(None, None, retry_base=5, retry_max=30)
+    delays = []
+    for failures in range(5):
+        mirror.failures = failures
+        delays.append(mirror.retry_delay())
+    assert delays == [5, 5, 10, 20, 30]
+
+
+def test_mirror_start_and_enqueue_save_once(log):
+    saved = []
+    prediction_id = log.append(_record("p1", "2025-01-01 10:00"))
+    mirror = SheetsMirror(log, lambda record: saved.append(record["id"]) or True)
+    mirror._thread = types.SimpleNamespace(start=lambda: None)  # 복제 스레드 대신 큐를 직접 처리
+
+    mirror.start()  # 미복제 기록(prediction_id)을 큐에 넣음
+    mirror.enqueue(prediction_id)  # main.py가 같은 id를 다시 넣음
+    assert mirror._queue.qsize() == 2
+    while not mirror._queue.empty():
+        mirror.sync_one(mirror._queue.get())
+
+    assert saved == ["p1"]
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import sys
+import importlib
+
+import pytest
+
+import predictor_loader
+from predictor_loader import ArtifactModuleRegistry, shared_registry
+
+MODULE_PATHS = {"predictors.demo": "predictors/demo.py", "ssnhl_test_helper": "helper.py"}
+
+
+class FakeArtifacts:
+    """경로 → 소스 (fetch 횟수 기록)"""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self.fetches = []
+
+    def __call__(self, path):
+        self.fetches.append(path)
+        content = self.files.get(path)
+        return content.encode("utf-8") if content is not None else None
+
+
+@pytest.fixture(autouse=True)
+def clean_import_state():
+    yield
+    sys.meta_path[:] = [f for f in sys.meta_path if not isinstance(f, ArtifactModuleRegistry)]
+    for name in ["predictors", *MODULE_PATHS]:
+        sys.modules.pop(name, None)
+    predictor_loader._shared.clear()
+
+
+def _registry(files):
+    artifacts = FakeArtifacts(files)
+    return ArtifactModuleRegistry(artifacts, MODULE_PATHS), artifacts
+
+
+def test_imports_from_memory_once():
+    registry, artifacts = _registry({
+        "helper.py": "VALUE = 1\n",
+        "predictors/demo.py": "from ssnhl_test_helper import VALUE\nRESULT = VALUE + 1\n",
+    })
+    registry.install()
+
+    demo = importlib.import_module("predictors.demo")
+    assert demo.RESULT == 2
+    assert demo.__spec__.origin == "artifact://predictors/demo.py"
+    importlib.import_module("predictors.demo")
+    assert artifacts.fetches.count("predictors/demo.py") == 1
+
+
+def test_missing_artifact_is_not_found():
+    registry, _ = _registry({})
+    registry.install()
+    with pytest.raises(ImportError):
+        importlib.import_module("ssnhl_test_helper")
+    assert registry.prefetch(["helper.py"]) == ["helper.py"]
+
+
+def test_reload_only_when_source_changes():
+    registry, artifacts = _registry({"helper.py": "VALUE = 1\n"})
+    registry.install()
+    assert importlib.import_module("ssnhl_test_helper").VALUE == 1
+
+    assert registry.reload() == []
+    assert registry.generation == 0
+    assert "ssnhl_test_helper" in sys.modules
+
+    artifacts.files["helper.py"] = "VALUE = 2\n"
+    assert registry.reload() == ["helper.py"]
+    assert registry.generation == 1
+    assert importlib.import_module("ssnhl_test_helper").VALUE == 2
+
+
+def test_install_keeps_a_single_registry():
+    first, _ = _registry({"helper.py": "VALUE = 1\n"})
+    first.install()
+    assert importlib.import_module("ssnhl_test_helper").VALUE == 1
+
+    second, _ = _registry({"helper.py": "VALUE = 2\n"})
+    second.install()
+    second.install()
+    registries = [f for f in sys.meta_path if isinstance(f, ArtifactModuleRegistry)]
+    assert registries == [second]
+    # 이전 registry로 import된 모듈은 새 registry 소스로 다시 import
+    assert importlib.import_module("ssnhl_test_helper").VALUE == 2
+
+
+def test_shared_registry_reuses_registry_per_key():
+    artifacts = FakeArtifacts({})
+    first = shared_registry("/artifacts/a", artifacts)
+    assert shared_registry("/artifacts/a", artifacts) is first
+
+    other = shared_registry("/artifacts/b", artifacts)
+    assert other is not first
+    assert [f for f in sys.meta_path if isinstance(f, ArtifactModuleRegistry)] == [other]
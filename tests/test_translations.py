@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import os
+import types
+
+import pytest
+
+import translations
+from model_store import translation_catalog_path
+
+TRANSLATE_TEXTS = '''
+texts_ko = {"제목": "예측", 1: "하나"}
+texts_en_us = {"제목": "Prediction", "개인정보 동의 요청": "Please agree."}
+'''
+
+
+def _texts_module():
+    namespace = {}
+    exec(TRANSLATE_TEXTS, namespace)
+    return types.SimpleNamespace(**{k: v for k, v in namespace.items() if k.startswith("texts_")})
+
+
+def test_language_options_cover_catalogs():
+    assert set(translations.LANGUAGE_OPTIONS.values()) == set(translations.CATALOG_VARIABLES)
+    assert translations.CATALOG_VARIABLES["en-us"] == "texts_en_us"
+
+
+def test_compile_catalog_prefers_translate_texts():
+    catalog = translations.compile_catalog({"개인정보 동의 요청": "Please agree.", 1: "one"}, "en-us")
+
+    assert catalog["개인정보 동의 요청"] == "Please agree."
+    assert catalog["개인정보 수집 및 이용 동의"] == "Consent to Data Collection and Use"
+    assert catalog["1"] == "one"  # JSON과 같게 키는 문자열
+
+
+def test_compile_catalog_falls_back_to_korean_inline_text():
+    catalog = translations.compile_catalog({}, "xx")
+    assert catalog["개인정보 수집 및 이용 동의"] == "개인정보 수집 및 이용 동의"
+
+
+def test_encoded_catalog_round_trips_read_only():
+    catalog = translations.compile_catalog({"제목": "예측"}, "ko")
+    decoded = translations.decode_catalog(translations.encode_catalog(catalog))
+
+    assert dict(decoded) == catalog
+    assert translations.decode_catalog(translations.encode_catalog(catalog).decode("utf-8")) == decoded
+    with pytest.raises(TypeError):
+        decoded["제목"] = "변경"
+
+
+def test_load_catalog_prefers_compiled_artifact():
+    compiled = translations.encode_catalog({"제목": "compiled"})
+
+    def read_bytes(path):
+        assert path == translation_catalog_path("ja")
+        return compiled
+
+    def import_texts_module():
+        raise AssertionError("컴파일된 카탈로그가 있으면 translate_texts를 읽지 않음")
+
+    assert translations.load_catalog(read_bytes, "ja", import_texts_module)["제목"] == "compiled"
+
+
+def test_load_catalog_falls_back_to_translate_texts():
+    catalog = translations.load_catalog(lambda path: None, "en-us", _texts_module)
+    assert catalog["제목"] == "Prediction"
+
+    # 알 수 없는 언어 / translate_texts에 없는 언어는 한국어
+    assert translations.load_catalog(lambda path: None, "xx", _texts_module)["제목"] == "예측"
+    assert translations.load_catalog(lambda path: None, "ja", _texts_module)["제목"] == "예측"
+
+
+def test_build_catalogs(tmp_path):
+    (tmp_path / "translate_texts.py").write_text(TRANSLATE_TEXTS, encoding="utf-8")
+    written = translations.build_catalogs(str(tmp_path))
+
+    assert set(written) == {"ko", "en-us"}
+    with open(os.path.join(tmp_path, translation_catalog_path("en-us")), "rb") as f:
+        assert translations.decode_catalog(f.read())["제목"] == "Prediction"
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("pandas")
+
+import warmup  # noqa: E402
+
+
+@pytest.fixture
+def status():
+    original = warmup.get_status()
+
+    def set_status(value):
+        warmup._update_state(status=value)
+
+    yield set_status
+    warmup._update_state(**original)
+
+
+def test_degraded_is_not_ready_by_default(status):
+    status("ready")
+    assert warmup.is_ready()
+
+    status("degraded")
+    assert not warmup.is_ready(allow_degraded=False)
+    assert warmup.is_ready(allow_degraded=True)
+
+    for value in ("starting", "warming", "failed"):
+        status(value)
+        assert not warmup.is_ready(allow_degraded=True)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+import whatif  # noqa: E402
+from whatif import build_whatif_grid, run_whatif, normalize_value  # noqa: E402
+
+
+@pytest.fixture
+def df_input():
+    return pd.DataFrame([{"ID": "p1", "WBC": 15.0, "Na": 140.0, "Side": 1}])
+
+
+def test_normalize_value():
+    assert normalize_value(15.0, (4.0, 10.0)) == 10.0
+    assert normalize_value(2.0, (4.0, 10.0)) == 4.0
+    assert normalize_value(5.0, (4.0, 10.0)) == 5.0
+    assert np.isnan(normalize_value(np.nan, (4.0, 10.0)))
+
+
+def test_grid_layout(df_input):
+    grid, segments = build_whatif_grid(df_input, ["WBC", "Na", "Missing"], n_points=5)
+
+    # 기준 행 + 정상화 행 + 변수별 격자 5행 (없는 컬럼은 제외)
+    assert len(grid) == 2 + 2 * 5
+    assert list(segments) == ["WBC", "Na"]
+    assert grid.at[0, "WBC"] == 15.0 and grid.at[1, "WBC"] == 10.0
+    start, values = segments["Na"]
+    assert grid["Na"].iloc[start:start + 5].tolist() == pytest.approx(np.linspace(120, 160, 5))
+    # 다른 변수는 기준값 유지, ID는 행마다 고유
+    assert (grid["WBC"].iloc[start:start + 5] == 15.0).all()
+    assert grid["ID"].is_unique and grid.at[0, "ID"] == "p1_whatif_0"
+    assert df_input.at[0, "ID"] == "p1"
+
+
+def test_run_whatif_predicts_grid_in_one_batch(df_input):
+    calls = []
+
+    def predict_fn(grid):
+        calls.append(len(grid))
+        outputs = [None] * 11
+        outputs[1] = grid["WBC"].to_numpy() / 20   # LightGBM: WBC에 비례
+        outputs[3] = 1 - grid["WBC"].to_numpy() / 20
+        return outputs
+
+    result = run_whatif(predict_fn, df_input, ["WBC", "Na"], n_points=5)
+
+    assert calls == [12]
+    assert result.baseline == pytest.approx((0.75, 0.25))
+    assert result.normalized == pytest.approx((0.5, 0.5))
+    assert result.normalized_values == {"WBC": (15.0, 10.0)}  # Na는 정상범위
+    curve = result.curves["WBC"]
+    assert curve["value"].tolist() == pytest.approx(np.linspace(0, 20, 5))
+    assert curve["lgbm_prob"].tolist() == pytest.approx(np.linspace(0, 1, 5))
+    assert (result.curves["Na"]["lgbm_prob"] == 0.75).all()
+
+
+def test_run_whatif_rejects_row_mismatch(df_input):
+    def predict_fn(grid):
+        outputs = [None] * 11
+        outputs[1] = outputs[3] = np.zeros(len(grid) - 1)  # predictor가 행을 합친 경우
+        return outputs
+
+    with pytest.raises(ValueError):
+        run_whatif(predict_fn, df_input, ["WBC"], n_points=5)
+
+
+def test_default_xlim_for_unknown_feature(df_input):
+    df_input["CRP"] = 1.0
+    _, segments = build_whatif_grid(df_input, ["CRP"], n_points=3)
+    assert segments["CRP"][1].tolist() == list(np.linspace(*whatif.DEFAULT_XLIM, 3))
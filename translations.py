@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+언어별 번역 카탈로그
+
+translate_texts.py의 texts_* 사전 8개와 main.py에 있던 인라인 문구(개인정보 동의 등)를
+언어별 JSON 아티팩트(i18n/<언어>.json)로 미리 컴파일해 두고,
+앱은 선택된 언어의 카탈로그 1개만 읽어 프로세스 단위로 캐시한다 (artifacts.get_translation_catalog).
+카탈로그가 아직 없으면 translate_texts.py에서 해당 언어 사전을 꺼내 같은 형태로 만든다.
+
+빌드 (Google Drive 폴더를 로컬에 내려받은 디렉터리 기준):
+    python translations.py --artifact-dir ./drive_mirror
+"""
+import os
+import sys
+import json
+import runpy
+import argparse
+from types import MappingProxyType
+
+from model_store import TRANSLATION_LANGUAGES, translation_catalog_path
+
+# 사이드바 언어 선택 라벨 → 언어 코드
+LANGUAGE_OPTIONS = {
+    "한국어": "ko",
+    "English": "en-us",
+    "日本語": "ja",
+    "中文": "zh",
+    "Español": "es",
+    "Deutsch": "de",
+    "हिन्दी": "hi",
+    "العربية": "ar",
+}
+DEFAULT_LANGUAGE = "ko"
+
+# 언어 코드 → translate_texts.py 변수명
+CATALOG_VARIABLES = {code: "texts_" + code.replace("-", "_") for code in TRANSLATION_LANGUAGES}
+
+# translate_texts.py에 없는 문구 (키 → 언어별 문구)
+INLINE_TEXTS = {
+    "개인정보 수집 및 이용 동의": {
+        "ko": "개인정보 수집 및 이용 동의",
+        "en-us": "Consent to Data Collection and Use",
+        "ja": "個人情報の収集および利用への同意",
+        "zh": "个人信息收集和使用同意",
+        "es": "Consentimiento de recopilación y uso de datos",
+        "de": "Einwilligung zur Datenerhebung und -nutzung",
+        "hi": "डेटा संग्रह और उपयोग की सहमति",
+        "ar": "الموافقة على جمع واستخدام البيانات",
+    },
+    "개인정보 동의 요청": {
+        "ko": "⚠️ 개인정보 수집 및 이용에 동의해주세요.",
+        "en-us": "⚠️ Please consent to data collection and use.",
+        "ja": "⚠️ 個人情報の収集および利用に同意してください。",
+        "zh": "⚠️ 请同意个人信息收集和使用。",
+        "es": "⚠️ Por favor, consienta la recopilación y uso de datos.",
+        "de": "⚠️ Bitte stimmen Sie der Datenerhebung und -nutzung zu.",
+        "hi": "⚠️ कृपया डेटा संग्रह और उपयोग के लिए सहमति दें।",
+        "ar": "⚠️ يرجى الموافقة على جمع واستخدام البيانات.",
+    },
+}
+
+
+# ======================
+# 🔹 카탈로그 생성 / 로드
+# ======================
+def compile_catalog(texts, lang_code):
+    """번역 사전 + 인라인 문구 → 카탈로그 dict (translate_texts 값이 우선)"""
+    catalog = {key: values.get(lang_code, values[DEFAULT_LANGUAGE]) for key, values in INLINE_TEXTS.items()}
+    catalog.update({str(key): value for key, value in texts.items()})
+    return catalog
+
+
+def encode_catalog(catalog):
+    return json.dumps(catalog, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def decode_catalog(content):
+    """읽기 전용 카탈로그 (캐시된 객체를 여러 세션이 공유하므로 수정 불가)"""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    return MappingProxyType(json.loads(content))
+
+
+def catalog_from_texts_module(module, lang_code):
+    """translate_texts 모듈(또는 run_path 결과 dict)에서 언어 1개의 카탈로그 생성"""
+    namespace = module if isinstance(module, dict) else vars(module)
+    texts = namespace.get(CATALOG_VARIABLES.get(lang_code, "")) or namespace[CATALOG_VARIABLES[DEFAULT_LANGUAGE]]
+    return MappingProxyType(compile_catalog(texts, lang_code))
+
+
+def load_catalog(read_bytes, lang_code, import_texts_module):
+    """컴파일된 카탈로그를 읽고, 없으면 translate_texts에서 생성
+
+    read_bytes(path) -> bytes | None, import_texts_module() -> translate_texts 모듈
+    """
+    if lang_code not in CATALOG_VARIABLES:
+        lang_code = DEFAULT_LANGUAGE
+    content = read_bytes(translation_catalog_path(lang_code))
+    if content:
+        return decode_catalog(content)
+    return catalog_from_texts_module(import_texts_module(), lang_code)
+
+
+# ======================
+# 🔹 빌드 (CLI)
+# ======================
+def build_catalogs(artifact_dir):
+    """artifact_dir/translate_texts.py → artifact_dir/i18n/<언어>.json"""
+    namespace = runpy.run_path(os.path.join(artifact_dir, "translate_texts.py"))
+    written = {}
+    for lang_code, variable in CATALOG_VARIABLES.items():
+        if variable not in namespace:
+            print(f"⚠️ translate_texts.py에 {variable}이(가) 없습니다.")
+            continue
+        content = encode_catalog(compile_catalog(namespace[variable], lang_code))
+        dest = os.path.join(artifact_dir, translation_catalog_path(lang_code))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, "wb") as f:
+            f.write(content)
+        written[lang_code] = len(content)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="언어별 번역 카탈로그 생성 (translate_texts.py → i18n/*.json)")
+    parser.add_argument("--artifact-dir", required=True, help="translate_texts.py 가 있는 로컬 디렉터리")
+    args = parser.parse_args(argv)
+
+    artifact_dir = os.path.abspath(args.artifact_dir)
+    for lang_code, size in build_catalogs(artifact_dir).items():
+        print(f"✅ {translation_catalog_path(lang_code)}: {size:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+"""
+배포 직후 warm-up 및 health / readiness 신호
+
+가상의 환자 1명을 모든 병원 predictor / 모델 / SHAP explainer에 통과시켜
+Drive 인증, 다운로드, unpickle, LightGBM/XGBoost 첫 호출 비용, explainer 생성,
+matplotlib 폰트 캐시 생성을 첫 사용자 대신 부팅 시점에 처리한다.
+
+    GET /healthz  → 프로세스 생존 여부 (항상 200)
+    GET /readyz   → warm-up 완료(ready) 시 200, 그 전 / 실패 / degraded 시 503 (로드밸런서 readiness probe용)
+                    본문의 failed_steps / errors 에 실패한 단계가 담긴다
+    POST /reload  → 아티팩트 hot-reload 후 다시 warm-up (?models=1 이면 모델도 다시 로드)
+                    Authorization: Bearer <admin_token> 필요, warm-up 진행 중이면 409
+
+health 서버는 기본적으로 127.0.0.1 에만 열린다. 배포 시에는 serve.py --health-host 로
+로드밸런서가 접근할 수 있는 주소(pod IP 등)를 반드시 지정한다.
+
+실패한 단계는 backoff 후 다시 시도한다 (SSNHL_WARMUP_ATTEMPTS, 기본 3회).
+필수 단계(모듈 / predictor / 모델)는 성공했지만 일부 병원 / 부가 자산 warm-up이 실패하면 degraded 상태가 되고,
+기본적으로 트래픽을 받지 않는다 (SSNHL_READY_WHEN_DEGRADED=1 이면 degraded도 200).
+"""
+import io
+import os
+import hmac
+import json
+import time
+import datetime
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from model_store import MODEL_FILES
+
+HEALTH_HOST = os.environ.get("SSNHL_HEALTH_HOST", "127.0.0.1")
+HEALTH_PORT = int(os.environ.get("SSNHL_HEALTH_PORT", "8502"))
+READY_WHEN_DEGRADED = os.environ.get("SSNHL_READY_WHEN_DEGRADED", "").lower() in ("1", "true", "yes")
+WARMUP_ATTEMPTS = int(os.environ.get("SSNHL_WARMUP_ATTEMPTS", "3"))
+RETRY_BACKOFF = 2.0  # 초, 재시도마다 2배
+REQUIRED_STEPS = ("modules", "predictors", "models")
+
+# ======================
+# 🔹 readiness 상태
+# ======================
+_state_lock = threading.Lock()
+_state = {
+    "status": "starting",   # starting → warming → ready | degraded | failed
+    "started_at": time.time(),
+    "elapsed_sec": None,
+    "steps": {},
+    "failed_steps": [],
+    "errors": {},
+}
+
+
+def _update_state(**kwargs):
+    with _state_lock:
+        _state.update(kwargs)
+
+
+def _record_step(name, seconds, error=None):
+    with _state_lock:
+        _state["steps"][name] = round(seconds, 3)
+        if error:
+            _state["errors"][name] = error
+        else:
+            _state["errors"].pop(name, None)
+
+
+def get_status():
+    """현재 readiness 상태 (dict 복사본)"""
+    with _state_lock:
+        return json.loads(json.dumps(_state))
+
+
+def is_ready(allow_degraded=None):
+    """모든 단계가 warm-up 됐는지 (degraded는 SSNHL_READY_WHEN_DEGRADED 로 허용한 경우만)"""
+    if allow_degraded is None:
+        allow_degraded = READY_WHEN_DEGRADED
+    with _state_lock:
+        return _state["status"] == "ready" or (allow_degraded and _state["status"] == "degraded")
+
+
+# ======================
+# 🔹 가상 환자
+# ======================
+def build_synthetic_patient():
+    """main.py 입력 폼과 동일한 컬럼을 가진 가상 환자 1명"""
+    pta_values = {}
+    for freq, rt, lt in zip(["250", "500", "1000", "2000", "3000", "4000", "8000"],
+                            [55, 60, 65, 70, 70, 75, 80],
+                            [15, 15, 20, 20, 25, 30, 35]):
+        pta_values[f"PTA_RT_AC_{freq}"] = float(rt)
+        pta_values[f"PTA_LT_AC_{freq}"] = float(lt)
+
+    blood_values = {
+        "WBC": 7.0, "RBC": 4.5, "Hb": 14.0, "PLT": 250.0, "Neutrophil": 60.0, "Lymphocyte": 30.0,
+        "AST": 20.0, "ALT": 20.0, "BUN": 12.0, "Cr": 0.8, "Glucose": 95.0, "Total_Protein": 7.0,
+        "Na": 140.0, "K": 4.2, "Cl": 102.0
+    }
+    diagnosis_values = {dx: 0 for dx in ["Dx_COM", "Dx_SSNHL", "Dx_Dizziness", "Dx_Tinnitus"]}
+    history_values = {hx: 0 for hx in ["Hx_HTN", "Hx_DM", "Hx_CRF", "Hx_MI", "Hx_stroke", "Hx_cancer"]}
+
+    return pd.DataFrame([{
+        "ID": "WARMUP",
+        "Birth": "1970-01-01",
+        "test_date": datetime.date.today().strftime("%Y-%m-%d"),
+        "Sex": 1,
+        "Side": 1,
+        "HL_duration": 3.0,
+        "Steroid": 1,
+        "IT_dexa": 0,
+        "HBOT": 0,
+        **pta_values,
+        **blood_values,
+        **diagnosis_values,
+        **history_values,
+        "Hx_others": 0
+    }])
+
+
+# ======================
+# 🔹 warm-up
+# ======================
+def _timed(name, func):
+    """단계 1개 실행 (성공 여부 반환, 예외는 상태에 기록)"""
+    t0 = time.perf_counter()
+    try:
+        func()
+        _record_step(name, time.perf_counter() - t0)
+        return True
+    except Exception:
+        _record_step(name, time.perf_counter() - t0, traceback.format_exc(limit=3))
+        return False
+
+
+def _run_steps(steps, attempts=WARMUP_ATTEMPTS, backoff=RETRY_BACKOFF):
+    """단계를 순서대로 실행하고 실패한 단계만 backoff 후 재시도 → 끝까지 실패한 단계 이름 목록"""
+    from artifacts import download_file_from_drive
+
+    pending = list(steps)
+    for attempt in range(max(attempts, 1)):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+            # 일시적 오류로 캐시된 실패 결과(None)를 지우고 다시 받는다
+            download_file_from_drive.clear()
+            for name, _, clear in pending:
+                if clear:
+                    clear()
+        pending = [step for step in pending if not _timed(step[0], step[1])]
+        if not pending:
+            break
+    return [name for name, _, _ in pending]
+
+
+def _warm_hospital(hospital_key, df_patient):
+    """병원 1곳: 모델 번들(정확도 포함) / predictor 구성 → 예측 → SHAP → 전역 중요도 캐시"""
+    from artifacts import create_inference_context, load_global_importance_from_drive
+
+    inference = create_inference_context(f"predictors.{hospital_key}")
+    outputs = inference.predict(df_patient.copy())
+    df_lgbm, df_xgb = outputs[4], outputs[5]
+
+    inference.shap_values(df_lgbm, df_xgb)
+
+    load_global_importance_from_drive(hospital_key)
+
+
+def _warm_matplotlib():
+    """폰트 캐시 생성 및 첫 렌더링 비용 선지불"""
+    import matplotlib.pyplot as plt
+    from lazy_imports import configure_matplotlib
+
+    configure_matplotlib(plt)
+
+    fig, ax = plt.subplots(figsize=(4.5, 1.0))
+    ax.barh(0, 1, color='green', alpha=0.2)
+    ax.scatter(0.5, 0, color='red')
+    ax.set_title("정상범위 / 환자수치")
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    plt.close(fig)
+
+
+def _warm_static_assets():
+    """로고 축소 / 재압축과 CSS 해시를 첫 요청 전에 생성"""
+    from artifacts import get_stylesheet_html, get_image_asset
+    from static_assets import IMAGE_ASSETS
+
+    get_stylesheet_html()
+    for name in IMAGE_ASSETS:
+        get_image_asset(name)
+
+
+def _load_modules():
+    from artifacts import load_preprocessing_and_translation
+
+    if not load_preprocessing_and_translation():
+        raise RuntimeError("preprocessing 모듈 로드 실패")
+
+
+def _load_models():
+    from artifacts import load_models_from_drive
+
+    models = load_models_from_drive()
+    missing = [f"{hospital_key}/{model_type}"
+               for hospital_key, paths in MODEL_FILES.items()
+               for model_type in paths if model_type not in models.get(hospital_key, {})]
+    if missing:
+        raise RuntimeError(f"모델 로드 실패: {', '.join(missing)}")
+
+
+def run_warmup():
+    """모든 아티팩트 로드 후 병원별 모델 / explainer에 가상 환자를 통과시킨다"""
+    from artifacts import (
+        load_preprocessing_and_translation, load_predictor_modules, load_models_from_drive, get_model_bundle,
+        get_image_asset, remote_inference_address
+    )
+
+    _update_state(status="warming")
+    t0 = time.perf_counter()
+
+    # (이름, 실행 함수, 재시도 전 비울 캐시)
+    steps = [
+        ("modules", _load_modules, load_preprocessing_and_translation.clear),
+        ("predictors", load_predictor_modules, load_predictor_modules.clear),
+    ]
+    if not remote_inference_address():
+        steps.append(("models", _load_models, lambda: (load_models_from_drive.clear(), get_model_bundle.clear())))
+
+    df_patient = build_synthetic_patient()
+    for hospital_key in MODEL_FILES:
+        steps.append((f"hospital:{hospital_key}", lambda key=hospital_key: _warm_hospital(key, df_patient), None))
+    steps.append(("matplotlib", _warm_matplotlib, None))
+    steps.append(("static_assets", _warm_static_assets, get_image_asset.clear))
+
+    failed = _run_steps(steps)
+    if not failed:
+        status = "ready"
+    elif any(name in REQUIRED_STEPS for name in failed):
+        status = "failed"
+    else:
+        status = "degraded"  # 필수 모델은 로드됨, 일부 병원 / 부가 자산만 실패
+    _update_state(status=status, failed_steps=failed, elapsed_sec=round(time.perf_counter() - t0, 3))
+    return status != "failed"
+
+
+# reload / warm-up 은 한 번에 하나만 (겹치면 캐시 / sys.modules 교체가 서로 끼어든다)
+_warmup_lock = threading.Lock()
+
+
+def _warmup_then_release():
+    try:
+        run_warmup()
+    finally:
+        _warmup_lock.release()
+
+
+def start_background_warmup():
+    """별도 스레드에서 warm-up 실행 (Streamlit 서버 기동과 병렬), 이미 진행 중이면 None"""
+    if not _warmup_lock.acquire(blocking=False):
+        return None
+    thread = threading.Thread(target=_warmup_then_release, name="ssnhl-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def reload_and_warmup(models=False):
+    """아티팩트 hot-reload 후 백그라운드 warm-up (진행 중인 warm-up이 있으면 None)"""
+    from artifacts import reload_artifacts
+
+    if not _warmup_lock.acquire(blocking=False):
+        return None
+    try:
+        changed = reload_artifacts(models=models)
+        _update_state(status="starting", failed_steps=[], errors={})
+        threading.Thread(target=_warmup_then_release, name="ssnhl-warmup", daemon=True).start()
+    except Exception:
+        _warmup_lock.release()
+        raise
+    return changed
+
+
+def admin_token():
+    """reload 인증 토큰 (SSNHL_ADMIN_TOKEN 또는 secrets의 admin_token, 없으면 reload 비활성)"""
+    token = os.environ.get("SSNHL_ADMIN_TOKEN")
+    if token:
+        return token
+    try:
+        import streamlit as st
+        return st.secrets.get("admin_token")
+    except Exception:
+        return None
+
+
+# ======================
+# 🔹 health / readiness 서버
+# ======================
+class _HealthHandler(BaseHTTPRequestHandler):
+    def _send_json(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/healthz"):
+            code = 200
+        elif self.path.startswith("/readyz"):
+            code = 200 if is_ready() else 503
+        else:
+            self.send_error(404)
+            return
+
+        self._send_json(code, get_status())
+
+    def _authorized(self):
+        token = admin_token()
+        supplied = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        return bool(token) and hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
+
+    def do_POST(self):
+        if not self.path.startswith("/reload"):
+            self.send_error(404)
+            return
+        if not self._authorized():
+            self.send_error(403)
+            return
+
+        changed = reload_and_warmup(models="models=1" in self.path)
+        if changed is None:
+            self._send_json(409, {"error": "warm-up 진행 중"})
+            return
+        self._send_json(202, {"changed": changed})
+
+    def log_message(self, format, *args):
+        pass  # probe 로그는 출력하지 않음
+
+
+def start_health_server(port=HEALTH_PORT, host=HEALTH_HOST):
+    """/healthz, /readyz 를 제공하는 경량 HTTP 서버 (daemon 스레드)"""
+    server = ThreadingHTTPServer((host, port), _HealthHandler)
+    thread = threading.Thread(target=server.serve_forever, name="ssnhl-health", daemon=True)
+    thread.start()
+    return server
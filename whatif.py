@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+혈액검사 수치 what-if 시뮬레이션
+
+환자 입력 1행을 기준으로 조정 가능한 혈액검사 변수마다 x축 범위(LAB_XLIMS)를
+격자로 바꾼 반사실(counterfactual) 행을 만들고, 모든 행을 predict_outcome 1회로
+한꺼번에 예측한다 (LightGBM / 두 번째 모델 모두 배치 예측 1회).
+결과로 변수별 반응 곡선과 "정상범위로 조정 시" 회복 확률을 반환한다.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_module, configure_matplotlib
+
+plt = lazy_module("matplotlib.pyplot", on_load=configure_matplotlib)
+
+# 혈액검사 정상범위
+NORMAL_RANGES = {
+    "WBC": (4.0, 10.0), "RBC": (3.8, 5.2), "Hb": (12.0, 16.0), "PLT": (165, 360),
+    "Neutrophil": (35, 75), "Lymphocyte": (25, 40), "AST": (0, 35), "ALT": (0, 40),
+    "BUN": (5, 19), "Cr": (0.20, 1.10), "Glucose": (70, 110), "Total_Protein": (6.4, 8.3),
+    "Na": (136, 145), "K": (3.5, 5.1), "Cl": (98, 107)
+}
+
+# 변수별 x축(시뮬레이션) 범위 (없으면 DEFAULT_XLIM)
+LAB_XLIMS = {
+    "WBC": (0, 20), "RBC": (0, 8), "Hb": (0, 20), "PLT": (0, 500),
+    "Neutrophil": (0, 100), "Lymphocyte": (0, 100), "AST": (0, 100), "ALT": (0, 100),
+    "BUN": (0, 50), "Cr": (0, 3), "Glucose": (0, 200), "Total_Protein": (0, 10),
+    "Na": (120, 160), "K": (2, 7), "Cl": (80, 120)
+}
+DEFAULT_XLIM = (0, 400)
+GRID_POINTS = 25
+
+
+@dataclass
+class WhatIfResult:
+    """what-if 결과 (확률은 0~1)"""
+    baseline: tuple                                  # (LightGBM, 두 번째 모델)
+    normalized: tuple                                # 이상 수치를 모두 정상범위로 옮긴 경우
+    normalized_values: dict                          # 정상범위로 옮긴 변수 → (현재값, 조정값)
+    curves: dict = field(default_factory=dict)       # 변수 → DataFrame(value, lgbm_prob, second_prob)
+
+
+def normalize_value(value, normal_range):
+    """정상범위 밖이면 가장 가까운 경계값, 안이거나 값이 없으면 그대로"""
+    if value is None or pd.isna(value):
+        return value
+    low, high = normal_range
+    return min(max(value, low), high)
+
+
+def build_whatif_grid(df_input, features, normal_ranges=NORMAL_RANGES, xlims=LAB_XLIMS, n_points=GRID_POINTS):
+    """기준 행 + 정상화 행 + 변수별 격자 행을 하나의 DataFrame으로 생성
+
+    반환: (grid, segments) — segments[변수] = (시작 행, 격자 값 배열)
+    """
+    base = df_input.iloc[[0]].reset_index(drop=True)
+
+    normalized = base.copy()
+    for feature in features:
+        if feature in normal_ranges and feature in normalized.columns:
+            normalized.at[0, feature] = normalize_value(normalized.at[0, feature], normal_ranges[feature])
+
+    blocks, segments = [base, normalized], {}
+    start = 2
+    for feature in features:
+        if feature not in base.columns:
+            continue
+        values = np.linspace(*xlims.get(feature, DEFAULT_XLIM), n_points)
+        block = pd.concat([base] * n_points, ignore_index=True)
+        block[feature] = values
+        blocks.append(block)
+        segments[feature] = (start, values)
+        start += n_points
+
+    grid = pd.concat(blocks, ignore_index=True)
+    # predictor 전처리가 ID 기준으로 행을 합치지 않도록 행마다 고유 ID 부여
+    if "ID" in grid.columns:
+        grid["ID"] = [f"{base.at[0, 'ID']}_whatif_{i}" for i in range(len(grid))]
+    return grid, segments
+
+
+def run_whatif(predict_fn, df_input, features, normal_ranges=NORMAL_RANGES, xlims=LAB_XLIMS, n_points=GRID_POINTS):
+    """predict_fn(DataFrame) -> predict_outcome 반환값 으로 격자 전체를 1회 예측"""
+    grid, segments = build_whatif_grid(df_input, features, normal_ranges, xlims, n_points)
+    outputs = predict_fn(grid)
+    lgbm_prob, second_prob = np.asarray(outputs[1], dtype=float), np.asarray(outputs[3], dtype=float)
+    if len(lgbm_prob) != len(grid) or len(second_prob) != len(grid):
+        raise ValueError(f"예측 결과 행 수({len(lgbm_prob)})가 시뮬레이션 행 수({len(grid)})와 다릅니다.")
+
+    curves = {
+        feature: pd.DataFrame({
+            "value": values,
+            "lgbm_prob": lgbm_prob[start:start + len(values)],
+            "second_prob": second_prob[start:start + len(values)],
+        })
+        for feature, (start, values) in segments.items()
+    }
+
+    base = df_input.iloc[0]
+    normalized_values = {}
+    for feature in features:
+        if feature in normal_ranges and feature in df_input.columns:
+            current = base[feature]
+            adjusted = normalize_value(current, normal_ranges[feature])
+            if current is not None and not pd.isna(current) and adjusted != current:
+                normalized_values[feature] = (current, adjusted)
+
+    return WhatIfResult(
+        baseline=(lgbm_prob[0], second_prob[0]),
+        normalized=(lgbm_prob[1], second_prob[1]),
+        normalized_values=normalized_values,
+        curves=curves,
+    )
+
+
+def plot_response_curve(feature, curve, value=None, normal_range=None, second_model_name="XGBoost",
+                        xlabel="Value", ylabel="Recovery probability (%)"):
+    """변수 1개의 반응 곡선 (정상범위 음영 + 현재 환자 수치 표시)"""
+    fig, ax = plt.subplots(figsize=(4.5, 2.4))
+    if normal_range is not None:
+        ax.axvspan(*normal_range, color='green', alpha=0.15)
+    ax.plot(curve["value"], curve["lgbm_prob"] * 100, color="#1E88E5", linewidth=1.8, label="LightGBM")
+    ax.plot(curve["value"], curve["second_prob"] * 100, color="#43A047", linewidth=1.8, label=second_model_name)
+    if value is not None and not pd.isna(value):
+        ax.axvline(value, color='red', linestyle='--', linewidth=1)
+
+    ax.set_title(feature, fontsize=9, pad=2)
+    ax.set_xlabel(xlabel, fontsize=8)
+    ax.set_ylabel(ylabel, fontsize=8)
+    ax.set_ylim(0, 100)
+    ax.tick_params(labelsize=7)
+    ax.legend(fontsize=7, loc="best")
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.tight_layout()
+    return fig